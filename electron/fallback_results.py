@@ -0,0 +1,109 @@
+# Stand-ins for the match maps of name_matcher and the StatusMatrix of
+# status_matrix, used when the parser modules in rust/ cannot be imported.
+# They answer the same questions with plain lists of status strings and a
+# comparison of every config test with every log test.
+
+
+def status_class_of(status):
+    """Classify a status string as "PASS", "FAIL", "ABSENT" or "OTHER"."""
+    if status == "ABSENT":
+        return "ABSENT"
+    if status.startswith("PASS"):
+        return "PASS"
+    if status.startswith("FAIL"):
+        return "FAIL"
+    return "OTHER"
+
+
+class LinearMatches:
+    """
+    Match map that compares a config test with every log test;
+    match(config_test, log_test) tells whether the two names match.
+    """
+
+    def __init__(self, names, log_results, match):
+        self.name_set = frozenset(names)
+        self.log_results = log_results
+        self.match = match
+
+    def covers(self, name):
+        """Check whether name is one of the config tests."""
+        return name in self.name_set
+
+    def first(self, name):
+        """Return the first log test matching name, or None."""
+        return next(iter(self.all(name)), None)
+
+    def all(self, name):
+        """Return every log test matching name, in log order."""
+        return [log_test for log_test in self.log_results if self.match(name, log_test)]
+
+    def contained(self, log_test):
+        """Return the config tests that match log_test."""
+        return tuple(name for name in self.name_set if self.match(name, log_test))
+
+
+class ListStatusMatrix:
+    """Status table of tests across states, as lists of status strings."""
+
+    def __init__(self, names, columns, orders=None):
+        self.names = names
+        self.columns = columns
+        self.index = {name: row for row, name in enumerate(names)}
+        self.orders = orders
+
+    @classmethod
+    def for_logs(cls, state_results):
+        """Build the matrix of every test in the given states' results."""
+        names = list(dict.fromkeys(name for results in state_results for name in results))
+        matrix = cls(names, [[results.get(name, "ABSENT") for name in names] for results in state_results])
+        matrix.orders = [[matrix.index[name] for name in results] for results in state_results]
+        return matrix
+
+    @classmethod
+    def for_tests(cls, names, state_results, state_matches):
+        """Build the matrix of the given test names, resolved with the match maps of the states."""
+        columns = []
+        for results, matches in zip(state_results, state_matches):
+            log_tests = [matches.first(name) for name in names]
+            columns.append([results[log_test] if log_test is not None else "ABSENT" for log_test in log_tests])
+        return cls(names, columns)
+
+    def status(self, row, column):
+        """Return the status text of a row in a column ("ABSENT" if none)."""
+        return self.columns[column][row]
+
+    def statuses(self, row):
+        """Return the status texts of a row, one per column."""
+        return [column[row] for column in self.columns]
+
+    def failing_mask(self):
+        """0/1 mask of the rows that fail in any column."""
+        return bytes(any(column[row].startswith("FAIL") for column in self.columns) for row in range(len(self.names)))
+
+    def all_pass_mask(self):
+        """0/1 mask of the rows that are "PASS" in every column."""
+        return bytes(all(column[row] == "PASS" for column in self.columns) for row in range(len(self.names)))
+
+    def rows(self, mask=None, inverted=False):
+        """Iterate the row numbers set in mask (or not set, with inverted)."""
+        if mask is None:
+            return iter(range(len(self.names)))
+        return (row for row, flag in enumerate(mask) if bool(flag) != inverted)
+
+    def status_mask(self, column, status_class):
+        """0/1 mask of the rows whose status in a column is of a class."""
+        return bytes(status_class_of(status) == status_class for status in self.columns[column])
+
+    def ordered_rows(self, column, mask):
+        """Return the rows set in mask, in the order of one column's state."""
+        order = self.orders[column] if self.orders is not None else range(len(self.names))
+        return [row for row in order if mask[row]]
+
+    def failing_rows(self, column):
+        """Return the rows that fail in one column, in that state's order."""
+        return self.ordered_rows(column, self.status_mask(column, "FAIL"))
+
+    def fail_count(self, column):
+        """Count the rows that fail in one column."""
+        return sum(1 for status in self.columns[column] if status.startswith("FAIL"))
@@ -1,21 +1,94 @@
 #!/usr/bin/env python3
+import argparse
+import functools
 import json
 import os
-import re
 import sys
 import tempfile
 import shutil
+import time
 from pathlib import Path
 
 # Add the rust directory to the path so we can import the modules
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rust'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fallback_results import LinearMatches, ListStatusMatrix
+from validation_rules import RuleContext, validation_rules
 
 try:
-    from log_parser import parse_log_file as parse_rust_log_file
-    from js_log_parser import parse_js_log_file
+    from log_parser import parse_log_file as parse_rust_log_file, RustLogStreamParser
+    from log_parser import PARSER_VERSION as RUST_PARSER_VERSION
+    from js_log_parser import parse_js_log_file, JsLogStreamParser
+    from js_log_parser import PARSER_VERSION as JS_PARSER_VERSION, noise_rules as js_noise_rules
+    from libtest_json_parser import parse_libtest_json_file, LibtestJsonStreamParser
+    from libtest_json_parser import PARSER_VERSION as LIBTEST_JSON_PARSER_VERSION
+    from nextest_parser import parse_nextest_file, NextestStreamParser
+    from nextest_parser import PARSER_VERSION as NEXTEST_PARSER_VERSION
+    from jest_parser import parse_jest_file, JestStreamParser
+    from jest_parser import PARSER_VERSION as JEST_PARSER_VERSION
+    from js_json_parser import parse_js_json_file, JsJsonStreamParser
+    from js_json_parser import PARSER_VERSION as JS_JSON_PARSER_VERSION
+    from junit_parser import parse_junit_file, JunitStreamParser
+    from junit_parser import PARSER_VERSION as JUNIT_PARSER_VERSION
+    from tap_parser import parse_tap_file, TapStreamParser
+    from tap_parser import PARSER_VERSION as TAP_PARSER_VERSION
+    from pytest_parser import parse_pytest_file, PytestStreamParser
+    from pytest_parser import PARSER_VERSION as PYTEST_PARSER_VERSION
+    from log_io import read_stream, update_from_file, file_was_truncated, start_stream_reader, is_compressed
+    from result_cache import ResultCache, cached_parse, cached_parse_with_index, cached_results
+    from result_cache import cached_parse_with_durations
+    from log_io import read_test_excerpt
+    from result_store import ResultStore
+    from result_filter import SelectiveResults
+    from log_format import detect_log_format, FORMAT_LANGUAGES
+    from name_matcher import CanonicalIndex, ContainmentIndex, ExactMatches
+    from name_rules import name_rules
+    from status_matrix import StatusMatrix
+    from log_sections import parse_sectioned_log_file, SectionedStreamParser, SECTIONS_VERSION
+
+    # Parser per language: (one-shot parse function, incremental parser
+    # class, parser version for cache keys). The JS results also depend on
+    # the noise rules in use.
+    PARSERS = {
+        "rust": (parse_rust_log_file, RustLogStreamParser, RUST_PARSER_VERSION),
+        "javascript": (parse_js_log_file, JsLogStreamParser, f"{JS_PARSER_VERSION}-{js_noise_rules.digest}"),
+        "libtest-json": (parse_libtest_json_file, LibtestJsonStreamParser, LIBTEST_JSON_PARSER_VERSION),
+        "nextest": (parse_nextest_file, NextestStreamParser, NEXTEST_PARSER_VERSION),
+        "jest": (parse_jest_file, JestStreamParser, JEST_PARSER_VERSION),
+        "js-json": (parse_js_json_file, JsJsonStreamParser, JS_JSON_PARSER_VERSION),
+        "junit": (parse_junit_file, JunitStreamParser, JUNIT_PARSER_VERSION),
+        "tap": (parse_tap_file, TapStreamParser, TAP_PARSER_VERSION),
+        "python": (parse_pytest_file, PytestStreamParser, PYTEST_PARSER_VERSION),
+    }
+    # Logs with the output of several test runners are split into sections,
+    # each parsed by one of the parsers above
+    SECTION_PARSERS = {name: parser_class for name, (_, parser_class, _) in PARSERS.items()}
+    PARSERS["mixed"] = (
+        functools.partial(parse_sectioned_log_file, parsers=SECTION_PARSERS),
+        functools.partial(SectionedStreamParser, SECTION_PARSERS),
+        f"{SECTIONS_VERSION}-" + ",".join(f"{name}{version}" for name, (_, _, version) in PARSERS.items()),
+    )
 except ImportError:
+    # Streaming input (stdin / --follow), caching and compact results need the real parsers
+    RustLogStreamParser = JsLogStreamParser = ResultCache = ResultStore = SelectiveResults = None
+    ContainmentIndex = name_rules = detect_log_format = None
+    StatusMatrix = ListStatusMatrix
+
+    def cached_parse(cache, parse_func, filepath, *args, **kwargs):
+        return parse_func(filepath)
+
+    def cached_parse_with_index(*args, **kwargs):
+        raise RuntimeError("Log indexes and excerpts require the log parser modules")
+
+    def cached_parse_with_durations(*args, **kwargs):
+        raise RuntimeError("Test durations (--slow-ratio) require the log parser modules")
+
+    def is_compressed(filepath):
+        return False
+
     # If we can't import, create a simple mock version
-    def parse_rust_log_file(filepath):
+    def parse_rust_log_file(filepath, workers=1):
         results = {}
         try:
             with open(filepath, 'r', encoding='utf-8') as f:
@@ -54,10 +127,151 @@ except ImportError:
             print(f"Error parsing JS log {filepath}: {e}")
         return results
 
-def get_status(test_name, log_results, language="rust"):
-    """Determine if test_name is PASS, FAIL, ERROR, ABSENT or custom."""
+    PARSERS = {
+        "rust": (parse_rust_log_file, None, 0),
+        "javascript": (parse_js_log_file, None, 0),
+    }
+
+# Other names accepted for a language
+LANGUAGE_ALIASES = {
+    "js": "javascript",
+    "vitest": "javascript",
+    "rust-json": "libtest-json",
+    "cargo-nextest": "nextest",
+    "mocha": "jest",
+    "vitest-json": "js-json",
+    "jest-json": "js-json",
+    "junit-xml": "junit",
+    "pytest": "python",
+    "py": "python",
+    "multi": "mixed",
+}
+
+# Language whose logs hold sections of several languages, with results
+# named "language:test_name"
+MIXED_LANGUAGE = "mixed"
+
+# Languages whose configured test names are matched by containment in the
+# log's names (which carry the file or describe blocks around the test)
+CONTAINMENT_LANGUAGES = ["javascript", "js", "jest", "mocha", "js-json", "vitest-json", "jest-json",
+                         "junit", "junit-xml", "tap"]
+
+# Languages whose reports name test files by absolute path; with a
+# project root, they are named relative to it instead
+ROOT_RELATIVE_LANGUAGES = ["js-json"]
+
+# Durations below this are too noisy to call a test slow
+SLOW_TEST_MIN_SECONDS = 0.1
+
+def split_test_language(test_name):
+    """Split a "language:test_name" name of a mixed log.
+
+    Returns (language, test_name), with language None if the name has no
+    language prefix.
+    """
+    language, separator, name = test_name.partition(":")
+    if separator and language in PARSERS:
+        return language, name
+    return None, test_name
+
+def test_names_match(config_test, log_test, language="rust"):
+    """Check if a config test names a log test.
+
+    JavaScript tests (CONTAINMENT_LANGUAGES) match by containment, others
+    exactly. In a mixed log, each log test is matched by the rules of its
+    own language; a config test without a language prefix matches tests
+    of any language.
+    """
+    if get_parser_name(language) == MIXED_LANGUAGE:
+        config_language, config_test = split_test_language(config_test)
+        language, log_test = split_test_language(log_test)
+        if config_language is not None and config_language != language:
+            return False
+        language = language or "rust"
+    if language.lower() in CONTAINMENT_LANGUAGES:
+        return config_test in log_test
+    return config_test == log_test
+
+def config_test_names(entries, language="rust"):
+    """Return the test names listed in a config test list.
+
+    An entry is a test name, or an object {"name": ..., "language": ...}
+    selecting the language of the test in a mixed log; its name becomes
+    "language:name" there. Languages in "language:name" strings may be
+    aliases too.
+    """
+    mixed = get_parser_name(language) == MIXED_LANGUAGE
+    names = []
+    for entry in entries:
+        if isinstance(entry, dict):
+            name = entry.get("name", "")
+            test_language = entry.get("language")
+            if mixed and test_language:
+                parser_name = LANGUAGE_ALIASES.get(test_language.lower(), test_language.lower())
+                if parser_name not in PARSERS:
+                    raise ValueError(f"Unknown language {test_language!r} for test {name!r}")
+                name = f"{parser_name}:{name}"
+        else:
+            name = entry
+            prefix, separator, rest = entry.partition(":")
+            if mixed and separator and LANGUAGE_ALIASES.get(prefix.lower()) in PARSERS:
+                name = f"{LANGUAGE_ALIASES[prefix.lower()]}:{rest}"
+        names.append(name)
+    return names
+
+def build_log_matches(config_tests, state_results, language="rust"):
+    """Build the config test -> log tests match map of each log.
+
+    Names compared exactly are looked up in the results (ExactMatches).
+    For languages with name rules (see name_rules), config and log tests
+    are first compared in canonical form, with a dict lookup per config
+    test (CanonicalIndex).
+    For languages matched by containment (CONTAINMENT_LANGUAGES), one scan
+    of each log's test names through an Aho-Corasick automaton over the
+    config tests replaces a substring check per (config test, log test)
+    pair; with name rules, the containment matches are kept alongside the
+    canonical ones. In mixed logs each candidate is then checked with the
+    rules of its language (test_names_match).
+    Returns a match map (see name_matcher.LogMatches) per log in
+    state_results.
+    """
+    if ContainmentIndex is None:
+        match = functools.partial(test_names_match, language=language)
+        return [LinearMatches(config_tests, results, match) for results in state_results]
+    if get_parser_name(language) == MIXED_LANGUAGE:
+        without_language = lambda test_name: split_test_language(test_name)[1]
+        accept = functools.partial(test_names_match, language=language)
+        index = ContainmentIndex(config_tests, key=without_language)
+        return [index.match_log(results.keys(), without_language, accept) for results in state_results]
+    canonicalize = name_rules.canonicalizer(get_parser_name(language))
+    if canonicalize is not None:
+        index = CanonicalIndex(config_tests, canonicalize, containment=language.lower() in CONTAINMENT_LANGUAGES,
+                               unscope=name_rules.unscoper(get_parser_name(language)))
+        return index.match_logs(state_results)
+    if language.lower() in CONTAINMENT_LANGUAGES:
+        index = ContainmentIndex(config_tests)
+        return [index.match_log(results.keys()) for results in state_results]
+    return [ExactMatches(config_tests, results) for results in state_results]
+
+def get_status(test_name, log_results, language="rust", matches=None):
+    """Determine if test_name is PASS, FAIL, ERROR, ABSENT or custom.
+
+    matches (see build_log_matches) answers containment lookups for the
+    config tests it was built for.
+    """
+    if matches is not None and matches.covers(test_name):
+        log_test = matches.first(test_name)
+        return log_results[log_test] if log_test is not None else "ABSENT"
+    if get_parser_name(language) == MIXED_LANGUAGE:
+        test_language, _ = split_test_language(test_name)
+        if test_language is not None and test_language not in CONTAINMENT_LANGUAGES:
+            return log_results.get(test_name, "ABSENT")
+        for log_test, status in log_results.items():
+            if test_names_match(test_name, log_test, language):
+                return status
+        return "ABSENT"
     # For JavaScript tests, check for containment matches
-    if language.lower() in ["javascript", "js"]:
+    if language.lower() in CONTAINMENT_LANGUAGES:
         # Look for any log test that contains this test name
         for log_test, status in log_results.items():
             # For JS tests, we might need to match just the hierarchical part
@@ -72,6 +286,50 @@ def get_status(test_name, log_results, language="rust"):
         # For other languages, use exact matching
         return log_results.get(test_name, "ABSENT")
 
+def get_duration(test_name, log_results, durations, language="rust", matches=None):
+    """Return the duration in seconds of test_name in one log, or None.
+
+    The log test is found the way get_status() finds it.
+    """
+    if test_name in durations:
+        return durations[test_name]
+    if matches is not None and matches.covers(test_name):
+        log_test = matches.first(test_name)
+        return durations.get(log_test) if log_test is not None else None
+    if language.lower() in CONTAINMENT_LANGUAGES or get_parser_name(language) == MIXED_LANGUAGE:
+        for log_test in log_results.keys():
+            if test_names_match(test_name, log_test, language):
+                return durations.get(log_test)
+    return None
+
+def find_slow_tests(test_names, state_results, state_durations, ratio, language="rust", state_matches=None):
+    """List the tests whose duration grew by at least ratio between states.
+
+    Each state is compared with the earlier ones (before and after with
+    base, after with before). Tests faster than SLOW_TEST_MIN_SECONDS in
+    the slower state are ignored, as their timing is mostly noise.
+    Returns rows of [test, base seconds, before seconds, after seconds,
+    ratio], slowest regression first (missing durations are None).
+    state_matches (see build_log_matches) are the LogMatches of the states.
+    """
+    rows = []
+    state_matches = state_matches or [None] * len(state_results)
+    for test in dict.fromkeys(test_names):
+        durations = [get_duration(test, results, state, language, matches)
+                     for results, state, matches in zip(state_results, state_durations, state_matches)]
+        worst = 0
+        for later in range(1, len(durations)):
+            slow = durations[later]
+            if slow is None or slow < SLOW_TEST_MIN_SECONDS:
+                continue
+            for earlier in durations[:later]:
+                if earlier:
+                    worst = max(worst, slow / earlier)
+        if worst >= ratio:
+            rows.append([test, *durations, round(worst, 2)])
+    rows.sort(key=lambda row: row[-1], reverse=True)
+    return rows
+
 def find_log_files(directory):
     """Find the three log files in the logs directory."""
     base_log = None
@@ -88,8 +346,9 @@ def find_log_files(directory):
     if os.path.exists(logs_dir):
         files = [f for f in os.listdir(logs_dir) if os.path.isfile(os.path.join(logs_dir, f))]
         
-        # Look for files containing the specific substrings
-        for file in files:
+        # Look for files containing the specific substrings. Compressed
+        # logs (_base.log.gz etc.) also match; a plain log takes precedence.
+        for file in sorted(files, key=is_compressed):
             file_path = os.path.join(logs_dir, file)
             if '_base.log' in file and base_log is None:
                 base_log = file_path
@@ -122,316 +381,367 @@ def load_json_file(directory):
     # If no JSON file is found, return empty structure instead of raising an error
     return {"fail_to_pass": [], "pass_to_pass": []}
 
-def validate_test_conditions(f2p_tests, p2p_tests, base_results, before_results, after_results, language="rust"):
-    """Validate the required conditions for the test analysis."""
-    validation_results = []
-    
-    # Convert to sets for easier operations
-    f2p_set = set(f2p_tests)
-    p2p_set = set(p2p_tests)
-    
-    # For JavaScript, we need to handle hierarchical test names with partial matching
-    def is_test_matching(config_test, log_test, language):
-        """Check if a config test matches a log test, with special handling for JavaScript."""
-        if language.lower() in ["javascript", "js"]:
-            # For JS, check for containment or exact match
-            return config_test == log_test or config_test in log_test
-        else:
-            # For other languages, use exact matching
-            return config_test == log_test
-    
-    def find_matching_log_tests(config_test, log_results, language):
-        """Find all log tests that match a config test."""
-        matches = []
-        for log_test in log_results.keys():
-            if is_test_matching(config_test, log_test, language):
-                matches.append(log_test)
-        return matches
-    
-    # 1. At least one failed test in base is present in P2P
-    base_failures_in_p2p = []
-    for test_name, result in base_results.items():
-        if result.startswith("FAIL"):
-            # Check if this test matches any P2P test
-            for p2p_test in p2p_set:
-                if is_test_matching(p2p_test, test_name, language):
-                    base_failures_in_p2p.append(test_name)
-                    break
-    
-    if base_failures_in_p2p:
-        validation_results.append({
-            "status": "PASS",
-            "description": "At least one failed test in base is present in P2P",
-            "examples": base_failures_in_p2p
-        })
-    else:
-        validation_results.append({
-            "status": "FAIL",
-            "description": "At least one failed test in base is present in P2P",
-            "examples": []
-        })
-    
-    # 2. At least one failed test in after is present in F2P / P2P
-    after_failures_in_categories = []
-    for test_name, result in after_results.items():
-        if result.startswith("FAIL"):
-            # Check if this test matches any F2P or P2P test
-            found_match = False
-            for f2p_test in f2p_set:
-                if is_test_matching(f2p_test, test_name, language):
-                    after_failures_in_categories.append(test_name)
-                    found_match = True
-                    break
-            if not found_match:
-                for p2p_test in p2p_set:
-                    if is_test_matching(p2p_test, test_name, language):
-                        after_failures_in_categories.append(test_name)
-                        break
-    
-    if after_failures_in_categories:
-        validation_results.append({
-            "status": "PASS",
-            "description": "At least one failed test in after is present in F2P / P2P",
-            "examples": after_failures_in_categories
-        })
-    else:
-        validation_results.append({
-            "status": "FAIL",
-            "description": "At least one failed test in after is present in F2P / P2P",
-            "examples": []
-        })
-    
-    # 3. At least one F2P test is present and successful in before
-    successful_f2p_in_before = []
-    for f2p_test in f2p_set:
-        # Find matching tests in before results
-        matching_tests = find_matching_log_tests(f2p_test, before_results, language)
-        # Check if any of the matching tests passed
-        for matching_test in matching_tests:
-            if before_results[matching_test].startswith("PASS"):
-                successful_f2p_in_before.append(matching_test)
-                break
-    
-    if successful_f2p_in_before:
-        validation_results.append({
-            "status": "PASS",
-            "description": "At least one F2P test is present and successful in before",
-            "examples": successful_f2p_in_before
-        })
-    else:
-        validation_results.append({
-            "status": "FAIL",
-            "description": "At least one F2P test is present and successful in before",
-            "examples": []
-        })
-    
-    # 4. At least one P2P, that is missing in base, is not passing in before
-    p2p_missing_in_base_not_passing = []
-    for p2p_test in p2p_set:
-        # Find matching tests in before results
-        matching_tests = find_matching_log_tests(p2p_test, before_results, language)
-        
-        # Check conditions for each matching test
-        for matching_test in matching_tests:
-            # Check if test is missing in base (not present in base_results)
-            is_missing_in_base = matching_test not in base_results
-            
-            # Check if test is not passing in before
-            is_not_passing_in_before = (matching_test not in before_results or 
-                                       not before_results[matching_test].startswith("PASS"))
-            
-            # If both conditions are true, add to our list
-            if is_missing_in_base and is_not_passing_in_before:
-                p2p_missing_in_base_not_passing.append(matching_test)
-    
-    # This validation should PASS if we find at least one such test
-    if p2p_missing_in_base_not_passing:
-        validation_results.append({
-            "status": "PASS",
-            "description": "At least one P2P, that is missing in base, is not passing in before",
-            "examples": p2p_missing_in_base_not_passing
-        })
-    else:
-        validation_results.append({
-            "status": "FAIL",
-            "description": "At least one P2P, that is missing in base, is not passing in before",
-            "examples": []
-        })
-    
+def validate_test_conditions(f2p_tests, p2p_tests, base_results, before_results, after_results, language="rust",
+                             state_matches=None, log_matrix=None):
+    """Validate the required conditions for the test analysis.
+
+    The checks are the rules in validation_rules.json (see
+    validation_rules.py). Config tests are matched to log tests through
+    the match map of each state (see build_log_matches), and statuses are
+    read from the StatusMatrix of the logs; both are built here if not
+    given.
+    """
+    state_results = (base_results, before_results, after_results)
+    if state_matches is None:
+        state_matches = build_log_matches(f2p_tests + p2p_tests, state_results, language)
+    if log_matrix is None:
+        log_matrix = StatusMatrix.for_logs(state_results)
+    context = RuleContext(f2p_tests, p2p_tests, [len(results) for results in state_results], log_matrix,
+                          state_matches)
+    validation_results, _ = validation_rules.run_checks(context)
     return validation_results
 
-def make_table(test_names, base_results, before_results, after_results, filter_all_pass=False, language="rust"):
-    rows = []
-    all_pass_count = 0
+def make_table(test_names, base_results, before_results, after_results, filter_all_pass=False, language="rust",
+               state_matches=None):
+    """Build the numbered [test, base, before, after] rows of a config test list.
+
+    Each test is resolved in every state once, into a StatusMatrix. With
+    filter_all_pass, tests that are PASS in all three states are left out.
+    Returns (rows, number of tests left out, tests left out).
+    """
+    test_names = list(test_names)
+    state_results = (base_results, before_results, after_results)
+    if state_matches is None:
+        state_matches = build_log_matches(test_names, state_results, language)
+    matrix = StatusMatrix.for_tests(test_names, state_results, state_matches)
+
     skipped_tests = []
+    shown = matrix.rows()
+    if filter_all_pass:
+        all_pass = matrix.all_pass_mask()
+        skipped_tests = [test_names[row] for row in matrix.rows(all_pass)]
+        shown = matrix.rows(all_pass, inverted=True)
 
-    for test in test_names:
-        base_status = get_status(test, base_results, language)
-        before_status = get_status(test, before_results, language)
-        after_status = get_status(test, after_results, language)
+    # Add serial numbers
+    rows_with_index = [[i + 1, test_names[row], *matrix.statuses(row)] for i, row in enumerate(shown)]
+    return rows_with_index, len(skipped_tests), skipped_tests
 
-        # Check if all three are PASS
-        if filter_all_pass and (base_status == before_status == after_status == "PASS"):
-            all_pass_count += 1
-            skipped_tests.append(test)
-            continue  # skip printing these
+def check_early_rejection_rules(f2p_tests, p2p_tests, base_results, before_results, after_results, test_counts=None):
+    """Check for early rejection rules and return any violations found.
 
-        rows.append([
-            test,
-            base_status,
-            before_status,
-            after_status,
-        ])
+    The rules are in validation_rules.json (see validation_rules.py).
+    test_counts gives the (base, before, after) numbers of tests parsed,
+    when the results only hold some of them.
+    """
+    state_sizes = test_counts or (len(base_results), len(before_results), len(after_results))
+    violations, _ = validation_rules.run_rejections(RuleContext(f2p_tests, p2p_tests, state_sizes))
+    return violations
 
-    # Add serial numbers
-    rows_with_index = [[i + 1] + row for i, row in enumerate(rows)]
-    return rows_with_index, all_pass_count, skipped_tests
+LOG_STATES = ("base", "before", "after")
+
+def get_parser_name(language):
+    """Return the PARSERS key for a language (unknown languages use the Rust text parser)."""
+    name = language.lower()
+    name = LANGUAGE_ALIASES.get(name, name)
+    return name if name in PARSERS else "rust"
+
+def get_parse_func(language, jobs=1, strip_ansi=False, root=None):
+    """Select the one-shot parser for a language.
+
+    With strip_ansi, the parser removes ANSI escape sequences first. root
+    is the project root test files are named relative to
+    (ROOT_RELATIVE_LANGUAGES only).
+    """
+    name = get_parser_name(language)
+    parse_func = PARSERS[name][0]
+    if strip_ansi:
+        if PARSERS[name][1] is None:
+            raise RuntimeError("Stripping ANSI escape sequences requires the log parser modules")
+        parse_func = functools.partial(parse_func, strip_ansi=True)
+    if root and name in ROOT_RELATIVE_LANGUAGES:
+        parse_func = functools.partial(parse_func, root=root)
+    if name in ("rust", MIXED_LANGUAGE):
+        return functools.partial(parse_func, workers=jobs)
+    return parse_func
+
+def get_parser_version(language, strip_ansi=False, root=None):
+    """Return the (name, version, variant) cache key of the parser for a language."""
+    name = get_parser_name(language)
+    variant = ["strip-ansi"] if strip_ansi else []
+    if root and name in ROOT_RELATIVE_LANGUAGES:
+        variant.append(f"root={root}")
+    return name, PARSERS[name][2], ",".join(variant)
+
+def get_stream_parser_class(language):
+    """Select the incremental parser for a language."""
+    parser_class = PARSERS[get_parser_name(language)][1]
+    if parser_class is None:
+        raise RuntimeError("Streaming input requires the log parser modules")
+    return parser_class
+
+def new_stream_parser(language, strip_ansi=False, root=None):
+    """Create an incremental parser for a language."""
+    parser = get_stream_parser_class(language)()
+    parser.strip_ansi = strip_ansi
+    if root and get_parser_name(language) in ROOT_RELATIVE_LANGUAGES:
+        parser.root = root
+    return parser
+
+def resolve_language(language, paths):
+    """Resolve the 'auto' language by sniffing the head of the logs.
+
+    Returns (language, detection), where detection describes the detected
+    format (None unless the language was 'auto'). Logs without any known
+    signature are parsed as Rust, as are all logs when the detection
+    modules are missing. Only the head is sniffed, so 'auto' never
+    resolves to 'mixed': logs with several runners' output must be
+    analyzed with the mixed language explicitly.
+    """
+    if language.lower() != "auto":
+        return language, None
+    if detect_log_format is None:
+        return "rust", None
+
+    log_format, scores = detect_log_format([path for path in paths if path != "-" and os.path.exists(path)])
+    detected = FORMAT_LANGUAGES.get(log_format, "rust")
+    if detected not in PARSERS:
+        raise ValueError(f"Detected {log_format} output, which has no parser")
+    return detected, {"format": log_format, "language": detected, "scores": scores}
+
+def resolve_log_paths(logs_directory, log_paths=None):
+    """Return the (base, before, after) log paths.
+
+    Entries in log_paths (state -> path, '-' for stdin) override the files
+    found in logs_directory.
+    """
+    log_paths = log_paths or {}
+    found = dict(zip(LOG_STATES, find_log_files(logs_directory)))
+    paths = tuple(log_paths.get(state) or found[state] for state in LOG_STATES)
 
-def check_early_rejection_rules(f2p_tests, p2p_tests, base_results, before_results, after_results):
-    """Check for early rejection rules and return any violations found."""
-    violations = []
+    if not all(paths):
+        raise FileNotFoundError("Missing required log files (_base.log, _before.log, _after.log)")
+    if list(paths).count("-") > 1:
+        raise ValueError("Only one log can be read from stdin")
+    return paths
+
+def build_report(f2p_tests, p2p_tests, base_results, before_results, after_results, language="rust", totals=None,
+                 state_matches=None):
+    """Validate parsed results and build the analysis result.
+
+    totals gives the (test count, FAIL count) of each state when the
+    results only hold some of the tests (targeted parsing).
+    state_matches (see build_log_matches) are built here if not given.
+    With name rules for the language, result["nameResolution"] counts
+    the config tests of each state resolved by each path (see
+    name_matcher.RESOLUTION_PATHS).
+    result["ruleTimings"] gives the time spent on each validation rule.
+    """
+    state_results = (base_results, before_results, after_results)
+    if state_matches is None:
+        state_matches = build_log_matches(f2p_tests + p2p_tests, state_results, language)
+    test_counts = [count for count, _ in totals] if totals else [len(results) for results in state_results]
+
+    # Status codes of every log test, shared by the checks and the tables
+    log_matrix = StatusMatrix.for_logs(state_results)
+
+    # The validation checks and early rejection rules run on one context,
+    # so the masks they have in common are built once
+    context = RuleContext(f2p_tests, p2p_tests, test_counts, log_matrix, state_matches)
+    validation_results, check_timings = validation_rules.run_checks(context)
+    early_rejection_violations, rejection_timings = validation_rules.run_rejections(context)
     
-    # Combine F2P and P2P tests for checking
-    all_configured_tests = f2p_tests + p2p_tests
+    # Add early rejection violations to validation results
+    if early_rejection_violations:
+        for violation in early_rejection_violations:
+            validation_results.append({
+                "status": "FAIL",
+                "description": f"Early rejection rule violated: {violation}",
+                "examples": []
+            })
     
-    # Check for variable/unstable values in test names (e.g., timestamps, UUIDs)
-    for test_name in all_configured_tests:
-        # Look for patterns that indicate unstable values
-        # Check in order of specificity to avoid false positives
-        
-        # UUIDs (8-4-4-4-12 hex format) - check first as they contain digits that could match other patterns
-        if re.search(r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}', test_name):
-            violations.append(f"Test name contains unstable values (UUID): {test_name}")
-        # Build times (e.g., "built in 1.73s")
-        elif re.search(r'built in \d+\.\d+s', test_name):
-            violations.append(f"Test name contains unstable values (build time): {test_name}")
-        # Date strings (YYYY-MM-DD format)
-        elif re.search(r'\d{4}-\d{2}-\d{2}', test_name):
-            violations.append(f"Test name contains unstable values (date): {test_name}")
-        # Timestamps (10 or more consecutive digits) - check last to avoid matching UUIDs
-        elif re.search(r'\d{10,}', test_name):
-            violations.append(f"Test name contains unstable values (timestamp): {test_name}")
+    # Show all failing tests in a single table. The rows are log tests, so
+    # their F2P / P2P membership is an exact lookup.
+    failing_tests_rows = []
     
-    # Check for duplicated test names
-    test_name_counts = {}
-    for test_name in all_configured_tests:
-        test_name_counts[test_name] = test_name_counts.get(test_name, 0) + 1
+    # Create sets for quick lookup
+    f2p_set = set(f2p_tests)
+    p2p_set = set(p2p_tests)
     
-    for test_name, count in test_name_counts.items():
-        if count > 1:
-            violations.append(f"Test name is duplicated ({count} times): {test_name}")
+    for row in log_matrix.rows(log_matrix.failing_mask()):
+        test_name = log_matrix.names[row]
+        # Determine category membership
+        in_f2p = "Yes" if test_name in f2p_set else "No"
+        in_p2p = "Yes" if test_name in p2p_set else "No"
+        failing_tests_rows.append([test_name, in_f2p, in_p2p, *log_matrix.statuses(row)])
     
-    # Check if logs are empty
-    if not base_results:
-        violations.append("Base log is empty")
-    if not before_results:
-        violations.append("Before log is empty")
-    if not after_results:
-        violations.append("After log is empty")
+    # Fail to Pass
+    f2p_table, _, _ = make_table(f2p_tests, base_results, before_results, after_results, language=language,
+                                 state_matches=state_matches)
     
-    # Check if F2P or P2P lists are empty
-    if not f2p_tests:
-        violations.append("FAIL_TO_PASS list is empty")
-    if not p2p_tests:
-        violations.append("PASS_TO_PASS list is empty")
+    # Pass to Pass
+    p2p_table, all_pass_count, skipped_tests = make_table(
+        p2p_tests, base_results, before_results, after_results, filter_all_pass=True, language=language,
+        state_matches=state_matches
+    )
     
-    return violations
+    if totals:
+        base_fail_count, before_fail_count, after_fail_count = [fail_count for _, fail_count in totals]
+    else:
+        base_fail_count, before_fail_count, after_fail_count = [log_matrix.fail_count(column) for column in range(3)]
+
+    # Prepare the result
+    result = {
+        "success": True,
+        "validationResults": validation_results,
+        "failingTests": failing_tests_rows,
+        "failToPassTests": f2p_table,
+        "passToPassTests": p2p_table,
+        "summary": {
+            "totalF2P": len(f2p_tests),
+            "totalP2P": len(p2p_tests),
+            "baseFailCount": base_fail_count,
+            "beforeFailCount": before_fail_count,
+            "afterFailCount": after_fail_count,
+            "allPassCount": all_pass_count
+        }
+    }
+
+    result["ruleTimings"] = check_timings + rejection_timings
+
+    # How many config tests were resolved by each matching path, in each
+    # state, when names are matched in canonical form
+    if all(hasattr(matches, "resolution_counts") for matches in state_matches):
+        result["nameResolution"] = {state: matches.resolution_counts()
+                                    for state, matches in zip(LOG_STATES, state_matches)}
+    
+    return result
+
+def complete_targeted_results(state_results, wanted):
+    """Fill in the other states of failing tests outside wanted.
+
+    The failing-tests table shows every test that fails in any state; a
+    targeted parse only stored it where it failed, so its status in the
+    other states is restored from what the parser dropped.
+    Returns the (test count, FAIL count) of each state.
+    """
+    totals = []
+    for results in state_results:
+        if isinstance(results, SelectiveResults):
+            totals.append((results.test_count, results.fail_count))
+        else:
+            # Full results served from cache
+            totals.append((len(results), sum(1 for status in results.values() if status.startswith("FAIL"))))
+
+    failing = {name for results in state_results for name, status in results.items()
+               if name not in wanted and status.startswith("FAIL")}
+    for results in state_results:
+        if isinstance(results, SelectiveResults):
+            results.restore(failing)
+    return totals
 
-def analyze_logs(logs_directory, language="rust"):
-    """Analyze logs and return results as JSON."""
+def analyze_logs(logs_directory, language="rust", jobs=1, log_paths=None, cache=None, build_index=False,
+                 targeted=False, strip_ansi=False, slow_ratio=None, root=None):
+    """Analyze logs and return results as JSON.
+
+    jobs is the number of processes used to parse each Rust log (None for
+    one per CPU). log_paths overrides individual log files, see
+    resolve_log_paths(). Parsed results are reused from cache (a
+    ResultCache) when the same log was parsed before, and a log that only
+    grew since is resumed from a checkpoint. With build_index, each log's
+    byte-offset index is cached too, so later excerpt requests do not have
+    to re-read the logs.
+
+    With targeted, only the tests in fail_to_pass / pass_to_pass and
+    failing tests are kept from each log (unless the full results are
+    already cached). JavaScript tests (CONTAINMENT_LANGUAGES) are matched by
+    containment, so their logs are always parsed fully.
+
+    With strip_ansi, ANSI escape sequences (colored output) are removed
+    from the logs before they are parsed. root is the project root that
+    the test files of JSON reports are named relative to.
+
+    With the mixed language, each log is split into sections by test
+    runner and tests are named "language:test_name"; see
+    config_test_names() for how the JSON selects a test's language.
+
+    With slow_ratio, test durations are read too (and cached with the
+    results), and result["slowTests"] lists the fail_to_pass /
+    pass_to_pass tests whose duration grew by at least that ratio between
+    states, see find_slow_tests().
+    """
     try:
         # Load test definitions from JSON
         data = load_json_file(logs_directory)
 
-        f2p_tests = data.get("fail_to_pass", [])
-        p2p_tests = data.get("pass_to_pass", [])
-
         # Load logs by suffix
-        base_log_path, before_log_path, after_log_path = find_log_files(logs_directory)
-        
-        if not base_log_path or not before_log_path or not after_log_path:
-            raise FileNotFoundError("Missing required log files (_base.log, _before.log, _after.log)")
+        paths = resolve_log_paths(logs_directory, log_paths)
+        language, detection = resolve_language(language, paths)
+
+        f2p_tests = config_test_names(data.get("fail_to_pass", []), language)
+        p2p_tests = config_test_names(data.get("pass_to_pass", []), language)
         
         # Select parser based on language
-        if language.lower() in ["javascript", "js"]:
-            parse_func = parse_js_log_file
-        else:
-            parse_func = parse_rust_log_file
-        
-        base_results = parse_func(base_log_path)
-        before_results = parse_func(before_log_path)
-        after_results = parse_func(after_log_path)
-        
-        # Check for early rejection rules
-        early_rejection_violations = check_early_rejection_rules(f2p_tests, p2p_tests, base_results, before_results, after_results)
-        
-        # Validate test conditions
-        validation_results = validate_test_conditions(f2p_tests, p2p_tests, base_results, before_results, after_results, language)
-        
-        # Add early rejection violations to validation results
-        if early_rejection_violations:
-            for violation in early_rejection_violations:
-                validation_results.append({
-                    "status": "FAIL",
-                    "description": f"Early rejection rule violated: {violation}",
-                    "examples": []
-                })
-        
-        # Show all failing tests in a single table
-        all_test_names = set(base_results.keys()) | set(before_results.keys()) | set(after_results.keys())
-        failing_tests_rows = []
-        
-        # Create sets for quick lookup
-        f2p_set = set(f2p_tests)
-        p2p_set = set(p2p_tests)
-        
-        for test_name in all_test_names:
-            base_status = get_status(test_name, base_results)
-            before_status = get_status(test_name, before_results)
-            after_status = get_status(test_name, after_results)
-            
-            # Check if any state has a FAIL status
-            if (base_status.startswith("FAIL") or 
-                before_status.startswith("FAIL") or 
-                after_status.startswith("FAIL")):
-                # Determine category membership
-                in_f2p = "Yes" if test_name in f2p_set else "No"
-                in_p2p = "Yes" if test_name in p2p_set else "No"
-                    
-                failing_tests_rows.append([
-                    test_name,
-                    in_f2p,
-                    in_p2p,
-                    base_status,
-                    before_status,
-                    after_status
-                ])
-        
-        # Fail to Pass
-        f2p_table, _, _ = make_table(f2p_tests, base_results, before_results, after_results, language=language)
+        parse_func = get_parse_func(language, jobs, strip_ansi, root)
+        parser_version = get_parser_version(language, strip_ansi, root)
+
+        wanted = None
+        # Names matched by containment or in canonical form can differ from
+        # the log's, so their logs are parsed fully
+        if (targeted and SelectiveResults is not None and language.lower() not in CONTAINMENT_LANGUAGES
+                and get_parser_name(language) != MIXED_LANGUAGE
+                and name_rules.canonicalizer(get_parser_name(language)) is None):
+            wanted = frozenset(f2p_tests + p2p_tests)
         
-        # Pass to Pass
-        p2p_table, all_pass_count, skipped_tests = make_table(
-            p2p_tests, base_results, before_results, after_results, filter_all_pass=True, language=language
-        )
+        # Test names are interned once across the three states and statuses
+        # kept as compact codes; each state's dict is dropped once converted
+        store = ResultStore() if ResultStore is not None else None
+        state_results = []
+        state_durations = []
+        for state, path in zip(LOG_STATES, paths):
+            durations = {} if slow_ratio is not None else None
+            if path == "-":
+                parser = new_stream_parser(language, strip_ansi, root)
+                parser.durations = durations
+                if wanted is not None:
+                    parser.results = SelectiveResults(wanted)
+                read_stream(parser, sys.stdin.buffer)
+                results = parser.close()
+            elif slow_ratio is not None:
+                results, durations = cached_parse_with_durations(cache, parse_func, path, *parser_version)
+            elif build_index and cache is not None:
+                results, _ = cached_parse_with_index(cache, parse_func, path, *parser_version)
+            elif wanted is not None:
+                # Targeted results depend on the test lists and are not cached
+                results = cached_results(cache, path, *parser_version)
+                if results is None:
+                    results = parse_func(path, results=SelectiveResults(wanted))
+            else:
+                results = cached_parse(cache, parse_func, path, *parser_version,
+                                       new_parser=functools.partial(new_stream_parser, language, strip_ansi, root))
+            if store and wanted is None:
+                results = store.add_state(state, results)
+            state_results.append(results)
+            state_durations.append(durations)
+            results = None
+
+        totals = None
+        if wanted is not None:
+            totals = complete_targeted_results(state_results, wanted)
+            if store:
+                state_results = [store.add_state(state, results) for state, results in zip(LOG_STATES, state_results)]
+        base_results, before_results, after_results = state_results
         
-        # Prepare the result
-        result = {
-            "success": True,
-            "validationResults": validation_results,
-            "failingTests": failing_tests_rows,
-            "failToPassTests": f2p_table,
-            "passToPassTests": p2p_table,
-            "summary": {
-                "totalF2P": len(f2p_tests),
-                "totalP2P": len(p2p_tests),
-                "baseFailCount": sum(1 for status in base_results.values() if status.startswith("FAIL")),
-                "beforeFailCount": sum(1 for status in before_results.values() if status.startswith("FAIL")),
-                "afterFailCount": sum(1 for status in after_results.values() if status.startswith("FAIL")),
-                "allPassCount": all_pass_count
+        state_matches = build_log_matches(f2p_tests + p2p_tests, state_results, language)
+        result = build_report(f2p_tests, p2p_tests, base_results, before_results, after_results, language, totals,
+                              state_matches)
+        if slow_ratio is not None:
+            result["slowTests"] = {
+                "ratio": slow_ratio,
+                "tests": find_slow_tests(f2p_tests + p2p_tests, state_results, state_durations, slow_ratio, language,
+                                         state_matches),
             }
-        }
-        
+        if detection:
+            result["detectedFormat"] = detection
         return result
         
     except Exception as e:
@@ -440,12 +750,175 @@ def analyze_logs(logs_directory, language="rust"):
             "error": str(e)
         }
 
+def get_test_excerpt(logs_directory, test_name, state="after", language="rust", log_paths=None, cache=None,
+                     strip_ansi=False, root=None):
+    """Return the status line and failure output of one test in one state's log.
+
+    The log's byte-offset index comes from cache when available, so only
+    the test's own spans are read from the log.
+    """
+    try:
+        paths = dict(zip(LOG_STATES, resolve_log_paths(logs_directory, log_paths)))
+        path = paths[state]
+        if path == "-":
+            raise ValueError("Excerpts cannot be read from stdin")
+        language, _ = resolve_language(language, [path])
+
+        results, index = cached_parse_with_index(cache, get_parse_func(language, strip_ansi=strip_ansi, root=root),
+                                                path, *get_parser_version(language, strip_ansi, root))
+
+        # Resolve the configured name to the name in the log
+        matches, = build_log_matches([test_name], [index["tests"]], language)
+        log_test = matches.first(test_name) or test_name
+
+        excerpt = read_test_excerpt(path, index, log_test)
+        return {
+            "success": True,
+            "test": test_name,
+            "logTest": log_test,
+            "state": state,
+            "status": get_status(log_test, results),
+            **excerpt,
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+def follow_logs(logs_directory, language="rust", log_paths=None, interval=1.0, emit=None, strip_ansi=False,
+                root=None):
+    """Analyze logs that are still being written, re-reporting as they grow.
+
+    Each poll only the bytes appended since the last one are parsed. Every
+    time new results arrive, the analysis is re-run on the results so far
+    and passed to emit. Following stops when stdin (if used) reaches end of
+    input, or on KeyboardInterrupt. Returns the final analysis.
+    """
+    if emit is None:
+        emit = lambda result: print(json.dumps(result), flush=True)
+
+    try:
+        data = load_json_file(logs_directory)
+        paths = resolve_log_paths(logs_directory, log_paths)
+        # Logs that do not exist yet cannot be sniffed
+        language, _ = resolve_language(language, paths)
+        f2p_tests = config_test_names(data.get("fail_to_pass", []), language)
+        p2p_tests = config_test_names(data.get("pass_to_pass", []), language)
+        parsers = [new_stream_parser(language, strip_ansi, root) for _ in paths]
+        stdin_chunks = start_stream_reader(sys.stdin.buffer) if "-" in paths else None
+    except Exception as e:
+        result = {"success": False, "error": str(e)}
+        emit(result)
+        return result
+
+    def report():
+        return build_report(f2p_tests, p2p_tests, *[parser.snapshot() for parser in parsers], language)
+
+    result = None
+    try:
+        while True:
+            changed = False
+            stdin_done = False
+            for index, path in enumerate(paths):
+                if path == "-":
+                    while not stdin_chunks.empty():
+                        chunk = stdin_chunks.get()
+                        if chunk is None:
+                            stdin_done = True
+                            break
+                        parsers[index].feed(chunk)
+                        changed = True
+                elif os.path.exists(path):
+                    if file_was_truncated(parsers[index], path):
+                        # Log was rewritten, start over
+                        parsers[index] = new_stream_parser(language, strip_ansi, root)
+                    if update_from_file(parsers[index], path):
+                        changed = True
+
+            if stdin_done:
+                break
+            if changed or result is None:
+                result = report()
+                emit(result)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+    for parser in parsers:
+        parser.close()
+    result = report()
+    emit(result)
+    return result
+
+def parse_args(argv):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Analyze test logs across base/before/after states.")
+    parser.add_argument("logs_directory")
+    parser.add_argument("language", nargs="?", default="rust",
+                        help="log format: rust (default), javascript, jest, js-json, junit, tap, python, libtest-json, "
+                             "nextest, mixed for logs with the output of several test runners (never detected), "
+                             "or auto to detect it")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="processes used to parse each Rust or mixed log (0 for one per CPU)")
+    for state in LOG_STATES:
+        parser.add_argument(f"--{state}", metavar="PATH",
+                            help=f"{state} log to use instead of the one in logs_directory ('-' for stdin)")
+    parser.add_argument("--follow", "-f", action="store_true",
+                        help="keep reading the logs as they grow and print a JSON line per update")
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="seconds between polls in --follow mode")
+    parser.add_argument("--cache-dir", metavar="DIR",
+                        help="directory of the parsed-results cache (default: $LOG_ANALYZER_CACHE_DIR or ~/.cache/log-analyzer)")
+    parser.add_argument("--cache-size", type=int, default=256, metavar="MB",
+                        help="size cap of the parsed-results cache")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="parse every log instead of reusing cached results")
+    parser.add_argument("--clear-cache", action="store_true",
+                        help="remove all cached results before analyzing")
+    parser.add_argument("--index", action="store_true",
+                        help="also cache a byte-offset index of each log for fast --excerpt lookups")
+    parser.add_argument("--strip-ansi", action="store_true",
+                        help="remove ANSI escape sequences (colored output) from the logs before parsing")
+    parser.add_argument("--root", metavar="DIR",
+                        help="project root that the test files of JSON reports are named relative to "
+                             "(default: the report's rootDir, else the paths as reported)")
+    parser.add_argument("--slow-ratio", type=float, metavar="RATIO",
+                        help="report tests whose duration grew by at least RATIO between base, before and after")
+    parser.add_argument("--targeted", action="store_true",
+                        help="only keep the tests listed in fail_to_pass / pass_to_pass (and failing tests) from each log")
+    parser.add_argument("--excerpt", metavar="TEST",
+                        help="print the status line and failure output of TEST instead of analyzing")
+    parser.add_argument("--state", choices=LOG_STATES, default="after",
+                        help="log to take the --excerpt from")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print(json.dumps({"success": False, "error": "Usage: python log_analyzer.py <logs_directory> [language]"}))
         sys.exit(1)
     
-    logs_directory = sys.argv[1]
-    language = sys.argv[2] if len(sys.argv) > 2 else "rust"
-    result = analyze_logs(logs_directory, language)
-    print(json.dumps(result, indent=2))
\ No newline at end of file
+    args = parse_args(sys.argv[1:])
+    log_paths = {state: getattr(args, state) for state in LOG_STATES}
+
+    cache = None
+    if ResultCache is not None:
+        cache = ResultCache(args.cache_dir, max_size=args.cache_size * 1024 * 1024)
+        if args.clear_cache:
+            cache.clear()
+        if args.no_cache:
+            cache = None
+
+    if args.excerpt:
+        result = get_test_excerpt(args.logs_directory, args.excerpt, args.state, args.language,
+                                  log_paths=log_paths, cache=cache, strip_ansi=args.strip_ansi, root=args.root)
+        print(json.dumps(result, indent=2))
+    elif args.follow:
+        follow_logs(args.logs_directory, args.language, log_paths, interval=args.interval,
+                    strip_ansi=args.strip_ansi, root=args.root)
+    else:
+        result = analyze_logs(args.logs_directory, args.language, jobs=args.jobs or None,
+                              log_paths=log_paths, cache=cache, build_index=args.index,
+                              targeted=args.targeted, strip_ansi=args.strip_ansi,
+                              slow_ratio=args.slow_ratio, root=args.root)
+        print(json.dumps(result, indent=2))
\ No newline at end of file
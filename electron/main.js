@@ -541,7 +541,10 @@ async function analyzeLogs(files, language = 'rust') {
       // Run the Python analysis script
       const pythonScript = path.join(__dirname, 'log_analyzer.py');
       Logger.log(`Running Python script: ${pythonScript} with directory: ${tempDir} and language: ${language}`);
-      const pythonProcess = spawn('python', [pythonScript, tempDir, language]);
+      // The app analyzes one-off copies of the logs, so parsed results are
+      // only cached when a cache directory is configured
+      const cacheArgs = process.env.LOG_ANALYZER_CACHE_DIR ? [] : ['--no-cache'];
+      const pythonProcess = spawn('python', [pythonScript, tempDir, language, ...cacheArgs]);
 
       let stdout = '';
       let stderr = '';
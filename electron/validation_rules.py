@@ -0,0 +1,306 @@
+import json
+import os
+import re
+import time
+from collections import Counter
+
+# The validation checks and early-rejection rules are declared in a JSON
+# file, by default the one shipped next to this module:
+#   {"checks": [{"name", "description", "rule"}],
+#    "rejections": [{"name", "rule", "message", "group"?}]}
+# Check rules pass or fail on the log tests matching the configured tests:
+#   exists t in P2P where base=FAIL       PASS if a log test of base that
+#                                         matches a P2P test fails there
+#   no t in F2P,P2P of after where after=FAIL
+#                                         PASS if there is no such test
+#   exists first t in F2P where before=PASS
+#                                         only the first such log test of
+#                                         each F2P test is an example
+# t ranges over the log tests of the state given with "of", else of the
+# first state in the where clause; conditions ("state=CLASS" or
+# "state!=CLASS", joined by "and") compare a status class (PASS and FAIL
+# include free-form statuses starting with them, ABSENT, OTHER).
+# Rejection rules report one violation per configured test, or per log or
+# list:
+#   each t in F2P,P2P where name ~ /\d{10,}/
+#   each t in F2P,P2P where count > 1
+#   empty base | empty F2P
+# message is formatted with {t} and {count}. Of the rules sharing a group,
+# a test is only reported by the first that matches it; a test listed more
+# than once is checked against a name pattern each time.
+VALIDATION_RULES_ENV = "LOG_ANALYZER_VALIDATION_RULES"
+DEFAULT_VALIDATION_RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "validation_rules.json")
+
+STATES = ("base", "before", "after")
+TEST_LISTS = ("F2P", "P2P")
+STATUS_CLASSES = ("PASS", "FAIL", "ABSENT", "OTHER")
+
+TESTS = r"(\w+)\s+in\s+(\w+(?:\s*[,|]\s*\w+)*)"
+check_rule_pattern = re.compile(r"\s*(exists|no)\s+(?:(first)\s+)?" + TESTS + r"(?:\s+of\s+(\w+))?(?:\s+where\s+(.+?))?\s*")
+condition_pattern = re.compile(r"\s*(\w+)\s*(!?=)\s*(\w+)\s*")
+each_rule_pattern = re.compile(r"\s*each\s+" + TESTS + r"\s+where\s+(?:name\s*~\s*/(.*)/|count\s*(>=|>|==)\s*(\d+))\s*")
+empty_rule_pattern = re.compile(r"\s*empty\s+(\w+)\s*")
+
+COUNT_OPERATORS = {
+    ">": lambda count, limit: count > limit,
+    ">=": lambda count, limit: count >= limit,
+    "==": lambda count, limit: count == limit,
+}
+
+
+def _test_lists(text, rule):
+    lists = [name.strip().upper() for name in re.split(r"[,|]", text)]
+    unknown = [name for name in lists if name not in TEST_LISTS]
+    if unknown:
+        raise ValueError(f"Unknown test list {unknown[0]!r} in validation rule {rule!r}")
+    return tuple(dict.fromkeys(lists))
+
+
+def _state(name, rule):
+    if name.lower() not in STATES:
+        raise ValueError(f"Unknown state {name!r} in validation rule {rule!r}")
+    return STATES.index(name.lower())
+
+
+class RuleContext:
+    """
+    The data the rules run on: the configured tests, the number of tests
+    in each log, the StatusMatrix of the logs and the match maps of the
+    states (see build_log_matches).
+    Every mask a rule needs is computed once, as an integer holding one
+    0/1 byte per matrix row, and shared with the other rules, so a rule
+    only adds integer operations on top of the passes already made.
+    """
+
+    def __init__(self, f2p_tests, p2p_tests, state_sizes, matrix=None, state_matches=None):
+        self.lists = {"F2P": f2p_tests, "P2P": p2p_tests}
+        self.state_sizes = state_sizes
+        self.matrix = matrix
+        self.state_matches = state_matches
+        self._masks = {}
+
+    def mask(self, key, build):
+        """Return the mask cached under key, building it with build() once."""
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = self._masks[key] = build()
+        return mask
+
+    def ones(self):
+        """Mask with every row set."""
+        return self.mask("ones", lambda: int.from_bytes(b"\x01" * len(self.matrix.names), "little"))
+
+    def status_mask(self, state, status_class):
+        """Mask of the rows whose status in state is of status_class."""
+        return self.mask(("status", state, status_class),
+                         lambda: int.from_bytes(self.matrix.status_mask(state, status_class), "little"))
+
+    def match_mask(self, test_list, state):
+        """Mask of the rows that are log tests of state matching a test of test_list."""
+        def build():
+            matches = self.state_matches[state]
+            index = self.matrix.index
+            flags = bytearray(len(self.matrix.names))
+            for name in dict.fromkeys(self.lists[test_list]):
+                for log_test in matches.all(name):
+                    flags[index[log_test]] = 1
+            return int.from_bytes(flags, "little")
+        return self.mask(("match", test_list, state), build)
+
+    def first_matches(self, test_lists, state, mask):
+        """
+        Mask of the first row set in mask among the log tests of state
+        matching each test of test_lists.
+        """
+        matches = self.state_matches[state]
+        index = self.matrix.index
+        size = len(self.matrix.names)
+        flags = mask.to_bytes(size, "little")
+        first = bytearray(size)
+        for name in self.configured_tests(test_lists):
+            for log_test in matches.all(name):
+                row = index[log_test]
+                if flags[row]:
+                    first[row] = 1
+                    break
+        return int.from_bytes(first, "little")
+
+    def rows(self, state, mask):
+        """Return the names of the rows set in mask, in state's order."""
+        names = self.matrix.names
+        flags = mask.to_bytes(len(names), "little")
+        return [names[row] for row in self.matrix.ordered_rows(state, flags)]
+
+    def configured_tests(self, test_lists):
+        """Return the tests of test_lists, each once, in list order."""
+        return list(dict.fromkeys(name for test_list in test_lists for name in self.lists[test_list]))
+
+    def listed_tests(self, test_lists):
+        """
+        Return (position, test) for every entry of test_lists, position
+        numbering the entries of all TEST_LISTS in order.
+        """
+        listed = []
+        position = 0
+        for test_list in TEST_LISTS:
+            if test_list in test_lists:
+                listed.extend(enumerate(self.lists[test_list], position))
+            position += len(self.lists[test_list])
+        return listed
+
+    def counts(self, test_lists):
+        """Count how often each test is listed in test_lists."""
+        return Counter(name for test_list in test_lists for name in self.lists[test_list])
+
+
+class CheckRule:
+    """An exists / no rule, compiled to an AND of masks."""
+
+    def __init__(self, name, description, rule):
+        self.name = name
+        self.description = description
+        match = check_rule_pattern.fullmatch(rule)
+        if match is None:
+            raise ValueError(f"Invalid validation rule {rule!r}")
+        quantifier, first, _, test_lists, state, where = match.groups()
+        self.exists = quantifier == "exists"
+        self.first = first is not None
+        self.test_lists = _test_lists(test_lists, rule)
+        self.conditions = []
+        for condition in re.split(r"\s+and\s+", where) if where else ():
+            parts = condition_pattern.fullmatch(condition)
+            if parts is None:
+                raise ValueError(f"Invalid condition {condition!r} in validation rule {rule!r}")
+            condition_state, operator, status_class = parts.groups()
+            if status_class.upper() not in STATUS_CLASSES:
+                raise ValueError(f"Unknown status {status_class!r} in validation rule {rule!r}")
+            self.conditions.append((_state(condition_state, rule), operator == "!=", status_class.upper()))
+        if state is None and not self.conditions:
+            raise ValueError(f"Validation rule {rule!r} needs a state, with \"of\" or in a condition")
+        self.state = _state(state, rule) if state is not None else self.conditions[0][0]
+
+    def evaluate(self, context):
+        """Return the validation result, with the matching log tests as examples."""
+        mask = 0
+        for test_list in self.test_lists:
+            mask |= context.match_mask(test_list, self.state)
+        for state, negated, status_class in self.conditions:
+            condition = context.status_mask(state, status_class)
+            mask &= condition ^ context.ones() if negated else condition
+        if mask and self.first:
+            mask = context.first_matches(self.test_lists, self.state, mask)
+        examples = context.rows(self.state, mask) if mask else []
+        return {
+            "status": "PASS" if bool(examples) == self.exists else "FAIL",
+            "description": self.description,
+            "examples": examples,
+        }
+
+
+class RejectionRule:
+    """An each / empty rule, giving violation messages."""
+
+    def __init__(self, name, rule, message, group=None):
+        self.name = name
+        self.message = message
+        self.group = group or name
+        self.pattern = self.count = self.empty = None
+        match = each_rule_pattern.fullmatch(rule)
+        if match is not None:
+            _, test_lists, pattern, operator, limit = match.groups()
+            self.test_lists = _test_lists(test_lists, rule)
+            if pattern is not None:
+                self.pattern = re.compile(pattern.replace(r"\/", "/"))
+            else:
+                self.count = (COUNT_OPERATORS[operator], int(limit))
+            return
+        match = empty_rule_pattern.fullmatch(rule)
+        if match is None:
+            raise ValueError(f"Invalid validation rule {rule!r}")
+        source = match.group(1)
+        if source.upper() in TEST_LISTS:
+            self.empty = source.upper()
+        else:
+            self.empty = _state(source, rule)
+
+    def evaluate(self, context):
+        """
+        Return the violations as [(position, message)], with the position
+        (see RuleContext.listed_tests) of the test entry they are about,
+        or None.
+        """
+        if self.empty is not None:
+            if isinstance(self.empty, str):
+                size = len(context.lists[self.empty])
+            else:
+                size = context.state_sizes[self.empty]
+            return [] if size else [(None, self.message.format(t="", count=0))]
+        listed = context.listed_tests(self.test_lists)
+        if self.pattern is not None:
+            search = self.pattern.search
+            return [(position, self.message.format(t=name, count=1)) for position, name in listed if search(name)]
+        compare, limit = self.count
+        first_positions = {}
+        for position, name in listed:
+            first_positions.setdefault(name, position)
+        return [(first_positions[name], self.message.format(t=name, count=count))
+                for name, count in context.counts(self.test_lists).items() if compare(count, limit)]
+
+
+class ValidationRules:
+    """
+    Compiled validation checks and early-rejection rules. Each run also
+    gives the time spent on every rule, as [{"rule": name, "seconds": s}].
+    """
+
+    def __init__(self, checks=(), rejections=()):
+        self.checks = [CheckRule(check["name"], check.get("description", check["name"]), check["rule"])
+                       for check in checks]
+        self.rejections = [RejectionRule(rule["name"], rule["rule"], rule.get("message", rule["name"] + ": {t}"),
+                                         rule.get("group"))
+                           for rule in rejections]
+
+    def run_checks(self, context):
+        """Evaluate the checks. Returns (validation results, timings)."""
+        results = []
+        timings = []
+        for check in self.checks:
+            start = time.perf_counter()
+            results.append(check.evaluate(context))
+            timings.append({"rule": check.name, "seconds": time.perf_counter() - start})
+        return results, timings
+
+    def run_rejections(self, context):
+        """Evaluate the early-rejection rules. Returns (violation messages, timings)."""
+        groups = {}
+        timings = []
+        for rule in self.rejections:
+            start = time.perf_counter()
+            violations = rule.evaluate(context)
+            timings.append({"rule": rule.name, "seconds": time.perf_counter() - start})
+            reported, messages = groups.setdefault(rule.group, (set(), []))
+            for position, message in violations:
+                if position is None or position not in reported:
+                    reported.add(position)
+                    messages.append((position, message))
+
+        # A group's violations are listed in the order of the tests
+        violations = []
+        for _, messages in groups.values():
+            messages.sort(key=lambda violation: -1 if violation[0] is None else violation[0])
+            violations.extend(message for _, message in messages)
+        return violations, timings
+
+
+def load_validation_rules(path=None):
+    """
+    Load validation rules from path, else from the file named by
+    $LOG_ANALYZER_VALIDATION_RULES, else the default rules.
+    """
+    path = path or os.environ.get(VALIDATION_RULES_ENV) or DEFAULT_VALIDATION_RULES_FILE
+    with open(path, "r", encoding="utf-8") as f:
+        rules = json.load(f)
+    return ValidationRules(rules.get("checks", ()), rules.get("rejections", ()))
+
+
+validation_rules = load_validation_rules()
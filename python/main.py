@@ -1 +1,67 @@
-# TBD
\ No newline at end of file
+import os
+import sys
+
+# The parsers and the analyzer live next to the Rust tools and the app
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rust'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'electron'))
+
+from tabulate import tabulate
+from log_analyzer import analyze_logs
+from utils import colorize_status, colorize_text
+
+LOG_DIR = "python/logs"
+
+def print_table(title, rows, headers):
+    """Print one table of the analysis, with colored statuses."""
+    print(f"\n{title}:")
+    if not rows:
+        print("   No tests.")
+        return
+    colored = [row[:-3] + [colorize_status(status) for status in row[-3:]] for row in rows]
+    print(tabulate(colored, headers=headers, tablefmt="grid"))
+
+def main():
+    """
+    Validate a Python task from its pytest logs (_base.log, _before.log,
+    _after.log) and test lists JSON in LOG_DIR, or the directory given as
+    the first argument.
+    """
+    logs_directory = sys.argv[1] if len(sys.argv) > 1 else LOG_DIR
+    result = analyze_logs(logs_directory, language="python")
+    if not result.get("success"):
+        print(colorize_text(f"Error: {result.get('error')}", "red"))
+        sys.exit(1)
+
+    print("Validation Results:")
+    print("=" * 80)
+    validation_table = []
+    for validation in result["validationResults"]:
+        status = validation["status"]
+        example_count = len(validation["examples"])
+        validation_table.append([
+            colorize_text(status, "green" if status == "PASS" else "red"),
+            validation["description"],
+            f"{example_count} examples" if example_count > 0 else "No examples",
+        ])
+    print(tabulate(validation_table, headers=["Status", "Validation Check", "Count"], tablefmt="grid"))
+
+    summary = result["summary"]
+    print("=" * 50)
+    print("FAILING TEST COUNTS:")
+    print(f"Base log:   {summary['baseFailCount']} failing tests")
+    print(f"Before log: {summary['beforeFailCount']} failing tests")
+    print(f"After log:  {summary['afterFailCount']} failing tests")
+    print("=" * 50)
+
+    print_table("Failing tests across all states", result["failingTests"],
+                ["Test Name", "f2p(present)", "p2p(present)", "Base", "Before", "After"])
+    print_table("fail_to_pass", result["failToPassTests"], ["#", "test name", "base", "before", "after"])
+    print_table("pass_to_pass", result["passToPassTests"], ["#", "test name", "base", "before", "after"])
+
+    if summary["allPassCount"] > 0:
+        colorized_all_pass = colorize_text(str(summary["allPassCount"]), "green")
+        colorized_total = colorize_text(str(summary["totalP2P"]), "blue")
+        print(f"\nNote: {colorized_all_pass} out of {colorized_total} pass_to_pass tests passed in all 3 commits and were not displayed.")
+
+if __name__ == "__main__":
+    main()
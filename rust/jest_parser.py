@@ -0,0 +1,179 @@
+import re
+
+from log_io import LineStreamParser, open_log, read_stream
+
+# Bump when a change alters the parsed results, to invalidate cached results
+PARSER_VERSION = 1
+
+# jest and mocha print describe blocks as indented headings and tests as
+# indented result lines below them:
+# PASS src/math.test.js
+#   math
+#     add
+#       ✓ adds numbers (3 ms)
+#       ✕ adds strings (12 ms)
+#       ○ skipped adds nothing
+# Mocha marks failures with their number ("1) name") and pending tests
+# with a dash, and shows the duration of slow tests only ("(120ms)").
+test_line_pattern = re.compile(
+    r"^(\s*)(✓|✔|√|✕|✖|×|○|✎|-|\d+\))\s+(.+?)(?:\s+\((\d+(?:\.\d+)?)\s*(ms|s)\))?$"
+)
+
+TEST_SYMBOLS = {
+    "✓": "PASS",
+    "✔": "PASS",
+    "√": "PASS",
+    "✕": "FAIL",
+    "✖": "FAIL",
+    "×": "FAIL",
+    "○": "SKIPPED",
+    "✎": "SKIPPED",
+    "-": "SKIPPED",
+}
+
+# jest prints "○ skipped name" and "✎ todo name"
+SKIP_PREFIXES = ("skipped ", "todo ")
+
+# A jest test file header starts a new tree
+file_header_pattern = re.compile(r"^(?:PASS|FAIL)\s+\S")
+
+# After the tree come failure details and the run summary, which are not
+# part of any tree
+details_start_pattern = re.compile(
+    r"^\s*(?:●(?! Console$)|Test Suites:|Tests:|Snapshots:|Time:|Ran all test suites"
+    r"|\d+ (?:passing|pending|failing)\b)"
+)
+
+# jest failure details: "  ● math › add › adds strings"
+failure_header_pattern = re.compile(r"^\s*● (?!Console$)(.+?)\s*$")
+
+# Output logged by a test file is printed after its header, before the
+# tree, as a "● Console" block whose lines are indented deeper than it
+console_start_pattern = re.compile(r"^(\s*)● Console$")
+JEST_NAME_SEPARATOR = " › "
+
+NAME_SEPARATOR = " > "
+
+
+def test_status(symbol):
+    """Map a result symbol (or mocha failure number) to a status."""
+    return TEST_SYMBOLS.get(symbol) or "FAIL"
+
+
+class JestStreamParser(LineStreamParser):
+    """
+    Parser for the tree output of jest and mocha. Each test is named after
+    the describe blocks it is nested in ("Suite > Sub > test"), tracked on
+    a stack of headings by indentation, so tests with the same title in
+    different blocks do not collide.
+    If durations is given, the duration in seconds of each test that shows
+    one is recorded into it ({ "test_name": seconds }).
+    If index (see log_io.new_log_index) is given, the byte spans of result
+    lines and of jest's "●" failure sections are recorded into it.
+    """
+
+    name = "jest"
+
+    def __init__(self, durations=None, index=None):
+        super().__init__()
+        self.durations = durations
+        self.index = index
+        # (indentation, heading) of the describe blocks enclosing the line
+        self.stack = []
+        self.in_details = False
+        # Indentation of the "● Console" line while in its block
+        self.console_indent = None
+        self.failure_section = None
+
+    def handle_line(self, line):
+        line = line.decode("utf-8", errors="ignore").rstrip()
+        if not line:
+            return
+
+        if self.console_indent is not None:
+            if len(line) - len(line.lstrip()) > self.console_indent:
+                return
+            self.console_indent = None
+
+        console = None if self.in_details else console_start_pattern.match(line)
+        if file_header_pattern.match(line):
+            self.stack = []
+            self.in_details = False
+        elif console:
+            self.console_indent = len(console.group(1))
+        elif not self.in_details and details_start_pattern.match(line):
+            self.stack = []
+            self.in_details = True
+        elif not self.in_details:
+            self._handle_tree_line(line)
+
+        if self.index is not None:
+            self._index_failure_line(line)
+
+    def _handle_tree_line(self, line):
+        match = test_line_pattern.match(line)
+        indent = len(match.group(1)) if match else len(line) - len(line.lstrip())
+        # Close the blocks this line is not nested in
+        while self.stack and self.stack[-1][0] >= indent:
+            self.stack.pop()
+
+        if match is None:
+            self.stack.append((indent, line.strip()))
+            return
+
+        _, symbol, title, duration, unit = match.groups()
+        if symbol in ("○", "✎") and title.startswith(SKIP_PREFIXES):
+            title = title.split(" ", 1)[1]
+        test_name = NAME_SEPARATOR.join([heading for _, heading in self.stack] + [title])
+        self.results[test_name] = test_status(symbol)
+        if self.durations is not None and duration:
+            self.durations[test_name] = float(duration) / 1000 if unit == "ms" else float(duration)
+        if self.index is not None:
+            self.index["tests"][test_name] = [self.line_start, self.line_end]
+
+    def _index_failure_line(self, line):
+        # Failure sections run until the next header or the run summary
+        header = failure_header_pattern.match(line)
+        if self.failure_section and (header or file_header_pattern.match(line)
+                                     or details_start_pattern.match(line)):
+            self.failure_section[1] = self.line_start
+            self.failure_section = None
+        if header:
+            self.failure_section = [self.line_start, self.line_end + 1]
+            test_name = header.group(1).replace(JEST_NAME_SEPARATOR, NAME_SEPARATOR)
+            self.index["failures"][test_name] = self.failure_section
+        elif self.failure_section:
+            self.failure_section[1] = self.line_end + 1
+
+    def finish(self):
+        if self.failure_section:
+            self.failure_section[1] = min(self.failure_section[1], self.position)
+            self.failure_section = None
+
+    def get_state(self):
+        return {"stack": self.stack, "in_details": self.in_details, "console_indent": self.console_indent}
+
+    def set_state(self, state):
+        self.stack = [tuple(entry) for entry in state["stack"]]
+        self.in_details = state["in_details"]
+        self.console_indent = state.get("console_indent")
+
+
+def parse_jest_file(filepath, durations=None, index=None, results=None, strip_ansi=False):
+    """
+    Parse a jest or mocha log into results, in one pass.
+    Compressed logs (.gz, .bz2, .xz) are decompressed while reading.
+    If durations is given, each test's duration in seconds is recorded
+    into it. If index (see log_io.new_log_index) is given, the byte spans
+    of result lines and failure sections are recorded into it.
+    results may be given to record into (e.g. a SelectiveResults).
+    With strip_ansi, ANSI escape sequences are removed before parsing.
+    Returns { "Suite > Sub > test": result }
+    """
+    parser = JestStreamParser(durations=durations, index=index)
+    parser.strip_ansi = strip_ansi
+    if results is not None:
+        parser.results = results
+    with open_log(filepath) as f:
+        read_stream(parser, f)
+    return parser.close()
@@ -0,0 +1,159 @@
+import codecs
+import json
+import os
+import re
+
+from js_log_parser import join_js_test_name
+from log_io import LineStreamParser, open_log, read_stream
+
+# Bump when a change alters the parsed results, to invalidate cached results
+PARSER_VERSION = 1
+
+# The vitest / jest JSON reporter (--reporter=json, --json) writes one
+# object whose "testResults" array holds an object per test file:
+# {"numTotalTests": 2, ..., "testResults": [{"assertionResults": [
+#     {"ancestorTitles": ["suite"], "title": "test", "status": "passed", "duration": 3}
+#  ], "name": "/repo/src/file.test.ts", ...}]}
+test_results_key_pattern = re.compile(r'"testResults"\s*:\s*\[')
+# A report may give the project root ahead of its results
+root_dir_key = '"rootDir"'
+root_dir_pattern = re.compile(r'"rootDir"\s*:\s*("(?:[^"\\]|\\.)*")')
+separator_pattern = re.compile(r"[\s,]*")
+
+ASSERTION_STATUS = {
+    "passed": "PASS",
+    "failed": "FAIL",
+    "pending": "SKIPPED",
+    "skipped": "SKIPPED",
+    "todo": "SKIPPED",
+    "disabled": "SKIPPED",
+}
+
+
+class JsJsonStreamParser(LineStreamParser):
+    """
+    Incremental parser for vitest / jest JSON reports. The report is one
+    JSON document, so instead of splitting lines, each test file's entry of
+    "testResults" is decoded (json.JSONDecoder.raw_decode) as soon as it has
+    arrived and then dropped from the buffer; only one file's entry is held
+    at a time.
+    Tests are named "file > suite > test" like vitest result lines, with
+    file relative to root if given, else to the report's "rootDir", else
+    as the report gives it (usually an absolute path, which still contains
+    the project-relative name).
+    If durations is given, each test's duration in seconds is recorded into
+    it ({ "test_name": seconds }). Byte spans are not tracked, so an index
+    stays empty.
+    """
+
+    name = "js-json"
+    # Where the buffer stands in the JSON document is not saved, so a
+    # report is always read from the start
+    resumable = False
+
+    def __init__(self, durations=None, index=None, root=None):
+        super().__init__()
+        self.durations = durations
+        self.index = index
+        self.root = root
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._buffer = ""
+        self._in_results = False
+        self._done = False
+        # An incomplete entry is only decoded again once the buffer doubled
+        self._retry_size = 0
+
+    def feed(self, data):
+        self.position += len(data)
+        if self._done:
+            return
+        self._buffer += self._text_decoder.decode(data)
+        if len(self._buffer) >= self._retry_size:
+            self._scan()
+
+    def _scan(self):
+        buffer = self._buffer
+        if not self._in_results:
+            match = test_results_key_pattern.search(buffer)
+            self._find_root(buffer[:match.start()] if match else buffer)
+            if match is None:
+                # Keep enough to find a key split across feeds, and a
+                # rootDir value not read whole yet
+                start = buffer.rfind(root_dir_key) if self.root is None else -1
+                self._buffer = buffer[start:] if start >= 0 else buffer[-64:]
+                return
+            self._in_results = True
+            buffer = buffer[match.end():]
+
+        position = 0
+        while True:
+            position = separator_pattern.match(buffer, position).end()
+            if position == len(buffer):
+                break
+            if buffer[position] == "]":
+                self._done = True
+                break
+            try:
+                entry, position_after = self._decoder.raw_decode(buffer, position)
+            except ValueError:
+                # Not complete yet (or malformed, if this is the end)
+                self._retry_size = 2 * (len(buffer) - position)
+                break
+            self._handle_file(entry)
+            position = position_after
+            self._retry_size = 0
+        self._buffer = "" if self._done else buffer[position:]
+
+    def _find_root(self, text):
+        if self.root is not None:
+            return
+        match = root_dir_pattern.search(text)
+        if match:
+            try:
+                self.root = json.loads(match.group(1)) or None
+            except ValueError:
+                pass
+
+    def _handle_file(self, entry):
+        if not isinstance(entry, dict):
+            return
+        file = entry.get("name") or entry.get("testFilePath") or ""
+        if self.root and os.path.isabs(file):
+            file = os.path.relpath(file, self.root).replace(os.sep, "/")
+        for assertion in entry.get("assertionResults") or []:
+            titles = list(assertion.get("ancestorTitles") or []) + [assertion.get("title") or ""]
+            test_name = join_js_test_name(file, titles)
+            self.results[test_name] = ASSERTION_STATUS.get(assertion.get("status"), "SKIPPED")
+            duration = assertion.get("duration")
+            if self.durations is not None and isinstance(duration, (int, float)):
+                self.durations[test_name] = duration / 1000
+
+    def close(self):
+        if not self._done:
+            self._buffer += self._text_decoder.decode(b"", final=True)
+            self._scan()
+        self.offset = self.position
+        return self.results
+
+
+def parse_js_json_file(filepath, durations=None, index=None, results=None, strip_ansi=False, root=None):
+    """
+    Parse a vitest / jest JSON report into results, without loading the
+    whole document.
+    Compressed reports (.gz, .bz2, .xz) are decompressed while reading.
+    If durations is given, each test's duration in seconds is recorded
+    into it. index is accepted like the other parsers take it but stays
+    empty. results may be given to record into (e.g. a SelectiveResults).
+    strip_ansi has no effect: JSON escapes the ESC character, so colors in
+    failure messages never reach test names.
+    Test files are named relative to root if given, else to the report's
+    "rootDir", else as the report gives them.
+    Returns { "file > suite > test": result }
+    """
+    parser = JsJsonStreamParser(durations=durations, index=index, root=root)
+    if results is not None:
+        parser.results = results
+    with open_log(filepath) as f:
+        read_stream(parser, f)
+    return parser.close()
@@ -1,71 +1,200 @@
+import hashlib
+import json
+import os
 import re
 
-def parse_js_log_file(filepath):
+from log_io import LineStreamParser, open_log, read_stream
+
+# Bump when a change alters the parsed results, to invalidate cached results
+PARSER_VERSION = 2
+
+# Result lines start with a status symbol followed by whitespace, then
+# either "|package| description" or just the description
+STATUS_SYMBOLS = {
+    "✓": "PASS",
+    "✔": "PASS",
+    "×": "FAIL",
+    "✘": "FAIL",
+    "↓": "SKIPPED",
+}
+
+# Lines that look like error logs, timestamps, or noise are skipped even if
+# they start with a status symbol. The rules are read from a JSON file
+# ({"substrings": [...], "patterns": [...]}), by default the one shipped
+# next to this module.
+NOISE_RULES_ENV = "LOG_ANALYZER_JS_NOISE_RULES"
+DEFAULT_NOISE_RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "js_noise_rules.json")
+
+
+class NoiseRules:
+    """
+    Noise rules compiled once into a single regular expression. digest
+    identifies the rules, for cache keys.
+    """
+
+    def __init__(self, substrings=(), patterns=()):
+        alternatives = [re.escape(substring) for substring in substrings] + list(patterns)
+        self.pattern = re.compile("|".join(alternatives)) if alternatives else None
+        self.digest = hashlib.blake2b(
+            json.dumps([list(substrings), list(patterns)]).encode("utf-8"), digest_size=4).hexdigest()
+
+    def matches(self, line):
+        """Check whether line is noise."""
+        return self.pattern is not None and self.pattern.search(line) is not None
+
+
+def load_noise_rules(path=None):
+    """
+    Load noise rules from path, else from the file named by
+    $LOG_ANALYZER_JS_NOISE_RULES, else the default rules.
+    """
+    path = path or os.environ.get(NOISE_RULES_ENV) or DEFAULT_NOISE_RULES_FILE
+    with open(path, "r", encoding="utf-8") as f:
+        rules = json.load(f)
+    return NoiseRules(rules.get("substrings", ()), rules.get("patterns", ()))
+
+
+noise_rules = load_noise_rules()
+
+
+# Vitest ends the result line of a slow test with its duration: "... 634ms"
+duration_pattern = re.compile(r"\s(\d+(?:\.\d+)?)(ms|s)$")
+
+# Vitest failure output: " FAIL  |pkg| file > test" up to a ⎯⎯⎯ separator
+vitest_failure_header_pattern = re.compile(r"^\s*FAIL\s+(.+)$")
+FAILURE_SEPARATOR = "⎯"
+
+
+def normalize_js_test_name(test_info):
+    """
+    Build the result name for a test description, as parse_js_line() does:
+    "|package| description" becomes "package description", with runs of
+    whitespace collapsed.
+    """
+    test_info = test_info.strip()
+    if test_info.startswith("|"):
+        # The package ends at the last "|" that is followed by whitespace
+        end = test_info.rfind("|", 1)
+        while end > 1 and not test_info[end + 1:end + 2].isspace():
+            end = test_info.rfind("|", 1, end)
+        if end > 1:
+            return f"{test_info[1:end]} {' '.join(test_info[end + 1:].split())}"
+    return " ".join(test_info.split())
+
+
+def join_js_test_name(file, titles, package=None):
+    """
+    Build a result name from a test file, the titles of the describe
+    blocks and test ("suite", "test") and an optional package, in the
+    shape parse_js_line() gives vitest lines: "package file > suite > test".
+    """
+    name = " > ".join(([file] if file else []) + [title for title in titles if title])
+    return normalize_js_test_name(f"|{package}| {name}" if package else name)
+
+
+def parse_js_line(line, results, noise=None, durations=None):
+    """
+    Record the result of a single (right-stripped) log line, if it has one.
+    Lines are dispatched on their first character, so only lines starting
+    with a status symbol are checked against the noise rules.
+    If durations is given, a duration the line ends with is recorded into
+    it in seconds; the name keeps it, as before.
+    Returns the test name recorded, or None.
+    """
+    status = STATUS_SYMBOLS.get(line[:1])
+    if status is None or not line[1:2].isspace():
+        return None
+
+    # Skip lines that look like error logs, timestamps, or noise
+    if (noise or noise_rules).matches(line):
+        return None
+
+    test_name = normalize_js_test_name(line[1:])
+    results[test_name] = status
+    if durations is not None:
+        duration = duration_pattern.search(line)
+        if duration:
+            seconds = float(duration.group(1))
+            durations[test_name] = seconds / 1000 if duration.group(2) == "ms" else seconds
+    return test_name
+
+
+def parse_js_log_file(filepath, index=None, results=None, noise=None, strip_ansi=False, durations=None):
     """
     Parse JavaScript test log files into results.
     Handles various JavaScript testing frameworks output formats.
+    Compressed logs (.gz, .bz2, .xz) are decompressed while reading.
+    If index (see log_io.new_log_index) is given, the byte spans of status
+    lines and failure sections are recorded into it.
+    results may be given to record into (e.g. a SelectiveResults), and
+    noise (a NoiseRules) to use instead of the loaded rules.
+    With strip_ansi, ANSI escape sequences are removed from the raw bytes
+    before lines are split, so colored result lines are read too.
+    If durations is given, the duration of each test that shows one is
+    recorded into it in seconds.
     Returns { "test_name": result }
     """
-    results = {}
-
-    # Patterns for Vitest format
-    vitest_fail_pattern = re.compile(r"^×\s+\|(.+)\|\s+(.+)$")  # Vitest fail pattern
-    vitest_pass_pattern = re.compile(r"^✓\s+\|(.+)\|\s+(.+)$")  # Vitest pass pattern
-    vitest_fail_no_package_pattern = re.compile(r"^×\s+(.+)$")  # Vitest fail without package
-    vitest_pass_no_package_pattern = re.compile(r"^✓\s+(.+)$")  # Vitest pass without package
-    
+    if results is None:
+        results = {}
+
+    if index is not None or strip_ansi:
+        # Byte offsets and block-level stripping need the binary stream parser
+        parser = JsLogStreamParser(index=index, noise=noise, durations=durations)
+        parser.strip_ansi = strip_ansi
+        parser.results = results
+        with open_log(filepath) as f:
+            read_stream(parser, f)
+        return parser.close()
+
     try:
-        with open(filepath, "r", encoding="utf-8", errors="ignore") as f:
+        with open_log(filepath, "r", encoding="utf-8", errors="ignore") as f:
             for line in f:
-                line = line.rstrip()
-                
-                # Skip lines that look like error logs, timestamps, or noise
-                if re.search(r'\d{2}:\d{2}:\d{2}:\d{3}\s*\[ERROR\]|\d+\[\d+;\d+m|\[33m|\[39m|The CJS build of Vite|Fake ensureQueryParamsInUrl called|addEventListener called|removeEventListener called|__mock__:', line):
-                    continue
-                    
-                # Skip marker lines
-                if ">>>>> Start Test Output" in line or ">>>>> End Test Output" in line:
-                    continue
-                    
-                # Handle Vitest fail format with package information
-                vitest_fail_match = vitest_fail_pattern.match(line)
-                if vitest_fail_match:
-                    package_name, test_info = vitest_fail_match.groups()
-                    # Clean up the test description and remove extra whitespace
-                    test_info = re.sub(r'\s+', ' ', test_info.strip())
-                    full_test_name = f"{package_name} {test_info}"
-                    results[full_test_name] = "FAIL"
-                    continue
-                    
-                # Handle Vitest pass format with package information
-                vitest_pass_match = vitest_pass_pattern.match(line)
-                if vitest_pass_match:
-                    package_name, test_info = vitest_pass_match.groups()
-                    # Clean up the test description and remove extra whitespace
-                    test_info = re.sub(r'\s+', ' ', test_info.strip())
-                    full_test_name = f"{package_name} {test_info}"
-                    results[full_test_name] = "PASS"
-                    continue
-                    
-                # Handle Vitest fail format without package information
-                vitest_fail_no_package_match = vitest_fail_no_package_pattern.match(line)
-                if vitest_fail_no_package_match:
-                    test_info = vitest_fail_no_package_match.group(1)
-                    # Clean up the test description and remove extra whitespace
-                    test_info = re.sub(r'\s+', ' ', test_info.strip())
-                    results[test_info] = "FAIL"
-                    continue
-                    
-                # Handle Vitest pass format without package information
-                vitest_pass_no_package_match = vitest_pass_no_package_pattern.match(line)
-                if vitest_pass_no_package_match:
-                    test_info = vitest_pass_no_package_match.group(1)
-                    # Clean up the test description and remove extra whitespace
-                    test_info = re.sub(r'\s+', ' ', test_info.strip())
-                    results[test_info] = "PASS"
-                    continue
+                parse_js_line(line.rstrip(), results, noise, durations)
 
     except Exception as e:
         print(f"Error parsing JS log file {filepath}: {e}")
-        
-    return results
\ No newline at end of file
+
+    return results
+
+
+class JsLogStreamParser(LineStreamParser):
+    """
+    Incremental counterpart of parse_js_log_file: feed() raw bytes as they
+    arrive and read results at any time.
+    If index (see log_io.new_log_index) is given, the byte spans of status
+    lines and failure sections are recorded into it, and if durations is
+    given, test durations as parse_js_line() finds them.
+    """
+
+    name = "javascript"
+
+    def __init__(self, index=None, noise=None, durations=None):
+        super().__init__()
+        self.index = index
+        self.noise = noise
+        self.durations = durations
+        self.failure_section = None
+
+    def handle_line(self, line):
+        line = line.decode("utf-8", errors="ignore").rstrip()
+        test_name = parse_js_line(line, self.results, self.noise, self.durations)
+        if self.index is None:
+            return
+        if test_name is not None:
+            self.index["tests"][test_name] = [self.line_start, self.line_end]
+
+        # Failure sections run until a separator line or the next header
+        header = vitest_failure_header_pattern.match(line)
+        if self.failure_section and (header or line.lstrip().startswith(FAILURE_SEPARATOR)):
+            self.failure_section[1] = self.line_start
+            self.failure_section = None
+        if header:
+            self.failure_section = [self.line_start, self.line_end + 1]
+            self.index["failures"][normalize_js_test_name(header.group(1))] = self.failure_section
+        elif self.failure_section:
+            self.failure_section[1] = self.line_end + 1
+
+    def finish(self):
+        if self.failure_section:
+            self.failure_section[1] = min(self.failure_section[1], self.position)
+            self.failure_section = None
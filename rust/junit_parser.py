@@ -0,0 +1,132 @@
+import xml.etree.ElementTree as ET
+
+from js_log_parser import join_js_test_name
+from log_io import LineStreamParser, open_log, read_stream
+
+# Bump when a change alters the parsed results, to invalidate cached results
+PARSER_VERSION = 1
+
+# JUnit XML reports (vitest --reporter=junit, jest-junit, ...):
+# <testsuites>
+#   <testsuite name="src/file.test.ts" tests="2">
+#     <testcase classname="src/file.test.ts" name="suite &gt; test" time="0.003">
+#       <failure message="expected 1 to be 2">...</failure>
+#     </testcase>
+#   </testsuite>
+# </testsuites>
+# Tags are compared without any namespace.
+FAILURE_TAGS = {"failure", "error"}
+SKIPPED_TAG = "skipped"
+
+
+def local_tag(tag):
+    """Drop the namespace of an element tag."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def testcase_name(classname, name):
+    """
+    Build the result name of a test case. vitest puts the file in classname
+    and "suite > test" in name; jest-junit repeats the suite in both, in
+    which case name alone is used.
+    """
+    if not classname or name.startswith(classname):
+        return join_js_test_name(None, [name])
+    return join_js_test_name(classname, [name])
+
+
+class JunitStreamParser(LineStreamParser):
+    """
+    Incremental parser for JUnit XML reports, built on the push API behind
+    xml.etree.ElementTree.iterparse (XMLPullParser). Each <testcase> is
+    recorded when it ends and then removed from the tree, so memory stays
+    bounded however large the report is.
+    Tests are named "file > suite > test" like vitest result lines.
+    If durations is given, each test's time in seconds is recorded into it
+    ({ "test_name": seconds }). Byte spans are not tracked, so an index
+    stays empty.
+    """
+
+    name = "junit"
+    # The XMLPullParser state cannot be saved, so a report is always read
+    # from the start
+    resumable = False
+
+    def __init__(self, durations=None, index=None):
+        super().__init__()
+        self.durations = durations
+        self.index = index
+        self._xml = ET.XMLPullParser(events=("start", "end"))
+        # Open elements, to detach each finished test case from its parent
+        self._open = []
+        self._suite_names = []
+
+    def feed(self, data):
+        self.position += len(data)
+        self._xml.feed(data)
+        self._read_events()
+
+    def _read_events(self):
+        for event, element in self._xml.read_events():
+            tag = local_tag(element.tag)
+            if event == "start":
+                self._open.append(element)
+                if tag == "testsuite":
+                    self._suite_names.append(element.get("name", ""))
+                continue
+
+            self._open.pop()
+            if tag == "testcase":
+                self._handle_testcase(element)
+                if self._open:
+                    self._open[-1].remove(element)
+            elif tag == "testsuite":
+                self._suite_names.pop()
+                element.clear()
+
+    def _handle_testcase(self, element):
+        classname = element.get("classname") or (self._suite_names[-1] if self._suite_names else "")
+        test_name = testcase_name(classname, element.get("name", ""))
+        status = "PASS"
+        for child in element:
+            child_tag = local_tag(child.tag)
+            if child_tag in FAILURE_TAGS:
+                status = "FAIL"
+                break
+            if child_tag == SKIPPED_TAG:
+                status = "SKIPPED"
+        self.results[test_name] = status
+        time = element.get("time")
+        if self.durations is not None and time:
+            try:
+                self.durations[test_name] = float(time)
+            except ValueError:
+                pass
+
+    def close(self):
+        try:
+            self._xml.close()
+        except ET.ParseError:
+            # A truncated report keeps the test cases read so far
+            pass
+        self._read_events()
+        self.offset = self.position
+        return self.results
+
+
+def parse_junit_file(filepath, durations=None, index=None, results=None, strip_ansi=False):
+    """
+    Parse a JUnit XML report into results, without building the whole tree.
+    Compressed reports (.gz, .bz2, .xz) are decompressed while reading.
+    If durations is given, each test's time in seconds is recorded into it.
+    index is accepted like the other parsers take it but stays empty.
+    results may be given to record into (e.g. a SelectiveResults).
+    strip_ansi has no effect: XML cannot contain the ESC character.
+    Returns { "file > suite > test": result }
+    """
+    parser = JunitStreamParser(durations=durations, index=index)
+    if results is not None:
+        parser.results = results
+    with open_log(filepath) as f:
+        read_stream(parser, f)
+    return parser.close()
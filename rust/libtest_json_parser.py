@@ -0,0 +1,105 @@
+import json
+import re
+
+from log_io import LineStreamParser, open_log, read_stream
+
+# Bump when a change alters the parsed results, to invalidate cached results
+PARSER_VERSION = 1
+
+# libtest writes its events with a fixed key order, so the test name, event
+# and exec_time can be taken from the head of the line without decoding a
+# possibly huge captured "stdout" field:
+# { "type": "test", "name": "tests::foo", "event": "ok", "exec_time": 0.001 }
+test_event_pattern = re.compile(
+    rb'\{\s*"type":\s*"test",\s*"name":\s*"((?:[^"\\]|\\.)*)",\s*"event":\s*"(\w+)"'
+    rb'(?:,\s*"exec_time":\s*([0-9.eE+-]+))?'
+)
+
+# Final test events and the status they map to. "ignored" matches what the
+# text parser reports for "test x ... ignored".
+EVENT_STATUS = {
+    "ok": "PASS",
+    "failed": "FAIL",
+    "ignored": "ignored",
+}
+
+
+def parse_test_event(line):
+    """
+    Extract (name, event, exec_time) from one JSON event line (bytes).
+    Returns None for lines that are not test events.
+    """
+    match = test_event_pattern.match(line.lstrip())
+    if match:
+        raw_name, event, exec_time = match.groups()
+        name = json.loads(b'"' + raw_name + b'"')
+        return name, event.decode("ascii"), float(exec_time) if exec_time else None
+
+    # Fall back to a full decode for events written in another key order
+    if b'"test"' not in line or not line.lstrip().startswith(b"{"):
+        return None
+    try:
+        event = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(event, dict) or event.get("type") != "test" or "name" not in event:
+        return None
+    return event["name"], event.get("event"), event.get("exec_time")
+
+
+class LibtestJsonStreamParser(LineStreamParser):
+    """
+    Parser for libtest JSON output (cargo test -- -Z unstable-options
+    --format json --report-time): one event per line, with non-JSON lines
+    such as cargo's progress output skipped.
+    If durations is given, exec_time of each finished test is recorded into
+    it ({ "test_name": seconds }).
+    If index (see log_io.new_log_index) is given, the byte span of each
+    test's result event is recorded into it; a failed event carries the
+    test's captured output, so it is also the failure section.
+    """
+
+    name = "libtest-json"
+
+    def __init__(self, durations=None, index=None):
+        super().__init__()
+        self.durations = durations
+        self.index = index
+
+    def handle_line(self, line):
+        event = parse_test_event(line)
+        if event is None:
+            return
+        name, event_name, exec_time = event
+        status = EVENT_STATUS.get(event_name)
+        if status is None:
+            # "started" and "timeout" are progress notices, not results
+            return
+        self.results[name] = status
+        if self.durations is not None and exec_time is not None:
+            self.durations[name] = exec_time
+        if self.index is not None:
+            span = [self.line_start, self.line_end]
+            self.index["tests"][name] = span
+            if status == "FAIL":
+                self.index["failures"][name] = span
+
+
+def parse_libtest_json_file(filepath, durations=None, index=None, results=None, strip_ansi=False):
+    """
+    Parse a libtest JSON log into results.
+    Compressed logs (.gz, .bz2, .xz) are decompressed while reading.
+    If durations is given, each test's exec_time in seconds is recorded
+    into it. If index (see log_io.new_log_index) is given, the byte spans
+    of result events are recorded into it.
+    results may be given to record into (e.g. a SelectiveResults).
+    With strip_ansi, ANSI escape sequences are removed before parsing.
+    Returns { "test_name": result }
+    """
+    parser = LibtestJsonStreamParser(durations=durations, index=index)
+    parser.strip_ansi = strip_ansi
+    if results is not None:
+        parser.results = results
+    with open_log(filepath) as f:
+        read_stream(parser, f)
+    return parser.close()
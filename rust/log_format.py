@@ -0,0 +1,87 @@
+import re
+
+from log_io import open_log
+
+# Only this much of the head of each log is read to detect its format
+SNIFF_SIZE = 64 * 1024
+
+# Signature lines of each format: (format, pattern, weight). Patterns are
+# matched at the start of every line of the head, as bytes, so a non-ASCII
+# character is an alternative rather than a member of a character class.
+FORMAT_SIGNATURES = [
+    ("libtest-json", re.compile(rb'\s*\{\s*"type":\s*"(?:test|suite)"'), 3),
+    ("rust", re.compile(rb"test \S+ \.\.\. ?(?:ok|FAILED|ignored)?"), 2),
+    ("rust", re.compile(rb"running \d+ tests?$"), 1),
+    ("rust", re.compile(rb"test result: "), 1),
+    ("nextest", re.compile(rb"\s*(?:TRY \d+ )?(?:PASS|FAIL|SIG[A-Z]+|TIMEOUT|LEAK) \[\s*[0-9.]+s\] "), 3),
+    ("nextest", re.compile(rb"\s*Starting \d+ tests? across \d+ binar"), 3),
+    ("vitest", re.compile("\\s*(?:✓|×) \\|[^|]+\\| ".encode("utf-8")), 3),
+    ("vitest", re.compile(rb"\s*RUN\s+v\d+\.\d+"), 2),
+    ("vitest", re.compile(rb"\s*Test Files\s+\d+"), 2),
+    ("jest", re.compile(rb"\s*(?:PASS|FAIL) \S+\.(?:test|spec)\.[cm]?[jt]sx?\b"), 3),
+    ("jest", re.compile("\\s*(?:✓|✕) .+ \\(\\d+ ms\\)$".encode("utf-8")), 2),
+    ("jest", re.compile(rb"Tests:\s+\d+"), 2),
+    ("mocha", re.compile(rb"\s*\d+ passing \(\d+m?s\)$"), 3),
+    ("mocha", re.compile(rb"\s*\d+ failing$"), 2),
+    ("js-json", re.compile(rb'\s*\{?\s*"num(?:Total|Failed|Passed)Test(?:Suite)?s":'), 3),
+    ("junit", re.compile(rb"\s*<testsuites?[\s>]"), 3),
+    ("junit", re.compile(rb"\s*<testcase\s"), 1),
+    ("tap", re.compile(rb"TAP version \d+$"), 3),
+    ("tap", re.compile(rb"\s*(?:not )?ok \d+ - "), 1),
+    ("pytest", re.compile(rb"=+ test session starts =+$"), 3),
+    ("pytest", re.compile(rb"\S+\.py::\S.* (?:PASSED|FAILED|SKIPPED|ERROR|XFAIL|XPASS)"), 3),
+    ("pytest", re.compile(rb"(?:PASSED|FAILED|ERROR) \S+\.py::"), 3),
+]
+
+# Language (parser) that reads each format
+FORMAT_LANGUAGES = {
+    "rust": "rust",
+    "libtest-json": "libtest-json",
+    "nextest": "nextest",
+    "vitest": "javascript",
+    "jest": "jest",
+    "mocha": "jest",
+    "js-json": "js-json",
+    "junit": "junit",
+    "tap": "tap",
+    "pytest": "python",
+}
+
+
+def sniff_log(filepath, size=SNIFF_SIZE):
+    """
+    Read the head of a log (decompressed), without its last partial line.
+    """
+    with open_log(filepath) as f:
+        head = f.read(size)
+    if len(head) == size:
+        head = head[:head.rfind(b"\n") + 1]
+    return head
+
+
+def score_log_format(head, scores=None):
+    """
+    Add up the signature weights of each format found in head (bytes).
+    Returns { "format": score }
+    """
+    if scores is None:
+        scores = {}
+    for line in head.splitlines():
+        line = line.rstrip(b"\r")
+        for log_format, pattern, weight in FORMAT_SIGNATURES:
+            if pattern.match(line):
+                scores[log_format] = scores.get(log_format, 0) + weight
+    return scores
+
+
+def detect_log_format(filepaths, size=SNIFF_SIZE):
+    """
+    Detect the format shared by one or more logs from their heads.
+    Returns (format or None if no signature was found, { "format": score })
+    """
+    scores = {}
+    for filepath in filepaths:
+        score_log_format(sniff_log(filepath, size), scores)
+    if not scores:
+        return None, scores
+    return max(scores, key=scores.get), scores
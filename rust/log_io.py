@@ -0,0 +1,291 @@
+import bz2
+import gzip
+import lzma
+import os
+import queue
+import re
+import threading
+
+CHUNK_SIZE = 1024 * 1024
+
+# Longest excerpt returned by read_test_excerpt()
+EXCERPT_LIMIT = 256 * 1024
+
+# Only this much of any one line is passed to a stream parser
+MAX_LINE_LENGTH = 64 * 1024
+
+# ANSI CSI escape sequences (colors, cursor movement). None of them
+# contains a newline, so stripping them keeps every line in place.
+ansi_escape_pattern = re.compile(rb"\x1b\[[0-?]*[ -/]*[@-~]")
+
+# Compressed logs are decompressed on the fly while parsing
+COMPRESSED_OPENERS = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+}
+
+
+def is_compressed(filepath):
+    """Check whether filepath has a supported compression suffix."""
+    return os.path.splitext(filepath)[1].lower() in COMPRESSED_OPENERS
+
+
+def strip_compression_suffix(filename):
+    """Return filename without a supported compression suffix."""
+    root, ext = os.path.splitext(filename)
+    return root if ext.lower() in COMPRESSED_OPENERS else filename
+
+
+def strip_ansi(data):
+    """Remove ANSI CSI escape sequences from a block of log bytes."""
+    if b"\x1b" not in data:
+        return data
+    return ansi_escape_pattern.sub(b"", data)
+
+
+def open_log(filepath, mode="rb", encoding=None, errors=None):
+    """
+    Open a log file, transparently decompressing .gz, .bz2 and .xz files.
+    mode is "rb" or "r" (text, with the given encoding and errors).
+    """
+    if mode == "r":
+        mode = "rt"
+    opener = COMPRESSED_OPENERS.get(os.path.splitext(filepath)[1].lower())
+    if opener is None:
+        return open(filepath, mode, encoding=encoding, errors=errors)
+    return opener(filepath, mode, encoding=encoding, errors=errors)
+
+
+class LineStreamParser:
+    """
+    Base class for push-style log parsers.
+
+    Raw bytes are passed to feed() as they arrive. Complete lines go to
+    handle_line() and the trailing partial line is held until the next feed.
+    Lines are cut at MAX_LINE_LENGTH bytes.
+    With strip_ansi set, ANSI escape sequences are removed from each block
+    in one pass before it is split into lines; offsets and line spans
+    still refer to the raw bytes.
+    offset counts the bytes consumed up to the last complete line, so a parser
+    restored with from_checkpoint() can resume reading a file from there.
+    Parsers whose state cannot be saved set resumable to False; callers
+    check it before calling checkpoint().
+    """
+
+    name = None
+    resumable = True
+
+    def __init__(self):
+        self.results = {}
+        self.strip_ansi = False
+        self.offset = 0
+        self.position = 0
+        self._partial = b""
+        self._partial_size = 0
+        # Byte span of the line being handled, for index building
+        self.line_start = 0
+        self.line_end = 0
+
+    def feed(self, data):
+        """Consume a block of raw log bytes."""
+        self.position += len(data)
+        lines = data.split(b"\n")
+        tail = lines.pop()
+        if lines:
+            # Stripped lines are handled, raw lengths give the spans
+            clean = lines
+            if self.strip_ansi and b"\x1b" in data:
+                clean = strip_ansi(data).split(b"\n")
+            # The first line continues the one held from earlier feeds, of
+            # which only the head may have been kept
+            line_start = self.offset
+            extra = self._partial_size
+            if self._partial:
+                lines[0] = self._partial + lines[0]
+                extra -= len(self._partial)
+                if self.strip_ansi:
+                    # An escape sequence may straddle the feeds
+                    if clean is lines:
+                        clean = lines.copy()
+                    clean[0] = strip_ansi(lines[0])
+            for line, clean_line in zip(lines, clean):
+                self.line_start = line_start
+                self.line_end = line_start + len(line) + extra
+                # Only the head of an overlong line is kept
+                self.handle_line(clean_line[:MAX_LINE_LENGTH])
+                line_start = self.line_end + 1
+                extra = 0
+            self._partial = b""
+            self._partial_size = 0
+        if tail and len(self._partial) < MAX_LINE_LENGTH:
+            self._partial = (self._partial + tail)[:MAX_LINE_LENGTH]
+        self._partial_size += len(tail)
+        self.offset = self.position - self._partial_size
+
+    def close(self):
+        """Flush the trailing partial line, finalize pending state and return the results."""
+        if self._partial_size:
+            self.line_start = self.offset
+            self.line_end = self.position
+            self.handle_line(strip_ansi(self._partial) if self.strip_ansi else self._partial)
+            self._partial = b""
+            self._partial_size = 0
+            self.offset = self.position
+        self.finish()
+        return self.results
+
+    def snapshot(self):
+        """Return the results so far, as if the log ended now."""
+        return dict(self.results)
+
+    def checkpoint(self):
+        """Return a JSON-serializable state to resume parsing from offset."""
+        if not self.resumable:
+            raise ValueError(f"The {self.name} parser cannot be resumed from a checkpoint")
+        return {
+            "parser": self.name,
+            "offset": self.offset,
+            "strip_ansi": self.strip_ansi,
+            "results": dict(self.results),
+            "state": self.get_state(),
+        }
+
+    @classmethod
+    def from_checkpoint(cls, checkpoint):
+        """Create a parser that continues from a checkpoint() result."""
+        parser = cls()
+        parser.restore(checkpoint)
+        return parser
+
+    def restore(self, checkpoint):
+        """Continue from a checkpoint() result of a parser of the same kind."""
+        if checkpoint.get("parser") != self.name:
+            raise ValueError(f"Checkpoint was written by the {checkpoint.get('parser')} parser, not {self.name}")
+        self.offset = self.position = checkpoint["offset"]
+        self.strip_ansi = checkpoint.get("strip_ansi", False)
+        self.results.update(checkpoint["results"])
+        self.set_state(checkpoint["state"])
+
+    def handle_line(self, line):
+        """Process one complete line (bytes, without the newline)."""
+        raise NotImplementedError
+
+    def finish(self):
+        """Finalize any pending state at end of input."""
+
+    def get_state(self):
+        """Return parser-specific state for checkpoint()."""
+        return {}
+
+    def set_state(self, state):
+        """Restore parser-specific state saved by get_state()."""
+
+
+def read_stream(parser, stream, chunk_size=CHUNK_SIZE):
+    """
+    Feed everything left in a binary stream into parser.
+    Returns the number of bytes read.
+    """
+    total = 0
+    read = getattr(stream, "read1", stream.read)
+    while True:
+        chunk = read(chunk_size)
+        if not chunk:
+            return total
+        parser.feed(chunk)
+        total += len(chunk)
+
+
+def update_from_file(parser, filepath, chunk_size=CHUNK_SIZE):
+    """
+    Feed the bytes appended to filepath since the parser last read it.
+    For compressed files the position is in decompressed bytes, and an
+    archive that is still being written is read as far as it goes.
+    Returns the number of new bytes read.
+    """
+    start = parser.position
+    with open_log(filepath) as f:
+        try:
+            f.seek(start)
+            read_stream(parser, f, chunk_size)
+        except EOFError:
+            pass
+    return parser.position - start
+
+
+def file_was_truncated(parser, filepath):
+    """Check whether filepath shrank below what parser has already read."""
+    if is_compressed(filepath):
+        return False
+    return os.path.getsize(filepath) < parser.position
+
+
+def new_log_index():
+    """
+    Return an empty per-log byte-offset index: the span of each test's
+    status line and of its failure output section.
+    """
+    return {"tests": {}, "failures": {}}
+
+
+def read_span(filepath, start, end, limit=None):
+    """
+    Read bytes [start, end) of a log (decompressed offsets for compressed
+    logs) by seeking straight to them. At most limit bytes are read.
+    Returns the decoded text.
+    """
+    if limit is not None:
+        end = min(end, start + limit)
+    with open_log(filepath) as f:
+        f.seek(start)
+        return f.read(max(end - start, 0)).decode("utf-8", errors="replace")
+
+
+def find_index_entry(entries, test_name):
+    """
+    Return the index entry for test_name: an exact match, else the longest
+    entry name test_name starts with (JS result names may carry a trailing
+    duration that failure headers do not).
+    """
+    if test_name in entries:
+        return entries[test_name]
+    best = None
+    for name, span in entries.items():
+        if test_name.startswith(name) and (best is None or len(name) > len(best[0])):
+            best = (name, span)
+    return best[1] if best else None
+
+
+def read_test_excerpt(filepath, index, test_name, limit=EXCERPT_LIMIT):
+    """
+    Read a test's status line and failure output straight from the log
+    using its index. Each part is cut at limit bytes.
+    Returns { "statusLine": text or None, "failureOutput": text or None }
+    """
+    status_span = index["tests"].get(test_name)
+    failure_span = find_index_entry(index["failures"], test_name)
+    return {
+        "statusLine": read_span(filepath, *status_span, limit=limit) if status_span else None,
+        "failureOutput": read_span(filepath, *failure_span, limit=limit) if failure_span else None,
+    }
+
+
+def start_stream_reader(stream, chunk_size=CHUNK_SIZE):
+    """
+    Read a binary stream (e.g. stdin) on a background thread.
+    Returns a queue that receives each chunk and then None at end of stream.
+    """
+    chunks = queue.Queue()
+
+    def pump():
+        read = getattr(stream, "read1", stream.read)
+        while True:
+            chunk = read(chunk_size)
+            if not chunk:
+                break
+            chunks.put(chunk)
+        chunks.put(None)
+
+    threading.Thread(target=pump, daemon=True).start()
+    return chunks
@@ -1,88 +1,636 @@
+import mmap
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 
-def parse_log_file(filepath):
+from log_io import MAX_LINE_LENGTH, LineStreamParser, is_compressed, new_log_index, open_log, read_stream
+from result_filter import SelectiveResults
+
+# Bump when a change alters the parsed results, to invalidate cached results
+PARSER_VERSION = 2
+
+# Status lines are matched directly on the raw bytes so that only the test
+# name and status token are ever decoded.
+test_line_pattern = re.compile(rb"test (\S+) \.\.\.(?:\s*(\S+))?")
+TEST_LINE_START = b"\ntest "
+
+# Test durations: libtest --report-time appends "<0.123s>" to status
+# lines, and a long-running test is announced with a lower bound
+#   test x ... ok <0.123s>
+#   test x has been running for over 60 seconds
+duration_line_pattern = re.compile(
+    rb"^test (\S+) (?:\.\.\. \S+ <([0-9.]+)s>|has been running for over (\d+) seconds)", re.M)
+
+# Longest first token kept for a deferred test
+MAX_TOKEN_LENGTH = 64
+
+# Summary of a deferred test's output, searched directly in the byte buffer:
+# first token of the first non-empty line, first line starting with ok/FAILED
+first_token_pattern = re.compile(rb"^[^\S\n]*(\S{1,%d})" % MAX_TOKEN_LENGTH, re.M)
+status_word_pattern = re.compile(rb"^[^\S\n]*(ok|FAILED)(?=\s|$)", re.M)
+
+# Failure output sections: "---- name stdout ----" up to the next section
+# header, the "failures:" list or the "test result:" line
+failure_header_pattern = re.compile(rb"---- (\S+) std(?:out|err) ----")
+FAILURE_SECTION_ENDS = (b"\n---- ", b"\nfailures:", b"\ntest result:")
+
+# Lines that can settle a displaced test: a line starting with ok/FAILED/
+# ignored (bare when nothing follows), the failures: list and the
+# test result: line that ends a test binary's run
+reconcile_pattern = re.compile(
+    rb"^(?:[^\S\n]*(ok|FAILED|ignored)(?=\s|$)|(failures:)|(test result:)|    (\S+)[^\S\n]*\r?$)", re.M)
+BARE_STATUS_RESULTS = {b"ok": "PASS", b"FAILED": "FAIL", b"ignored": "ignored"}
+
+# Files smaller than this per worker are parsed in a single process.
+MIN_CHUNK_SIZE = 32 * 1024 * 1024
+
+
+def finalize_test(first_token, status_word, last_word):
     """
-    Parse Rust test log files into results.
-    Handles inline, deferred, and multi-line outputs with clarity.
-    Returns { "test_name": result }
+    Decide final result for a test based on its buffered output summary.
     """
-    results = {}
+    # Explicit ok/FAILED in buffer
+    if status_word == "ok":
+        return "PASS ({})".format(first_token[:10]) if first_token else "PASS ()"
+    elif status_word == "FAILED":
+        return "FAIL ({})".format(first_token[:10]) if first_token else "FAIL ()"
 
-    test_line_pattern = re.compile(r"^test (\S+) \.\.\.(?:\s*(\S+))?")
-    current_test = None
-    buffer_lines = []
-    first_token_after_dots = None
+    # Fallback: last line’s first word
+    if last_word:
+        return "{} ({})".format(last_word, first_token[:10]) if first_token else last_word
+    return None
+
+
+class PendingTest:
+    """
+    A test whose status was deferred past its own line.
 
-    def finalize_test(name, buffer, first_token):
+    Instead of buffering the lines that follow, only what finalize_test()
+    needs is kept: the first token, the first ok/FAILED line and the first
+    word of the last non-empty line. Lines are only inspected up to
+    MAX_LINE_LENGTH bytes, so memory stays flat however long the output is.
+    """
+
+    def __init__(self, name, first_token=None):
+        self.name = name
+        self.first_token = first_token
+        # Whether anything followed "..." on the test's own line
+        self.inline = first_token is not None
+        self.status_word = None
+        self.last_word = None
+
+    def add_line(self, line):
+        """Account for one line (bytes) of the test's output."""
+        tokens = line[:MAX_LINE_LENGTH].decode("utf-8", errors="replace").split(None, 1)
+        if not tokens:
+            return
+        word = tokens[0]
+        if self.first_token is None:
+            self.first_token = word[:MAX_TOKEN_LENGTH]
+        if self.status_word is None and word in ("ok", "FAILED"):
+            self.status_word = word
+        self.last_word = word[:10]
+
+    def add_range(self, data, start, end):
+        """Account for the lines in data[start:end] without splitting them."""
+        if start >= end:
+            return
+        if self.first_token is None:
+            match = first_token_pattern.search(data, start, end)
+            if match:
+                self.first_token = match.group(1).decode("utf-8", errors="replace")
+        if self.status_word is None:
+            match = status_word_pattern.search(data, start, end)
+            if match:
+                self.status_word = match.group(1).decode("ascii")
+
+        # Last non-empty line, scanning backwards from the end
+        line_end = end
+        while line_end > start:
+            line_start = data.rfind(b"\n", start, line_end) + 1 or start
+            tokens = data[line_start:min(line_end, line_start + MAX_LINE_LENGTH)].decode(
+                "utf-8", errors="replace").split(None, 1)
+            if tokens:
+                self.last_word = tokens[0][:10]
+                break
+            line_end = line_start - 1
+
+    def record(self, results, at_eof=False):
         """
-        Decide final result for a test based on buffer and token.
+        Store the test's result. A test still unresolved at end of file is
+        dropped, as it never finished.
         """
-        # Look for explicit ok/FAILED in buffer
-        for line in buffer:
-            tokens = line.strip().split()
-            if not tokens:
-                continue
-            word = tokens[0]
-            if word == "ok":
-                return "PASS ({})".format(first_token[:10]) if first_token else "PASS ()"
-            elif word == "FAILED":
-                return "FAIL ({})".format(first_token[:10]) if first_token else "FAIL ()"
-
-        # Fallback: last line’s first word
-        if buffer:
-            # print("==========finalizing test==========", name)
-            # print(buffer)
-            for sentence in buffer[::-1]:
-                if sentence != '':
-                    last_word = sentence.split()[0][:10]
-                    return "{} ({})".format(last_word, first_token[:10]) if first_token else last_word
-        return None
-
-    with open(filepath, "r", encoding="utf-8") as f:
-        for raw_line in f:
-            line = raw_line.rstrip()
-
-            # New test starts
-            match = test_line_pattern.match(line)
-            if match:
-                test_name, inline_status = match.groups()
-                # print("==========for test==========", filepath)
-                # print(test_name)
-                # print(inline_status)
-
-                # Finalize previous if active
-                if current_test:
-                    result = finalize_test(current_test, buffer_lines, first_token_after_dots)
-                    if result:
-                        results[current_test] = result
-                    elif first_token_after_dots:
-                        results[current_test] = first_token_after_dots[:10]
-                    else:
-                        results[current_test] = "UNKNOWN"
-                current_test, buffer_lines, first_token_after_dots = None, [], None
-
-                # inline PASS/FAIL
-                if inline_status == "ok":
-                    results[test_name] = "PASS"
-                elif inline_status == "FAILED":
-                    results[test_name] = "FAIL"
-                else:
-                    if inline_status:
-                        first_token_after_dots = inline_status
-                    current_test = test_name
-                continue
-
-            # Buffering for current test
-            if current_test:
-                buffer_lines.append(line)
-                tokens = line.split()
-                if tokens and first_token_after_dots is None:
-                    first_token_after_dots = tokens[0]
-
-        # End of file, finalize last active test
-        if current_test:
-            result = finalize_test(current_test, buffer_lines, first_token_after_dots)
-            if result:
-                results[current_test] = result
+        result = finalize_test(self.first_token, self.status_word, self.last_word)
+        if result:
+            results[self.name] = result
+        elif at_eof:
+            return
+        elif self.first_token:
+            results[self.name] = self.first_token[:10]
+        else:
+            results[self.name] = "UNKNOWN"
+
+
+def find_line(data, prefix, start, end):
+    """Return the offset of the first line in data[start:end] starting with prefix, or -1."""
+    pos = data.find(prefix, start, end)
+    while pos > start and data[pos - 1:pos] != b"\n":
+        pos = data.find(prefix, pos + 1, end)
+    return pos
+
+
+class DisplacedTests:
+    """
+    Reconciles interleaved output of parallel test threads.
 
+    A test whose line ended at "..." and whose output had no ok/FAILED
+    line before the next test's line is displaced: it is recorded as
+    usual, but may still be settled by a later bare ok/FAILED/ignored line
+    (oldest displaced test first) or by its entry in the failures: list,
+    until the test result: line ends the run. A bare status line goes to
+    the pending test first if it has no status yet.
+    With track_unclaimed, bare status lines and failures: entries of other
+    tests seen before the first test result: line are noted, so a range
+    parsed on its own can be checked against tests displaced before it.
+    """
+
+    def __init__(self, track_unclaimed=False):
+        self.names = {}
+        self.in_failures = False
+        self.track_unclaimed = track_unclaimed
+        self.run_finished = False
+        self.unclaimed_status = False
+        self.unclaimed_failures = []
+
+    def active(self, pending):
+        """Check whether output lines have to be looked at."""
+        return bool(self.names) or (pending is not None and not pending.inline) or (
+            self.track_unclaimed and not self.run_finished)
+
+    def add(self, pending):
+        """Note a pending test that was recorded without a status."""
+        if not pending.inline and pending.status_word is None:
+            self.names[pending.name] = None
+
+    def handle(self, match, bare, pending, results):
+        """
+        Act on a reconcile_pattern match; bare tells whether nothing but
+        whitespace follows the status word.
+        """
+        status, failures, test_result, listed = match.groups()
+        if status:
+            if pending is not None and pending.status_word is None and status != b"ignored":
+                # The pending test's own status line
+                pending.status_word = status.decode("ascii")
+            elif bare:
+                if self.track_unclaimed and not self.run_finished:
+                    # May belong to a test displaced before this range
+                    self.unclaimed_status = True
+                if self.names:
+                    name = next(iter(self.names))
+                    del self.names[name]
+                    results[name] = BARE_STATUS_RESULTS[status]
+        elif failures:
+            self.in_failures = True
+        elif test_result:
+            # Whatever is still displaced keeps its recorded result
+            self.in_failures = False
+            self.names.clear()
+            self.run_finished = True
+        elif self.in_failures:
+            name = listed.decode("utf-8", errors="replace")
+            if name in self.names:
+                del self.names[name]
+                results[name] = "FAIL"
+            elif pending is not None and pending.name == name and pending.status_word is None:
+                pending.status_word = "FAILED"
+            elif self.track_unclaimed and not self.run_finished:
+                self.unclaimed_failures.append(name)
+
+    def scan(self, data, start, end, pending, results):
+        """Handle the matching lines in data[start:end]."""
+        if not (self.names or self.in_failures or (self.track_unclaimed and not self.run_finished)):
+            # Only the pending test can be settled, by its own status line
+            # or by a failures: list naming it, whichever comes first
+            failures = find_line(data, b"failures:", start, end)
+            status = status_word_pattern.search(data, start, failures if failures >= 0 else end)
+            if status:
+                if pending is not None and pending.status_word is None:
+                    pending.status_word = status.group(1).decode("ascii")
+                return
+            if failures < 0:
+                return
+            start = failures
+        for match in reconcile_pattern.finditer(data, start, end):
+            bare = True
+            if match.group(1):
+                line_end = data.find(b"\n", match.end(), end)
+                rest = data[match.end():min(line_end if line_end >= 0 else end, match.end() + MAX_TOKEN_LENGTH)]
+                bare = not rest.strip()
+            self.handle(match, bare, pending, results)
+
+    def summary(self):
+        """Return what a range parsed on its own leaves for the ranges around it."""
+        return {
+            "displaced": list(self.names),
+            "run_finished": self.run_finished,
+            "unclaimed_status": self.unclaimed_status,
+            "unclaimed_failures": self.unclaimed_failures,
+        }
+
+
+def iter_test_lines(data, start=0, end=None):
+    """
+    Yield (line_start, line_end, match) for every test status line in
+    data[start:end], jumping between line starts with bytes.find().
+    start must be at the beginning of a line.
+    """
+    if end is None:
+        end = len(data)
+
+    if data[start:start + 5] == b"test ":
+        pos = start
+    else:
+        pos = data.find(TEST_LINE_START, start, end)
+        if pos >= 0:
+            pos += 1
+
+    while 0 <= pos < end:
+        line_end = data.find(b"\n", pos, end)
+        if line_end < 0:
+            line_end = end
+        match = test_line_pattern.match(data, pos, min(line_end, pos + MAX_LINE_LENGTH))
+        if match:
+            yield pos, line_end, match
+        pos = data.find(TEST_LINE_START, line_end, end)
+        if pos >= 0:
+            pos += 1
+
+
+def record_duration(match, durations):
+    """Record the duration given by a duration_line_pattern match."""
+    name = match.group(1).decode("utf-8", errors="replace")
+    seconds, running_for = match.group(2, 3)
+    if seconds:
+        durations[name] = float(seconds)
+    elif float(running_for) > durations.get(name, 0):
+        durations[name] = float(running_for)
+
+
+def collect_durations(data, start, end, durations):
+    """
+    Record the duration in seconds of every test in data[start:end] that
+    shows one into durations ({ "test_name": seconds }).
+    """
+    for match in duration_line_pattern.finditer(data, start, end):
+        record_duration(match, durations)
+
+
+def index_failure_sections(data, start, end, failures):
+    """
+    Record the byte span of every failure output section in data[start:end]
+    into failures ({ "test_name": [start, end] }).
+    """
+    pos = data.find(b"\n---- ", max(start - 1, 0), end)
+    while pos >= 0:
+        pos += 1
+        line_end = data.find(b"\n", pos, end)
+        if line_end < 0:
+            line_end = end
+        match = failure_header_pattern.match(data, pos, line_end)
+        if match:
+            section_end = end
+            for marker in FAILURE_SECTION_ENDS:
+                found = data.find(marker, line_end, section_end)
+                if found >= 0:
+                    section_end = found + 1
+            failures[match.group(1).decode("utf-8", errors="replace")] = [pos, section_end]
+        pos = data.find(b"\n---- ", line_end, end)
+
+
+def parse_log_range(data, start=0, end=None, at_eof=True, index=None, results=None, displaced=None):
+    """
+    Parse the status lines in data[start:end] into results.
+    start must be at the beginning of a line. When at_eof is False the
+    range is followed by another test line, so a test still pending at
+    the end of the range is finalized the way the sequential parser does
+    when it meets the next test.
+    If index (see log_io.new_log_index) is given, the byte spans of status
+    lines and failure sections are recorded into it.
+    results may be given to record into (e.g. a SelectiveResults), and
+    displaced (a DisplacedTests) to reconcile interleaved output with.
+    Returns { "test_name": result }
+    """
+    if end is None:
+        end = len(data)
+
+    if results is None:
+        results = {}
+    if displaced is None:
+        displaced = DisplacedTests()
+    pending = None
+    buffer_start = start
+
+    for line_start, line_end, match in iter_test_lines(data, start, end):
+        # Lines since the previous test line only matter while a test
+        # could still be settled by them
+        if displaced.active(pending):
+            displaced.scan(data, buffer_start, line_start, pending, results)
+        displaced.in_failures = False
+
+        # Finalize previous if active
+        if pending:
+            pending.add_range(data, buffer_start, line_start)
+            pending.record(results)
+            displaced.add(pending)
+            pending = None
+        buffer_start = line_end + 1
+
+        raw_name, inline_status = match.groups()
+        test_name = raw_name.decode("utf-8", errors="replace")
+        if index is not None:
+            index["tests"][test_name] = [line_start, line_end]
+
+        # inline PASS/FAIL
+        if inline_status == b"ok":
+            results[test_name] = "PASS"
+        elif inline_status == b"FAILED":
+            results[test_name] = "FAIL"
+        else:
+            first_token = inline_status.decode("utf-8", errors="replace") if inline_status else None
+            pending = PendingTest(test_name, first_token)
+
+    # End of range, finalize last active test
+    if displaced.active(pending):
+        displaced.scan(data, buffer_start, end, pending, results)
+    if pending:
+        pending.add_range(data, buffer_start, end)
+        pending.record(results, at_eof=at_eof)
+        if not at_eof:
+            displaced.add(pending)
+
+    if index is not None:
+        index_failure_sections(data, start, end, index["failures"])
+
+    return results
+
+
+def parse_log_bytes(data, index=None, results=None):
+    """
+    Parse a bytes-like Rust test log (bytes or mmap) into results.
+    Lines between status lines are only examined for tests whose result
+    was deferred.
+    Returns { "test_name": result }
+    """
+    return parse_log_range(data, index=index, results=results)
+
+
+def split_log_ranges(data, count):
+    """
+    Split data into at most count byte ranges, each starting on a test
+    status line (except the first), so that a deferred test never spans
+    two ranges.
+    Returns [(start, end), ...]
+    """
+    size = len(data)
+    boundaries = [0]
+    for i in range(1, count):
+        target = size * i // count
+        if target <= boundaries[-1]:
+            continue
+        line_start = data.find(b"\n", target - 1)
+        if line_start < 0:
+            break
+        for test_start, _, _ in iter_test_lines(data, line_start + 1, size):
+            if test_start > boundaries[-1]:
+                boundaries.append(test_start)
+            break
+    boundaries.append(size)
+    return [(boundaries[i], boundaries[i + 1]) for i in range(len(boundaries) - 1)
+            if boundaries[i] < boundaries[i + 1]]
+
+
+def _parse_log_chunk(filepath, start, end, with_index=False, wanted=None):
+    """
+    Worker entry point: map the file and parse one range of it. With
+    wanted, results are kept as a SelectiveResults and returned exported.
+    Returns (results, index or None, DisplacedTests.summary())
+    """
+    index = new_log_index() if with_index else None
+    results = SelectiveResults(wanted) if wanted is not None else None
+    displaced = DisplacedTests(track_unclaimed=start > 0)
+    with open(filepath, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            results = parse_log_range(data, start, end, at_eof=end >= len(data), index=index, results=results,
+                                      displaced=displaced)
+    if wanted is not None:
+        results = results.export()
+    return results, index, displaced.summary()
+
+
+def _parse_log_ranges(filepath, ranges, index=None, results=None):
+    """
+    Parse ranges of a log in a process pool and merge them in file order.
+    Returns the results, or None if a test displaced in one range could be
+    settled by a line in a later one, which only a sequential parse sees.
+    """
+    # Every range after the first starts on a test line, so a test left
+    # pending at the end of one range is already finished by its worker;
+    # merging the ranges in file order reproduces the sequential dict.
+    # Selective workers get a compact filter; merge() applies the exact one.
+    selective = isinstance(results, SelectiveResults)
+    wanted = results.worker_filter() if selective else None
+    if results is None:
+        results = {}
+    carried = set()
+    with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+        futures = [executor.submit(_parse_log_chunk, filepath, start, end, index is not None, wanted)
+                   for start, end in ranges]
+        for future in futures:
+            chunk_results, chunk_index, displaced = future.result()
+            if carried and (displaced["unclaimed_status"] or not carried.isdisjoint(displaced["unclaimed_failures"])):
+                for other in futures:
+                    other.cancel()
+                return None
+            if displaced["run_finished"]:
+                carried.clear()
+            carried.update(displaced["displaced"])
+
+            if selective:
+                results.merge(chunk_results)
+            else:
+                results.update(chunk_results)
+            if index is not None:
+                index["tests"].update(chunk_index["tests"])
+                index["failures"].update(chunk_index["failures"])
     return results
+
+
+def _parse_log_stream(filepath, index=None, results=None, strip_ansi=False, durations=None):
+    """Parse a log with the incremental parser, block by block."""
+    parser = RustLogStreamParser(index=index, durations=durations)
+    parser.strip_ansi = strip_ansi
+    if results is not None:
+        parser.results = results
+    with open_log(filepath) as f:
+        read_stream(parser, f)
+    return parser.close()
+
+
+def parse_log_file(filepath, workers=1, index=None, results=None, strip_ansi=False, durations=None):
+    """
+    Parse Rust test log files into results.
+    Handles inline, deferred, and multi-line outputs with clarity, and
+    interleaved output of parallel test threads (see DisplacedTests).
+    The file is memory-mapped and scanned as bytes, so large logs are not
+    decoded line by line and invalid UTF-8 does not abort the parse.
+    With workers > 1 (or None for one per CPU) large files are split into
+    ranges parsed in a process pool; the results are identical.
+    Compressed logs (.gz, .bz2, .xz) are streamed through the incremental
+    parser while they are decompressed.
+    If index (see log_io.new_log_index) is given, the byte spans of status
+    lines and failure sections are recorded into it.
+    results may be given to record into; with a SelectiveResults only the
+    wanted and failing tests are kept.
+    With strip_ansi, ANSI escape sequences (colored output) are removed
+    before parsing; logs that contain any are streamed, not mapped.
+    If durations is given, the duration in seconds of each test that shows
+    one (--report-time, or a "has been running for over" lower bound) is
+    recorded into it.
+    Returns { "test_name": result }
+    """
+    if is_compressed(filepath):
+        return _parse_log_stream(filepath, index, results, strip_ansi, durations)
+
+    with open(filepath, "rb") as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            return {} if results is None else results
+        with data:
+            if strip_ansi and data.find(b"\x1b") >= 0:
+                return _parse_log_stream(filepath, index, results, strip_ansi, durations)
+            if durations is not None:
+                collect_durations(data, 0, len(data), durations)
+            if workers is None:
+                workers = os.cpu_count() or 1
+            workers = min(workers, len(data) // MIN_CHUNK_SIZE)
+            if workers <= 1:
+                return parse_log_bytes(data, index, results)
+            ranges = split_log_ranges(data, workers)
+            if len(ranges) <= 1:
+                return parse_log_bytes(data, index, results)
+
+    fresh = SelectiveResults(results.wanted) if isinstance(results, SelectiveResults) else None
+    merged = _parse_log_ranges(filepath, ranges, index, results)
+    if merged is not None:
+        return merged
+
+    # Interleaved output crossed a range boundary: parse in one pass
+    with open(filepath, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return parse_log_bytes(data, index, fresh)
+
+
+class RustLogStreamParser(LineStreamParser):
+    """
+    Incremental counterpart of parse_log_file: feed() raw bytes as they
+    arrive (e.g. piped from cargo test) and read results at any time.
+    The pending test is kept between feeds.
+    If index (see log_io.new_log_index) is given, the byte spans of status
+    lines and failure sections are recorded into it. If durations is given,
+    test durations are recorded into it as parse_log_file() does.
+    """
+
+    name = "rust"
+
+    def __init__(self, index=None, durations=None):
+        super().__init__()
+        self.pending = None
+        self.displaced = DisplacedTests()
+        self.index = index
+        self.durations = durations
+        self.failure_section = None
+
+    def handle_line(self, line):
+        if self.index is not None:
+            self._index_line(line)
+        if self.durations is not None and line.startswith(b"test "):
+            duration = duration_line_pattern.match(line)
+            if duration:
+                record_duration(duration, self.durations)
+
+        match = test_line_pattern.match(line)
+        if not match:
+            if self.displaced.active(self.pending):
+                event = reconcile_pattern.match(line)
+                if event:
+                    self.displaced.handle(event, not line[event.end():].strip(), self.pending, self.results)
+            # Output of the current test
+            if self.pending:
+                self.pending.add_line(line)
+            return
+        self.displaced.in_failures = False
+
+        # Finalize previous if active
+        if self.pending:
+            self.pending.record(self.results)
+            self.displaced.add(self.pending)
+            self.pending = None
+
+        raw_name, inline_status = match.groups()
+        test_name = raw_name.decode("utf-8", errors="replace")
+        if self.index is not None:
+            self.index["tests"][test_name] = [self.line_start, self.line_end]
+
+        # inline PASS/FAIL
+        if inline_status == b"ok":
+            self.results[test_name] = "PASS"
+        elif inline_status == b"FAILED":
+            self.results[test_name] = "FAIL"
+        else:
+            first_token = inline_status.decode("utf-8", errors="replace") if inline_status else None
+            self.pending = PendingTest(test_name, first_token)
+
+    def _index_line(self, line):
+        """Open and close failure sections as their boundaries go by."""
+        header = failure_header_pattern.match(line) if line.startswith(b"---- ") else None
+        if self.failure_section and (header or line.startswith((b"failures:", b"test result:"))):
+            self.failure_section[1] = self.line_start
+            self.failure_section = None
+        if header:
+            self.failure_section = [self.line_start, self.line_end + 1]
+            self.index["failures"][header.group(1).decode("utf-8", errors="replace")] = self.failure_section
+        elif self.failure_section:
+            self.failure_section[1] = self.line_end + 1
+
+    def finish(self):
+        if self.pending:
+            self.pending.record(self.results, at_eof=True)
+            self.pending = None
+        if self.failure_section:
+            self.failure_section[1] = min(self.failure_section[1], self.position)
+            self.failure_section = None
+
+    def snapshot(self):
+        results = dict(self.results)
+        if self.pending:
+            self.pending.record(results, at_eof=True)
+        return results
+
+    def get_state(self):
+        return {
+            "pending": vars(self.pending) if self.pending else None,
+            "displaced": list(self.displaced.names),
+            "in_failures": self.displaced.in_failures,
+        }
+
+    def set_state(self, state):
+        self.pending = None
+        if state["pending"]:
+            self.pending = PendingTest(state["pending"]["name"])
+            vars(self.pending).update(state["pending"])
+        self.displaced = DisplacedTests()
+        self.displaced.names = dict.fromkeys(state.get("displaced", ()))
+        self.displaced.in_failures = state.get("in_failures", False)
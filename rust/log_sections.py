@@ -0,0 +1,328 @@
+import mmap
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from log_format import FORMAT_LANGUAGES, FORMAT_SIGNATURES, SNIFF_SIZE
+from log_io import CHUNK_SIZE, LineStreamParser, is_compressed, new_log_index, open_log, read_stream
+
+# Bump when a change alters how logs are split, to invalidate cached results
+SECTIONS_VERSION = 1
+
+# Lines that start a new section of a log holding the output of several
+# test runners (e.g. cargo test, then pnpm vitest), with the language of
+# the section, or None if it is detected from the lines that follow.
+SECTION_MARKERS = [
+    # cargo test: "     Running unittests src/lib.rs (target/debug/deps/x-1f2e)"
+    ("rust", rb" +Running (?:unittests )?(?:\S+ \(\S*target\S*\)|\S*target\S+)|   Doc-tests \S+"),
+    ("nextest", rb" *Starting \d+ tests? across \d+ binar.*"),
+    # vitest banner: " RUN  v1.6.0 /repo", or the command echoed by npm / pnpm
+    ("javascript", rb" *RUN +v\d+\.\d+.*|> vitest\b.*"),
+    ("jest", rb"(?:PASS|FAIL) \S+\.(?:test|spec)\.[cm]?[jt]sx?(?: .*)?"),
+    ("python", rb"=+ test session starts =+"),
+    # Harness markers around the test command's output
+    (None, rb">>>>> (?:Start|End) Test Output.*"),
+]
+MARKER_PATTERN = rb"(?:" + b"|".join(b"(%s)" % pattern for _, pattern in SECTION_MARKERS) + rb")\r?$"
+section_marker_pattern = re.compile(MARKER_PATTERN, re.MULTILINE)
+# Searching for the newline before a marker is much faster than for "^"
+section_search_pattern = re.compile(rb"\n" + MARKER_PATTERN, re.MULTILINE)
+MARKER_LANGUAGES = [language for language, _ in SECTION_MARKERS]
+
+# Sections are only parsed in a process pool from this size on
+POOL_MIN_SIZE = 8 * 1024 * 1024
+
+# Results of a mixed log are named "language:test_name"
+LANGUAGE_SEPARATOR = ":"
+
+
+def marker_language(match):
+    """Return the language a section_marker_pattern match starts (None: detect it)."""
+    return MARKER_LANGUAGES[match.lastindex - 1]
+
+
+def line_language(line, languages):
+    """
+    Return the language of the first format signature matching line
+    (bytes) whose language is in languages, or None.
+    """
+    line = line.rstrip(b"\r")
+    for log_format, pattern, _ in FORMAT_SIGNATURES:
+        language = FORMAT_LANGUAGES[log_format]
+        if language in languages and pattern.match(line):
+            return language
+    return None
+
+
+def sniff_section_language(data, start, end, languages):
+    """
+    Detect the language of a section from the first signature line in
+    its first SNIFF_SIZE bytes. Returns None if there is none.
+    """
+    head = data[start:min(end, start + SNIFF_SIZE)]
+    for line in head.split(b"\n"):
+        language = line_language(line, languages)
+        if language is not None:
+            return language
+    return None
+
+
+def find_log_sections(data, languages):
+    """
+    Split a log (bytes or mmap) at its section markers.
+    Sections whose language is not in languages, or cannot be detected,
+    are left out; consecutive sections of one language are joined.
+    Returns [(language, start, end)] in file order.
+    """
+    first = section_marker_pattern.match(data)
+    starts = [(0, marker_language(first) if first else None)]
+    for match in section_search_pattern.finditer(data):
+        starts.append((match.start() + 1, marker_language(match)))
+    starts.append((len(data), None))
+
+    sections = []
+    for (start, language), (end, _) in zip(starts, starts[1:]):
+        if start == end:
+            continue
+        if language is None:
+            language = sniff_section_language(data, start, end, languages)
+        if language not in languages:
+            continue
+        if sections and sections[-1][0] == language and sections[-1][2] == start:
+            sections[-1] = (language, sections[-1][1], end)
+        else:
+            sections.append((language, start, end))
+    return sections
+
+
+def group_sections(sections):
+    """Group section ranges by language, in order of first appearance."""
+    groups = {}
+    for language, start, end in sections:
+        groups.setdefault(language, []).append((start, end))
+    return groups
+
+
+def _parse_sections(parser_class, filepath, ranges, strip_ansi=False, with_index=False, with_durations=False):
+    """
+    Feed byte ranges of a log, in order, into one parser.
+    Returns (results, index or None, durations or None).
+    """
+    parser = parser_class()
+    parser.strip_ansi = strip_ansi
+    parser.index = new_log_index() if with_index else None
+    parser.durations = {} if with_durations else None
+    with open_log(filepath) as f:
+        for start, end in ranges:
+            f.seek(start)
+            # Ranges end on a line boundary, so no partial line is pending
+            parser.offset = parser.position = start
+            remaining = end - start
+            while remaining > 0:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                parser.feed(chunk)
+                remaining -= len(chunk)
+    return parser.close(), parser.index, parser.durations
+
+
+def add_language(language, parsed, results, index=None, durations=None):
+    """
+    Record the (results, index, durations) of one language's sections
+    into the merged ones, under "language:test_name".
+    """
+    prefix = language + LANGUAGE_SEPARATOR
+    section_results, section_index, section_durations = parsed
+    for test_name, status in section_results.items():
+        results[prefix + test_name] = status
+    if index is not None and section_index is not None:
+        for kind in ("tests", "failures"):
+            for test_name, span in section_index[kind].items():
+                index[kind][prefix + test_name] = span
+    if durations is not None and section_durations is not None:
+        for test_name, seconds in section_durations.items():
+            durations[prefix + test_name] = seconds
+
+
+def _parse_sectioned_stream(filepath, parsers, index=None, results=None, strip_ansi=False, durations=None):
+    """Parse a mixed log with the incremental parser, block by block."""
+    parser = SectionedStreamParser(parsers, index=index, durations=durations)
+    parser.strip_ansi = strip_ansi
+    if results is not None:
+        parser.results = results
+    with open_log(filepath) as f:
+        read_stream(parser, f)
+    return parser.close()
+
+
+def parse_sectioned_log_file(filepath, parsers, workers=1, index=None, results=None, strip_ansi=False,
+                             durations=None):
+    """
+    Parse a log that holds the output of several test runners, e.g. cargo
+    test followed by vitest in one CI job.
+    The log is split at the section markers (SECTION_MARKERS); the sections
+    of each language are parsed by that language's incremental parser,
+    from parsers ({ "language": parser class }). With workers > 1 (or None
+    for one per CPU), languages are parsed in a process pool.
+    Results are named "language:test_name", languages in order of first
+    appearance.
+    Compressed logs (.gz, .bz2, .xz) are streamed through
+    SectionedStreamParser while they are decompressed, as are logs with
+    escape sequences when strip_ansi is set.
+    If index (see log_io.new_log_index) or durations is given, the spans
+    and durations reported by the section parsers are recorded into it.
+    results may be given to record into.
+    Returns { "language:test_name": result }
+    """
+    if is_compressed(filepath):
+        return _parse_sectioned_stream(filepath, parsers, index, results, strip_ansi, durations)
+
+    if results is None:
+        results = {}
+    with open(filepath, "rb") as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            return results
+        with data:
+            if strip_ansi and data.find(b"\x1b") >= 0:
+                # Markers may be colored
+                return _parse_sectioned_stream(filepath, parsers, index, results, strip_ansi, durations)
+            groups = group_sections(find_log_sections(data, parsers))
+            size = len(data)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(groups))
+    tasks = [(language, parsers[language], filepath, ranges, strip_ansi, index is not None, durations is not None)
+             for language, ranges in groups.items()]
+    if workers <= 1 or size < POOL_MIN_SIZE:
+        for language, *args in tasks:
+            add_language(language, _parse_sections(*args), results, index, durations)
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [(language, executor.submit(_parse_sections, *args)) for language, *args in tasks]
+        for language, future in futures:
+            add_language(language, future.result(), results, index, durations)
+    return results
+
+
+class SectionedStreamParser(LineStreamParser):
+    """
+    Incremental counterpart of parse_sectioned_log_file: each line is
+    passed on to the parser of the section it is in, one parser per
+    language (from parsers, { "language": parser class }). After a marker
+    of unknown language, lines are held until one matches a format
+    signature, and dropped if none does within SNIFF_SIZE bytes.
+    Lines are cut at MAX_LINE_LENGTH, so one-line JSON reports are only
+    read whole by parse_sectioned_log_file.
+    If index or durations is given, the section parsers' spans and
+    durations are recorded into it, named like the results, when the
+    parser is closed.
+    A checkpoint holds the checkpoint of every section parser, so the
+    parser is only resumable while all of them are.
+    """
+
+    name = "mixed"
+
+    def __init__(self, parsers=None, index=None, durations=None):
+        super().__init__()
+        self.parsers = parsers or {}
+        self.index = index
+        self.durations = durations
+        # Parser of each language seen so far, in order of appearance
+        self.sections = {}
+        self.current = None
+        # (line, start) held while the section's language is unknown, as
+        # it is at the start of the log
+        self.pending = []
+        self.pending_size = 0
+
+    def handle_line(self, line):
+        marker = section_marker_pattern.match(line)
+        if marker:
+            language = marker_language(marker)
+            self.current = None
+            self.pending = None
+            if language is None:
+                self.pending = []
+                self.pending_size = 0
+            elif language in self.parsers:
+                self._start_section(language)
+
+        if self.pending is not None:
+            self.pending.append((line, self.line_start))
+            self.pending_size += len(line) + 1
+            language = line_language(line, self.parsers)
+            if language is not None:
+                self._start_section(language)
+            elif self.pending_size >= SNIFF_SIZE:
+                self.pending = None
+            return
+        if self.current is not None:
+            self._pass_line(line, self.line_start)
+
+    def _start_section(self, language):
+        parser = self.sections.get(language)
+        if parser is None:
+            parser = self.parsers[language]()
+            parser.index = new_log_index() if self.index is not None else None
+            parser.durations = {} if self.durations is not None else None
+            self.sections[language] = parser
+        self.current = parser
+        pending, self.pending = self.pending, None
+        for line, start in pending or ():
+            self._pass_line(line, start)
+
+    def _pass_line(self, line, start):
+        self.current.offset = self.current.position = start
+        self.current.feed(line + b"\n")
+
+    def snapshot(self):
+        results = {}
+        for language, parser in self.sections.items():
+            add_language(language, (parser.snapshot(), None, None), results)
+        return results
+
+    def finish(self):
+        self.pending = None
+        for language, parser in self.sections.items():
+            add_language(language, (parser.close(), parser.index, parser.durations),
+                         self.results, self.index, self.durations)
+
+    @property
+    def resumable(self):
+        # A section of a JSON or XML report cannot be resumed
+        return all(parser.resumable for parser in self.sections.values())
+
+    def get_state(self):
+        current = None
+        for language, parser in self.sections.items():
+            if parser is self.current:
+                current = language
+        pending = None
+        if self.pending is not None:
+            pending = [[line.decode("latin-1"), start] for line, start in self.pending]
+        return {
+            "sections": {language: parser.checkpoint() for language, parser in self.sections.items()},
+            "current": current,
+            "pending": pending,
+            "pending_size": self.pending_size,
+        }
+
+    def set_state(self, state):
+        self.sections = {}
+        for language, checkpoint in state["sections"].items():
+            parser = self.parsers[language]()
+            parser.restore(checkpoint)
+            parser.index = new_log_index() if self.index is not None else None
+            parser.durations = {} if self.durations is not None else None
+            self.sections[language] = parser
+        self.current = self.sections.get(state["current"])
+        self.pending = None
+        if state["pending"] is not None:
+            self.pending = [(line.encode("latin-1"), start) for line, start in state["pending"]]
+        self.pending_size = state["pending_size"]
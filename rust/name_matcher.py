@@ -0,0 +1,278 @@
+from collections import deque
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton over a list of patterns: one pass over a text
+    finds every pattern it contains, however many patterns there are.
+    States are numbered; each has a dict of transitions, a failure link
+    and the patterns that end there, directly or through its failure
+    links.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        goto = [{}]
+        ends = [[]]
+        for pattern_id, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    ends.append([])
+                state = next_state
+            ends[state].append(pattern_id)
+
+        # Failure links, breadth first so that shorter states are done first
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                target = goto[fallback].get(char, 0)
+                fail[next_state] = target if target != next_state else 0
+                ends[next_state].extend(ends[fail[next_state]])
+
+        self.goto = goto
+        self.fail = fail
+        self.ends = [tuple(pattern_ids) for pattern_ids in ends]
+
+    def find(self, text):
+        """Return the set of ids (indexes into patterns) of the patterns in text."""
+        goto = self.goto
+        fail = self.fail
+        ends = self.ends
+        found = set(ends[0])
+        state = 0
+        for char in text:
+            next_state = goto[state].get(char)
+            while next_state is None and state:
+                state = fail[state]
+                next_state = goto[state].get(char)
+            state = next_state or 0
+            if ends[state]:
+                found.update(ends[state])
+        return found
+
+
+class ContainmentIndex:
+    """
+    Finds which of a fixed set of names (the configured tests) each log
+    test name contains. Lookups are memoized by log test name, so a name
+    found in several logs is only scanned once.
+    If key is given, a name is looked for as key(name) instead.
+    """
+
+    def __init__(self, names, key=None):
+        self.names = list(dict.fromkeys(names))
+        self.name_set = frozenset(self.names)
+        # Names that are looked for as the same text are found together
+        self._key_names = {}
+        for name in self.names:
+            self._key_names.setdefault(key(name) if key else name, []).append(name)
+        self._keys = list(self._key_names)
+        self._automaton = AhoCorasick(self._keys)
+        self._contained = {}
+
+    def contained(self, text):
+        """Return the names contained in text, as a tuple."""
+        names = self._contained.get(text)
+        if names is None:
+            key_names = self._key_names
+            keys = self._keys
+            names = tuple(name for key_id in self._automaton.find(text) for name in key_names[keys[key_id]])
+            self._contained[text] = names
+        return names
+
+    def match_log(self, log_tests, text=None, accept=None):
+        """Index the log test names of one log, see LogMatches."""
+        return LogMatches(self, log_tests, text, accept)
+
+
+class LogMatches:
+    """
+    The log tests of one log that contain each name of a ContainmentIndex,
+    in log order, so the first one is what a linear search would find.
+    If text is given, text(log_test) is searched instead of the log test
+    name; if accept is given, a name only matches the log tests for which
+    accept(name, log_test) is true.
+    """
+
+    def __init__(self, index, log_tests, text=None, accept=None):
+        self.index = index
+        self.text = text
+        self.accept = accept
+        self._matches = {}
+        for log_test in log_tests:
+            for name in self.contained(log_test):
+                matches = self._matches.get(name)
+                if matches is None:
+                    self._matches[name] = [log_test]
+                else:
+                    matches.append(log_test)
+
+    def covers(self, name):
+        """Check whether name is one of the indexed names."""
+        return name in self.index.name_set
+
+    def first(self, name):
+        """Return the first log test containing name, or None."""
+        matches = self._matches.get(name)
+        return matches[0] if matches else None
+
+    def all(self, name):
+        """Return every log test containing name, in log order."""
+        return list(self._matches.get(name, ()))
+
+    def contained(self, log_test):
+        """Return the indexed names that match log_test."""
+        names = self.index.contained(self.text(log_test) if self.text else log_test)
+        if self.accept is not None:
+            names = tuple(name for name in names if self.accept(name, log_test))
+        return names
+
+
+class ExactMatches:
+    """
+    LogMatches counterpart for names compared exactly: every lookup is a
+    set or dict membership test against the log's results.
+    """
+
+    def __init__(self, names, log_results):
+        self.name_set = frozenset(names)
+        self.log_results = log_results
+
+    def covers(self, name):
+        """Check whether name is one of the indexed names."""
+        return name in self.name_set
+
+    def first(self, name):
+        """Return name if the log has it, or None."""
+        return name if name in self.log_results else None
+
+    def all(self, name):
+        """Return [name] if the log has it, or []."""
+        return [name] if name in self.log_results else []
+
+    def contained(self, log_test):
+        """Return (log_test,) if it is one of the indexed names, or ()."""
+        return (log_test,) if log_test in self.name_set else ()
+
+
+# How a config name was resolved to its log tests, in order of preference
+RESOLUTION_PATHS = ("exact", "containment", "canonical", "unresolved")
+
+
+class CanonicalIndex:
+    """
+    Resolves config names to log tests through a canonical form of both
+    (canonicalize, see name_rules): a name matches the log tests with the
+    same canonical name, found with one dict lookup. With containment, a
+    name also matches the log tests that contain it (ContainmentIndex),
+    as it did before canonical names, and resolves to the first of those
+    when there is one; canonical names add the matches containment misses.
+    If unscope is given (see name_rules), a canonical name without a scope
+    (package) also matches the log tests of every scope with that name,
+    while a name with one only matches the log tests of its own scope.
+    """
+
+    def __init__(self, names, canonicalize, containment=True, unscope=None):
+        self.names = list(dict.fromkeys(names))
+        self.name_set = frozenset(self.names)
+        self.canonicalize = canonicalize
+        self.unscope = unscope
+        self.canonical_names = {}
+        for name in self.names:
+            self.canonical_names.setdefault(canonicalize(name), []).append(name)
+        # Shared by every log, so a log test name is only scanned once
+        self.containment = ContainmentIndex(self.names) if containment else None
+
+    def match_logs(self, state_results):
+        """Index the log tests of each log's results, see CanonicalMatches."""
+        return [CanonicalMatches(self, results) for results in state_results]
+
+
+class CanonicalMatches:
+    """
+    The log tests of one log matching each name of a CanonicalIndex, with
+    the LogMatches API, in log order. A name resolves to the first log
+    test containing it if the index matches by containment and there is
+    one, else to the first log test with its canonical name.
+    Log tests are found under their canonical name and, when it has a
+    scope, under their canonical name without it.
+    """
+
+    def __init__(self, index, log_results):
+        self.index = index
+        self.log_results = log_results
+        canonical_names = index.canonical_names
+        containment = index.containment
+        # Log tests matching each name, and the first containing it
+        self._matches = {}
+        self._first_contained = {}
+        for log_test in log_results:
+            names = [name for canonical in self._keys(log_test) for name in canonical_names.get(canonical, ())]
+            if containment is not None:
+                for name in containment.contained(log_test):
+                    self._first_contained.setdefault(name, log_test)
+                    names.append(name)
+            for name in dict.fromkeys(names):
+                matches = self._matches.get(name)
+                if matches is None:
+                    self._matches[name] = [log_test]
+                else:
+                    matches.append(log_test)
+
+    def _keys(self, log_test):
+        """Return the canonical names log_test is found under."""
+        canonical = self.index.canonicalize(log_test)
+        if self.index.unscope is None:
+            return (canonical,)
+        unscoped = self.index.unscope(canonical)
+        return (canonical,) if unscoped == canonical else (canonical, unscoped)
+
+    def covers(self, name):
+        """Check whether name is one of the indexed names."""
+        return name in self.index.name_set
+
+    def first(self, name):
+        """Return the log test name resolves to, or None."""
+        log_test = self._first_contained.get(name)
+        if log_test is not None:
+            return log_test
+        matches = self._matches.get(name)
+        return matches[0] if matches else None
+
+    def all(self, name):
+        """Return every log test matching name, in log order."""
+        return list(self._matches.get(name, ()))
+
+    def contained(self, log_test):
+        """Return the indexed names that match log_test."""
+        canonical_names = self.index.canonical_names
+        names = [name for canonical in self._keys(log_test) for name in canonical_names.get(canonical, ())]
+        if self.index.containment is not None:
+            names.extend(self.index.containment.contained(log_test))
+        return tuple(dict.fromkeys(names))
+
+    def resolution(self, name):
+        """Return how name was resolved, one of RESOLUTION_PATHS."""
+        if name in self.log_results:
+            return "exact"
+        if name in self._first_contained:
+            return "containment"
+        return "canonical" if name in self._matches else "unresolved"
+
+    def resolution_counts(self):
+        """Count the indexed names resolved by each of RESOLUTION_PATHS."""
+        counts = dict.fromkeys(RESOLUTION_PATHS, 0)
+        for name in self.index.names:
+            counts[self.resolution(name)] += 1
+        return counts
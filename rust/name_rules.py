@@ -0,0 +1,86 @@
+import json
+import os
+import re
+
+# Test names are compared in a canonical form, so that a configured name
+# and a log name that only differ in formatting (whitespace, color code
+# residue, "|package|" or "package " prefixes, "\" path separators) are
+# equal. The rules are read from a JSON file, by default the one shipped
+# next to this module: "rules" holds named {"pattern", "replace"}
+# substitutions, and "languages" the rules applied, in order, for each
+# parser. A rule may also give a "scope" pattern matching the part of the
+# canonical name it produced that tells tests of different packages
+# apart, so that a name given without one can match any package.
+NAME_RULES_ENV = "LOG_ANALYZER_NAME_RULES"
+DEFAULT_NAME_RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "name_rules.json")
+
+
+class NameRules:
+    """
+    Canonicalization rules per language, compiled once.
+    """
+
+    def __init__(self, rules=None, languages=None):
+        compiled = {name: (re.compile(rule["pattern"]), rule.get("replace", ""))
+                    for name, rule in (rules or {}).items()}
+        scopes = {name: re.compile(rule["scope"]) for name, rule in (rules or {}).items() if rule.get("scope")}
+        self.languages = {}
+        self.scopes = {}
+        for language, rule_names in (languages or {}).items():
+            unknown = [name for name in rule_names if name not in compiled]
+            if unknown:
+                raise ValueError(f"Unknown name rules for {language}: {', '.join(unknown)}")
+            self.languages[language] = [compiled[name] for name in rule_names]
+            self.scopes[language] = [scopes[name] for name in rule_names if name in scopes]
+
+    def canonicalizer(self, language):
+        """
+        Return a function giving the canonical form of a test name of
+        language, memoized by name, or None if the language has no rules.
+        """
+        steps = self.languages.get(language)
+        if not steps:
+            return None
+        canonical_names = {}
+
+        def canonicalize(name):
+            canonical = canonical_names.get(name)
+            if canonical is None:
+                canonical = name
+                for pattern, replace in steps:
+                    canonical = pattern.sub(replace, canonical)
+                canonical = canonical.strip()
+                canonical_names[name] = canonical
+            return canonical
+
+        return canonicalize
+
+    def unscoper(self, language):
+        """
+        Return a function removing the scope (e.g. the package) from a
+        canonical name of language, or None if its rules give no scope.
+        """
+        scopes = self.scopes.get(language)
+        if not scopes:
+            return None
+
+        def unscope(canonical):
+            for scope in scopes:
+                canonical = scope.sub("", canonical, count=1)
+            return canonical
+
+        return unscope
+
+
+def load_name_rules(path=None):
+    """
+    Load name rules from path, else from the file named by
+    $LOG_ANALYZER_NAME_RULES, else the default rules.
+    """
+    path = path or os.environ.get(NAME_RULES_ENV) or DEFAULT_NAME_RULES_FILE
+    with open(path, "r", encoding="utf-8") as f:
+        rules = json.load(f)
+    return NameRules(rules.get("rules"), rules.get("languages"))
+
+
+name_rules = load_name_rules()
@@ -0,0 +1,135 @@
+import re
+
+from log_io import LineStreamParser, open_log, read_stream
+
+# Bump when a change alters the parsed results, to invalidate cached results
+PARSER_VERSION = 1
+
+# cargo-nextest status lines, optionally prefixed by the attempt number:
+#         PASS [   0.012s] crate::module::test
+#    TRY 2 PASS [   0.014s] crate::module::test
+#         SLOW [> 60.000s] crate::module::test
+#   FLAKY 2/3 [   0.014s] crate::module::test
+# Newer versions put the binary id before the test path
+# ("my-crate::bin/foo module::test").
+status_line_pattern = re.compile(
+    rb"^\s*(?:TRY (\d+) )?(FLAKY (\d+)/\d+|[A-Z][A-Z-]*)\s+\[\s*>?\s*([0-9.]+)s\]\s+(\S.*?)\s*$"
+)
+
+# Captured output of a failed test, up to the next status line:
+# --- STDOUT:              crate::module::test ---
+output_header_pattern = re.compile(rb"^\s*--- STD(?:OUT|ERR):\s+(.+?)\s*---\s*$")
+
+PASS_STATUSES = {b"PASS", b"LEAK"}
+FAIL_STATUSES = {b"FAIL", b"TIMEOUT", b"ABORT", b"LEAK-FAIL"}
+
+
+def result_status(status):
+    """
+    Map a nextest status word to a result, or None for progress notices
+    (SLOW, RETRY, START, ...).
+    """
+    if status in PASS_STATUSES or status.startswith(b"FLAKY"):
+        return "PASS"
+    if status in FAIL_STATUSES or status.startswith(b"SIG"):
+        return "FAIL"
+    return None
+
+
+def test_path(name):
+    """Drop the binary id newer nextest versions print before the test path."""
+    return name.rsplit(None, 1)[-1].decode("utf-8", errors="replace")
+
+
+class NextestStreamParser(LineStreamParser):
+    """
+    Parser for cargo-nextest output. Results are keyed by test path, as
+    cargo test reports them, and reflect the test's last attempt.
+    If durations is given, each finished test's duration in seconds is
+    recorded into it ({ "test_name": seconds }), and SLOW notices give a
+    lower bound for tests that never finish; if retries is given, the
+    number of retries of each retried test ({ "test_name": count }).
+    If index (see log_io.new_log_index) is given, the byte spans of status
+    lines and captured failure output are recorded into it.
+    """
+
+    name = "nextest"
+
+    def __init__(self, durations=None, retries=None, index=None):
+        super().__init__()
+        self.durations = durations
+        self.retries = retries
+        self.index = index
+        self.output_section = None
+
+    def handle_line(self, line):
+        match = status_line_pattern.match(line)
+        if match is None:
+            if self.index is not None:
+                self._index_output_line(line)
+            return
+        attempt, status_word, flaky_attempt, seconds, name = match.groups()
+        status = result_status(status_word)
+        if self.index is not None:
+            self._end_output_section()
+        if status is None:
+            if status_word == b"SLOW" and self.durations is not None:
+                # Still running: the time so far is a lower bound
+                test_name = test_path(name)
+                self.durations[test_name] = max(self.durations.get(test_name, 0), float(seconds))
+            return
+
+        test_name = test_path(name)
+        self.results[test_name] = status
+        if self.durations is not None:
+            self.durations[test_name] = float(seconds)
+        attempt = flaky_attempt or attempt
+        if self.retries is not None and attempt and int(attempt) > 1:
+            self.retries[test_name] = int(attempt) - 1
+        if self.index is not None:
+            self.index["tests"][test_name] = [self.line_start, self.line_end]
+
+    def _index_output_line(self, line):
+        header = output_header_pattern.match(line)
+        if header:
+            test_name = test_path(header.group(1))
+            section = self.index["failures"].get(test_name)
+            if section is None or self.output_section is not section:
+                self._end_output_section()
+                # STDOUT and STDERR of the same test form one section
+                section = [self.line_start, self.line_end + 1]
+                self.index["failures"][test_name] = section
+            self.output_section = section
+        if self.output_section is not None:
+            self.output_section[1] = self.line_end + 1
+
+    def _end_output_section(self):
+        if self.output_section is not None:
+            self.output_section[1] = min(self.output_section[1], self.line_start)
+            self.output_section = None
+
+    def finish(self):
+        if self.output_section is not None:
+            self.output_section[1] = min(self.output_section[1], self.position)
+            self.output_section = None
+
+
+def parse_nextest_file(filepath, durations=None, retries=None, index=None, results=None, strip_ansi=False):
+    """
+    Parse a cargo-nextest log into results.
+    Compressed logs (.gz, .bz2, .xz) are decompressed while reading.
+    If durations or retries are given, each test's duration in seconds and
+    retry count are recorded into them. If index (see log_io.new_log_index)
+    is given, the byte spans of status lines and failure output are
+    recorded into it.
+    results may be given to record into (e.g. a SelectiveResults).
+    With strip_ansi, ANSI escape sequences are removed before parsing.
+    Returns { "test_name": result }
+    """
+    parser = NextestStreamParser(durations=durations, retries=retries, index=index)
+    parser.strip_ansi = strip_ansi
+    if results is not None:
+        parser.results = results
+    with open_log(filepath) as f:
+        read_stream(parser, f)
+    return parser.close()
@@ -0,0 +1,166 @@
+import re
+
+from log_io import LineStreamParser, open_log, read_stream
+
+# Bump when a change alters the parsed results, to invalidate cached results
+PARSER_VERSION = 1
+
+# Result lines are recognised by their first token:
+#   PASSED tests/x.py::test_y[param]                 (-rA short summary)
+#   FAILED tests/x.py::test_z - AssertionError: ...
+#   tests/x.py::test_y[param] PASSED          [ 12%] (-v)
+#   [gw3] [ 12%] PASSED tests/x.py::test_y           (pytest-xdist -v)
+# A node id may contain spaces inside its parameter brackets.
+NODE_ID = r"(\S*::[^\s\[]*(?:\[.*?\])?)"
+STATUS_WORD = r"(PASSED|FAILED|ERROR|SKIPPED|XFAIL|XPASS)"
+summary_line_pattern = re.compile(STATUS_WORD + r"\s+" + NODE_ID + r"(?:\s+-\s|\s*$)")
+verbose_line_pattern = re.compile(NODE_ID + r"\s+" + STATUS_WORD + r"(?:\s|$)")
+worker_prefix_pattern = re.compile(r"\[gw\d+\]\s+(?:\[\s*\d+%\]\s+)?")
+
+# Errors (in setup or teardown) fail the test like a failed assertion
+STATUS_RESULTS = {
+    "PASSED": "PASS",
+    "FAILED": "FAIL",
+    "ERROR": "FAIL",
+    "SKIPPED": "SKIPPED",
+    "XFAIL": "XFAIL",
+    "XPASS": "XPASS",
+}
+
+STATUS_WORDS = {word.encode("ascii") for word in STATUS_RESULTS}
+# First bytes of the status words; other lines need a "::" to be decoded
+FIRST_BYTES = frozenset(b"PFESX")
+
+# --durations=N report: "0.52s call     tests/x.py::test_y"
+duration_line_pattern = re.compile(r"(\d+(?:\.\d+)?)s\s+(?:setup|call|teardown)\s+" + NODE_ID + r"\s*$")
+DIGITS = frozenset(b"0123456789")
+
+# Failure sections: "_____ TestA.test_b[param] _____" under "= FAILURES =",
+# up to the next header or "=====" line
+failure_header_pattern = re.compile(r"^_{3,} (.+?) _{3,}$")
+
+
+def short_test_name(node_id):
+    """Name pytest uses in failure headers: "TestA.test_b[param]"."""
+    return ".".join(node_id.split("::")[1:])
+
+
+def parse_pytest_line(line):
+    """
+    Extract (node id, status word) from a decoded result line, or None.
+    """
+    if line.startswith("[gw"):
+        prefix = worker_prefix_pattern.match(line)
+        if prefix is None:
+            return None
+        line = line[prefix.end():]
+    match = summary_line_pattern.match(line)
+    if match:
+        return match.group(2), match.group(1)
+    match = verbose_line_pattern.match(line)
+    if match:
+        return match.group(1), match.group(2)
+    return None
+
+
+class PytestStreamParser(LineStreamParser):
+    """
+    Parser for pytest output: -rA short summaries, -v result lines and
+    the interleaved output of pytest-xdist workers. Results are keyed by
+    node id ("tests/x.py::TestA::test_b[param]"); a test reported twice
+    (e.g. PASSED, then ERROR at teardown) keeps the last result.
+    Lines are dispatched on their first byte or on containing "::", so
+    only candidate lines are decoded and matched.
+    If index (see log_io.new_log_index) is given, the byte spans of result
+    lines and of failure sections are recorded into it. If durations is
+    given, the setup, call and teardown times of each test listed by
+    --durations are added up into it ({ "node_id": seconds }).
+    """
+
+    name = "python"
+
+    def __init__(self, index=None, durations=None):
+        super().__init__()
+        self.index = index
+        self.durations = durations
+        # Failure sections by the short name in their header, matched to
+        # node ids once the results are known
+        self.failure_sections = {}
+        self.failure_section = None
+
+    def handle_line(self, line):
+        if self.index is not None:
+            self._index_failure_line(line)
+        first = line[:1]
+        if first and first[0] in DIGITS:
+            if self.durations is not None:
+                self._record_duration(line)
+            return
+        if first == b"[":
+            if not line.startswith(b"[gw"):
+                return
+        elif first and first[0] in FIRST_BYTES:
+            if line.split(None, 1)[0] not in STATUS_WORDS and b"::" not in line:
+                return
+        elif b"::" not in line:
+            return
+
+        result = parse_pytest_line(line.decode("utf-8", errors="replace").rstrip())
+        if result is None:
+            return
+        node_id, status_word = result
+        self.results[node_id] = STATUS_RESULTS[status_word]
+        if self.index is not None:
+            self.index["tests"][node_id] = [self.line_start, self.line_end]
+
+    def _record_duration(self, line):
+        match = duration_line_pattern.match(line.decode("utf-8", errors="replace").rstrip())
+        if match:
+            node_id = match.group(2)
+            self.durations[node_id] = self.durations.get(node_id, 0) + float(match.group(1))
+
+    def _index_failure_line(self, line):
+        if line[:3] == b"___":
+            header = failure_header_pattern.match(line.decode("utf-8", errors="replace").rstrip())
+            if header:
+                self.failure_section = [self.line_start, self.line_end + 1]
+                self.failure_sections[header.group(1)] = self.failure_section
+                return
+        if self.failure_section is None:
+            return
+        if line[:1] == b"=" and line.rstrip().endswith(b"="):
+            self.failure_section[1] = self.line_start
+            self.failure_section = None
+        else:
+            self.failure_section[1] = self.line_end + 1
+
+    def finish(self):
+        if self.failure_section:
+            self.failure_section[1] = min(self.failure_section[1], self.position)
+            self.failure_section = None
+        if self.index is not None:
+            for node_id, status in self.results.items():
+                section = self.failure_sections.get(short_test_name(node_id))
+                if section is not None and status == "FAIL":
+                    self.index["failures"][node_id] = section
+
+
+def parse_pytest_file(filepath, index=None, results=None, strip_ansi=False, durations=None):
+    """
+    Parse a pytest log into results.
+    Compressed logs (.gz, .bz2, .xz) are decompressed while reading.
+    If index (see log_io.new_log_index) is given, the byte spans of result
+    lines and failure sections are recorded into it.
+    results may be given to record into (e.g. a SelectiveResults).
+    With strip_ansi, ANSI escape sequences are removed before parsing.
+    If durations is given, the time of each test listed by --durations is
+    recorded into it in seconds.
+    Returns { "node_id": result }
+    """
+    parser = PytestStreamParser(index=index, durations=durations)
+    parser.strip_ansi = strip_ansi
+    if results is not None:
+        parser.results = results
+    with open_log(filepath) as f:
+        read_stream(parser, f)
+    return parser.close()
@@ -0,0 +1,280 @@
+import hashlib
+import json
+import os
+import tempfile
+import zlib
+
+from log_io import CHUNK_SIZE, is_compressed, new_log_index
+
+CACHE_DIR_ENV = "LOG_ANALYZER_CACHE_DIR"
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "log-analyzer")
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+CACHE_SUFFIX = ".json.z"
+INDEX_KEY_SUFFIX = "-index"
+DURATIONS_KEY_SUFFIX = "-durations"
+GROWTH_KEY_PREFIX = "growth-"
+
+
+def file_digests(filepath, prefix_size=None, chunk_size=CHUNK_SIZE):
+    """
+    Hash a file in one pass. Returns (digest, prefix digest, size): the
+    file_digest() of filepath, the digest its first prefix_size bytes had
+    as a whole file (None if prefix_size is None or the file is shorter)
+    and the number of bytes hashed.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    prefix_digest = None
+    size = 0
+    with open(filepath, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            if prefix_size is not None and size < prefix_size <= size + len(chunk):
+                digest.update(chunk[:prefix_size - size])
+                prefix_digest = digest.copy().hexdigest()
+                digest.update(chunk[prefix_size - size:])
+            else:
+                digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), prefix_digest, size
+
+
+def file_digest(filepath, chunk_size=CHUNK_SIZE):
+    """
+    Return a BLAKE2b digest of the raw file contents (compressed logs are
+    hashed as stored, without decompressing them).
+    """
+    return file_digests(filepath, chunk_size=chunk_size)[0]
+
+
+class ResultCache:
+    """
+    On-disk cache of parsed log results.
+
+    Entries are keyed on the log's content digest plus the parser name,
+    parser version and any options that change the parser's output, and
+    stored as zlib-compressed JSON. Reading an entry marks it as recently
+    used; once the cache grows past max_size the least recently used
+    entries are removed.
+    """
+
+    def __init__(self, directory=None, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory or os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR
+        self.max_size = max_size
+
+    def key(self, filepath, parser_name, parser_version, variant=""):
+        """Build the cache key for parsing filepath with the given parser."""
+        return self.digest_key(file_digest(filepath), parser_name, parser_version, variant)
+
+    def digest_key(self, digest, parser_name, parser_version, variant=""):
+        """Build the cache key for parsing a log with the given file_digest()."""
+        return "{}-{}-v{}{}".format(
+            digest, parser_name, parser_version,
+            "-" + hashlib.blake2b(variant.encode("utf-8"), digest_size=6).hexdigest() if variant else "",
+        )
+
+    def growth_key(self, filepath, parser_name, parser_version, variant=""):
+        """Build the key of the growth record of the log at filepath, see cached_parse."""
+        path = os.path.abspath(filepath).encode("utf-8", errors="surrogateescape")
+        return GROWTH_KEY_PREFIX + self.digest_key(hashlib.blake2b(path, digest_size=20).hexdigest(),
+                                                   parser_name, parser_version, variant)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+    def get(self, key):
+        """Return the cached results for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                results = json.loads(zlib.decompress(f.read()))
+        except (OSError, ValueError, zlib.error):
+            return None
+        try:
+            # Mark as recently used for eviction
+            os.utime(path)
+        except OSError:
+            pass
+        return results
+
+    def put(self, key, results):
+        """Store results under key and evict old entries if over the size cap."""
+        os.makedirs(self.directory, exist_ok=True)
+        payload = zlib.compress(json.dumps(results, separators=(",", ":")).encode("utf-8"))
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+
+    def _entries(self):
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(CACHE_SUFFIX):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits max_size."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        """Remove every cache entry. Returns the number of entries removed."""
+        removed = 0
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+
+def cached_parse(cache, parse_func, filepath, parser_name, parser_version, variant="", new_parser=None):
+    """
+    Return parse_func(filepath), served from cache when the same log was
+    already parsed by the same parser version.
+    With new_parser (a function creating the incremental parser that
+    gives the same results as parse_func), a log that only grew since it
+    was last parsed at the same path is not parsed again from the start:
+    a growth record keeps the size and digest it had, and once the log has
+    grown, a checkpoint of the incremental parser, so that the next time
+    only the appended bytes are read. Compressed logs are always parsed
+    whole.
+    """
+    if cache is None:
+        return parse_func(filepath)
+    if new_parser is None or is_compressed(filepath):
+        key = cache.key(filepath, parser_name, parser_version, variant)
+        results = cache.get(key)
+        if results is None:
+            results = parse_func(filepath)
+            _put(cache, key, results)
+        return results
+
+    growth_key = cache.growth_key(filepath, parser_name, parser_version, variant)
+    growth = cache.get(growth_key)
+    digest, prefix_digest, size = file_digests(filepath, growth["size"] if growth else None)
+    key = cache.digest_key(digest, parser_name, parser_version, variant)
+    results = cache.get(key)
+    if results is not None:
+        return results
+
+    checkpoint = None
+    grown = growth is not None and growth["resumable"] and prefix_digest == growth["digest"]
+    if grown:
+        parser = new_parser()
+        if growth["checkpoint"] is not None:
+            parser.restore(growth["checkpoint"])
+        _feed_file(parser, filepath, size)
+        checkpoint = parser.checkpoint() if parser.resumable else None
+        results = parser.close()
+    else:
+        results = parse_func(filepath)
+    _put(cache, key, results)
+    # Until a log is seen to grow, it is parsed the fastest way and its
+    # record has no checkpoint
+    _put(cache, growth_key, {
+        "size": size,
+        "digest": digest,
+        "resumable": not grown or checkpoint is not None,
+        "checkpoint": checkpoint,
+    })
+    return results
+
+
+def _feed_file(parser, filepath, size, chunk_size=CHUNK_SIZE):
+    """Feed the bytes of filepath from parser.offset up to size into parser."""
+    with open(filepath, "rb") as f:
+        f.seek(parser.offset)
+        remaining = size - parser.offset
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            parser.feed(chunk)
+            remaining -= len(chunk)
+
+
+def _put(cache, key, value):
+    try:
+        cache.put(key, value)
+    except OSError:
+        # An unwritable cache directory should not fail the analysis
+        pass
+
+
+def cached_results(cache, filepath, parser_name, parser_version, variant=""):
+    """
+    Return the results cached for filepath by the given parser, or None if
+    it was not parsed before (nothing is parsed).
+    """
+    if cache is None:
+        return None
+    return cache.get(cache.key(filepath, parser_name, parser_version, variant))
+
+
+def cached_parse_with_index(cache, parse_func, filepath, parser_name, parser_version, variant=""):
+    """
+    Like cached_parse, for a parse_func that also fills a byte-offset index
+    (parse_func(filepath, index=index)). The index is cached next to the
+    results.
+    Returns (results, index)
+    """
+    key = cache.key(filepath, parser_name, parser_version, variant) if cache is not None else None
+    if key is not None:
+        results = cache.get(key)
+        index = cache.get(key + INDEX_KEY_SUFFIX)
+        if results is not None and index is not None:
+            return results, index
+
+    index = new_log_index()
+    results = parse_func(filepath, index=index)
+    if key is not None:
+        _put(cache, key, results)
+        _put(cache, key + INDEX_KEY_SUFFIX, index)
+    return results, index
+
+
+def cached_parse_with_durations(cache, parse_func, filepath, parser_name, parser_version, variant=""):
+    """
+    Like cached_parse, for a parse_func that also records test durations
+    (parse_func(filepath, durations=durations)). The durations are cached
+    next to the results.
+    Returns (results, durations)
+    """
+    key = cache.key(filepath, parser_name, parser_version, variant) if cache is not None else None
+    if key is not None:
+        results = cache.get(key)
+        durations = cache.get(key + DURATIONS_KEY_SUFFIX)
+        if results is not None and durations is not None:
+            return results, durations
+
+    durations = {}
+    results = parse_func(filepath, durations=durations)
+    if key is not None:
+        _put(cache, key, results)
+        _put(cache, key + DURATIONS_KEY_SUFFIX, durations)
+    return results, durations
@@ -0,0 +1,158 @@
+import zlib
+from array import array
+
+# Worker processes get a Bloom filter instead of the exact name set once
+# the set is this large
+BLOOM_MIN_NAMES = 50000
+BLOOM_BITS_PER_NAME = 16
+BLOOM_HASHES = 4
+
+
+def fingerprint(name):
+    """
+    Return a 64-bit fingerprint of a test name that is the same in every
+    process (unlike hash(), which is salted per process).
+    """
+    data = name.encode("utf-8", errors="surrogatepass")
+    return zlib.crc32(data) << 32 | zlib.crc32(data[::-1])
+
+
+class BloomFilter:
+    """
+    Compact, picklable membership test for a large set of test names.
+    May report names that were never added (about 0.25% of them), never
+    misses one that was.
+    """
+
+    def __init__(self, names):
+        self.size = max(len(names) * BLOOM_BITS_PER_NAME, 64)
+        self.bits = bytearray((self.size + 7) // 8)
+        for name in names:
+            for position in self._positions(name):
+                self.bits[position >> 3] |= 1 << (position & 7)
+
+    def _positions(self, name):
+        value = fingerprint(name)
+        first, step = value >> 32, value & 0xFFFFFFFF | 1
+        return [(first + i * step) % self.size for i in range(BLOOM_HASHES)]
+
+    def __contains__(self, name):
+        bits = self.bits
+        for position in self._positions(name):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class SelectiveResults(dict):
+    """
+    Results dict for targeted parsing, filled by a parser like a plain dict.
+
+    Only tests in wanted and failing tests are stored. Every other result
+    is reduced to a fingerprint and an interned status id in flat arrays,
+    so no objects are kept for it, but its status can still be looked up
+    with restore(). fail_count tracks the failing tests stored.
+    """
+
+    def __init__(self, wanted):
+        super().__init__()
+        self.wanted = wanted
+        self.fail_count = 0
+        self.fingerprints = array("Q")
+        self.status_ids = array("I")
+        self.statuses = []
+        self._status_index = {}
+
+    @property
+    def test_count(self):
+        """Number of distinct tests recorded, stored or dropped."""
+        # A test may be dropped several times, or dropped and then stored
+        dropped = set(self.fingerprints)
+        dropped.difference_update(fingerprint(name) for name in self)
+        return len(self) + len(dropped)
+
+    def __setitem__(self, name, status):
+        failing = status.startswith("FAIL")
+        old = self.get(name)
+        was_failing = old is not None and old.startswith("FAIL")
+        if name in self.wanted or failing:
+            self.fail_count += failing - was_failing
+            super().__setitem__(name, status)
+            return
+
+        if old is not None:
+            # A failing test outside wanted passed after all
+            self.fail_count -= was_failing
+            super().__delitem__(name)
+        status_id = self._status_index.get(status)
+        if status_id is None:
+            status_id = self._status_index[status] = len(self.statuses)
+            self.statuses.append(status)
+        self.fingerprints.append(fingerprint(name))
+        self.status_ids.append(status_id)
+
+    def _last_dropped(self, names, fingerprints=None):
+        """
+        Return { name: index of its last dropped result } for the names
+        that have one, in one pass over the dropped results (or over
+        fingerprints, those of another part of the log).
+        """
+        wanted = {}
+        for name in names:
+            wanted.setdefault(fingerprint(name), []).append(name)
+        last = {}
+        for position, value in enumerate(self.fingerprints if fingerprints is None else fingerprints):
+            if value in wanted:
+                last[value] = position
+        return {name: position for value, position in last.items() for name in wanted[value]}
+
+    def restore(self, names):
+        """
+        Store the last dropped status of each of names that is not stored
+        yet, e.g. to show tests that failed in another log.
+        """
+        last = self._last_dropped(name for name in names if name not in self)
+        for name, position in last.items():
+            super().__setitem__(name, self.statuses[self.status_ids[position]])
+
+    def export(self):
+        """Return a picklable copy of the state, for merge()."""
+        return dict(self), self.fingerprints.tobytes(), self.status_ids.tobytes(), self.statuses
+
+    def worker_filter(self):
+        """Return the membership test to give worker processes."""
+        if len(self.wanted) >= BLOOM_MIN_NAMES:
+            return BloomFilter(self.wanted)
+        return self.wanted
+
+    def merge(self, exported):
+        """
+        Add the results of a later part of the log, exported by a
+        SelectiveResults (possibly built with a Bloom filter in a worker).
+        """
+        stored, fingerprints, status_ids, statuses = exported
+        dropped = array("Q")
+        dropped.frombytes(fingerprints)
+
+        # Failing tests outside wanted that the later part saw pass
+        if dropped:
+            passed = self._last_dropped([name for name in self if name not in self.wanted and name not in stored],
+                                        dropped)
+            for name in passed:
+                self.fail_count -= self[name].startswith("FAIL")
+                super().__delitem__(name)
+
+        ids = array("I")
+        ids.frombytes(status_ids)
+        remap = []
+        for status in statuses:
+            status_id = self._status_index.get(status)
+            if status_id is None:
+                status_id = self._status_index[status] = len(self.statuses)
+                self.statuses.append(status)
+            remap.append(status_id)
+        self.fingerprints.extend(dropped)
+        self.status_ids.extend(remap[i] for i in ids)
+
+        for name, status in stored.items():
+            self[name] = status
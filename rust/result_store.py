@@ -0,0 +1,117 @@
+from array import array
+from collections.abc import Mapping
+
+# Status codes. Free-form statuses keep their text in a side table; their
+# code still records whether they start with PASS or FAIL.
+ABSENT = 0
+PASS = 1
+FAIL = 2
+PASS_OTHER = 3
+FAIL_OTHER = 4
+OTHER = 5
+
+STATUS_TEXT = {PASS: "PASS", FAIL: "FAIL"}
+
+
+def status_code(status):
+    """
+    Classify a status string into one of the status codes.
+    """
+    if status == "PASS":
+        return PASS
+    if status == "FAIL":
+        return FAIL
+    if status.startswith("PASS"):
+        return PASS_OTHER
+    if status.startswith("FAIL"):
+        return FAIL_OTHER
+    return OTHER
+
+
+class ResultStore:
+    """
+    Compact storage for the parsed results of several log states.
+
+    Test names are interned once in a table shared by every state. Each
+    state keeps one status code byte per test name in an array('B'), the
+    order its tests were parsed in, and a side table for free-form
+    statuses such as "PASS (running fo)" (themselves interned).
+    """
+
+    def __init__(self):
+        self.names = []
+        self.index = {}
+        self.states = {}
+        self._statuses = {}
+
+    def add_state(self, state, results):
+        """
+        Convert a { "test_name": result } mapping into a state of the store.
+        Returns the read-only StateResults view of the state.
+        """
+        names = self.names
+        index = self.index
+        order = array("I")
+        order_codes = array("B")
+        extra = {}
+
+        for name, status in results.items():
+            idx = index.get(name)
+            if idx is None:
+                idx = len(names)
+                names.append(name)
+                index[name] = idx
+            code = status_code(status)
+            if code not in STATUS_TEXT:
+                extra[idx] = self._statuses.setdefault(status, status)
+            order.append(idx)
+            order_codes.append(code)
+
+        codes = bytearray(len(names))
+        for idx, code in zip(order, order_codes):
+            codes[idx] = code
+
+        view = StateResults(self, array("B", codes), order, extra)
+        self.states[state] = view
+        return view
+
+
+class StateResults(Mapping):
+    """
+    Read-only { "test_name": result } view of one state of a ResultStore.
+    Iterates in the order the state's tests were parsed.
+    """
+
+    def __init__(self, store, codes, order, extra):
+        self.store = store
+        self.codes = codes
+        self.order = order
+        self.extra = extra
+
+    def code_of(self, name):
+        """Return the status code of a test name (ABSENT if not in this state)."""
+        idx = self.store.index.get(name)
+        if idx is None or idx >= len(self.codes):
+            return ABSENT
+        return self.codes[idx]
+
+    def _status(self, idx):
+        code = self.codes[idx]
+        return STATUS_TEXT.get(code) or self.extra[idx]
+
+    def __getitem__(self, name):
+        idx = self.store.index.get(name)
+        if idx is None or idx >= len(self.codes) or not self.codes[idx]:
+            raise KeyError(name)
+        return self._status(idx)
+
+    def __contains__(self, name):
+        return self.code_of(name) != ABSENT
+
+    def __iter__(self):
+        names = self.store.names
+        for idx in self.order:
+            yield names[idx]
+
+    def __len__(self):
+        return len(self.order)
@@ -0,0 +1,146 @@
+from itertools import compress
+
+from result_store import (ABSENT, FAIL, FAIL_OTHER, OTHER, PASS, PASS_OTHER, STATUS_TEXT, ResultStore, StateResults,
+                          status_code)
+
+# Translation tables from status codes to 0/1 flags, for bytes.translate
+FAIL_FLAGS = bytes(code in (FAIL, FAIL_OTHER) for code in range(256))
+PASS_FLAGS = bytes(code == PASS for code in range(256))
+INVERT_FLAGS = bytes.maketrans(b"\x00\x01", b"\x01\x00")
+
+# Codes of each class of statuses: "PASS" and "FAIL" include the
+# free-form statuses starting with them
+STATUS_CLASS_CODES = {
+    "PASS": (PASS, PASS_OTHER),
+    "FAIL": (FAIL, FAIL_OTHER),
+    "ABSENT": (ABSENT,),
+    "OTHER": (OTHER,),
+}
+CLASS_FLAGS = {status_class: bytes(code in codes for code in range(256))
+               for status_class, codes in STATUS_CLASS_CODES.items()}
+
+# Status text of each code, None where the text is kept per row
+CODE_TEXT = [STATUS_TEXT.get(code) for code in range(256)]
+CODE_TEXT[ABSENT] = "ABSENT"
+
+
+def combine_masks(masks, all_set=False):
+    """
+    Combine 0/1 masks of equal length into one: a row is set if it is set
+    in any mask (or in all of them, with all_set). Each mask is turned
+    into one big integer, so the rows are combined in C.
+    """
+    masks = list(masks)
+    size = len(masks[0])
+    combined = int.from_bytes(masks[0], "little")
+    for mask in masks[1:]:
+        if all_set:
+            combined &= int.from_bytes(mask, "little")
+        else:
+            combined |= int.from_bytes(mask, "little")
+    return combined.to_bytes(size, "little")
+
+
+class StatusMatrix:
+    """
+    Status codes (see result_store) of a list of tests across log states:
+    one row per test and one column per state. Each column is a bytes of
+    one code per row, so questions about every row (which fail in any
+    state, which pass in all, how many fail in one) are answered with
+    bytes.translate and integer masks instead of comparing status strings
+    test by test.
+    Free-form statuses keep their text in a { row: status } table per
+    column. orders, if known, lists the rows of each column in the order
+    that state's tests were parsed.
+    """
+
+    def __init__(self, names, columns, texts, orders=None, index=None):
+        self.names = names
+        self.columns = columns
+        self.texts = texts
+        self.orders = orders
+        self.index = index if index is not None else {name: row for row, name in enumerate(names)}
+
+    @classmethod
+    def for_logs(cls, state_results):
+        """
+        Build the matrix of every test in the given states' results, rows
+        in order of first appearance. The codes of StateResults views of
+        one ResultStore are used as they are.
+        """
+        views = list(state_results)
+        stores = {id(view.store) for view in views if isinstance(view, StateResults)}
+        if len(stores) != 1 or not all(isinstance(view, StateResults) for view in views):
+            store = ResultStore()
+            views = [store.add_state(state, results) for state, results in enumerate(views)]
+        store = views[0].store
+        size = len(store.names)
+        # A state's codes only cover the names interned up to it
+        columns = [bytes(view.codes) + bytes(size - len(view.codes)) for view in views]
+        return cls(store.names, columns, [view.extra for view in views], [view.order for view in views], store.index)
+
+    @classmethod
+    def for_tests(cls, names, state_results, state_matches):
+        """
+        Build the matrix of the given test names, resolving each name to
+        its log test in every state once, with the match maps of the
+        states (see name_matcher).
+        """
+        columns = []
+        texts = []
+        for results, matches in zip(state_results, state_matches):
+            codes = bytearray(len(names))
+            extra = {}
+            for row, name in enumerate(names):
+                log_test = matches.first(name)
+                if log_test is None:
+                    continue
+                status = results[log_test]
+                code = status_code(status)
+                codes[row] = code
+                if code not in STATUS_TEXT:
+                    extra[row] = status
+            columns.append(bytes(codes))
+            texts.append(extra)
+        return cls(names, columns, texts)
+
+    def status(self, row, column):
+        """Return the status text of a row in a column ("ABSENT" if none)."""
+        return CODE_TEXT[self.columns[column][row]] or self.texts[column][row]
+
+    def statuses(self, row):
+        """Return the status texts of a row, one per column."""
+        return [CODE_TEXT[codes[row]] or texts[row] for codes, texts in zip(self.columns, self.texts)]
+
+    def failing_mask(self):
+        """0/1 mask of the rows that fail in any column."""
+        return combine_masks(column.translate(FAIL_FLAGS) for column in self.columns)
+
+    def all_pass_mask(self):
+        """0/1 mask of the rows that are "PASS" in every column."""
+        return combine_masks((column.translate(PASS_FLAGS) for column in self.columns), all_set=True)
+
+    def rows(self, mask=None, inverted=False):
+        """Iterate the row numbers set in mask (or not set, with inverted)."""
+        if mask is None:
+            return iter(range(len(self.names)))
+        if inverted:
+            mask = mask.translate(INVERT_FLAGS)
+        return compress(range(len(self.names)), mask)
+
+    def status_mask(self, column, status_class):
+        """0/1 mask of the rows whose status in a column is of a class (see STATUS_CLASS_CODES)."""
+        return self.columns[column].translate(CLASS_FLAGS[status_class])
+
+    def ordered_rows(self, column, mask):
+        """Return the rows set in mask, in the order of one column's state."""
+        order = self.orders[column] if self.orders is not None else range(len(self.names))
+        return list(compress(order, map(mask.__getitem__, order)))
+
+    def failing_rows(self, column):
+        """Return the rows that fail in one column, in that state's order."""
+        return self.ordered_rows(column, self.columns[column].translate(FAIL_FLAGS))
+
+    def fail_count(self, column):
+        """Count the rows that fail in one column."""
+        return self.columns[column].translate(FAIL_FLAGS).count(1)
@@ -0,0 +1,154 @@
+import re
+
+from js_log_parser import join_js_test_name
+from log_io import LineStreamParser, open_log, read_stream
+
+# Bump when a change alters the parsed results, to invalidate cached results
+PARSER_VERSION = 1
+
+# TAP result lines, with an optional directive or comment after " # ":
+# ok 1 - adds numbers # time=1.23ms
+# not ok 2 - adds strings
+# ok 3 - later # SKIP not ready
+# Nested tests are indented, either below "# Subtest: name" lines (node
+# --test, tap) or inside blocks opened by a result line ending in "{"
+# (vitest --reporter=tap):
+# ok 1 - src/file.test.ts # time=4.00ms {
+#     ok 1 - suite # time=2.00ms {
+#         ok 1 - test # time=1.00ms
+#     }
+# }
+result_line_pattern = re.compile(r"^(\s*)(not ok|ok)\b\s*\d*\s*(?:-\s+)?(.*?)\s*$")
+directive_pattern = re.compile(r"\s+#\s*(.*)$")
+subtest_pattern = re.compile(r"^(\s*)# Subtest: (.+?)\s*$")
+block_end_pattern = re.compile(r"^(\s*)\}\s*$")
+time_pattern = re.compile(r"\btime=([0-9.]+)(ms|s)?")
+# YAML diagnostics of node --test: "  duration_ms: 0.52"
+duration_ms_pattern = re.compile(r"^\s*duration_ms:\s*([0-9.]+)")
+
+SKIP_DIRECTIVES = ("skip", "todo")
+
+
+class TapStreamParser(LineStreamParser):
+    """
+    Parser for TAP output. Nested tests are named after the subtests or
+    blocks they are in ("file > suite > test"), like vitest result lines;
+    only leaf tests are recorded, not the results of their parents.
+    If durations is given, each test's time in seconds ("# time=" comments
+    or duration_ms diagnostics) is recorded into it ({ "test_name": seconds }).
+    If index (see log_io.new_log_index) is given, the byte spans of result
+    lines and of the diagnostics below failed tests are recorded into it.
+    """
+
+    name = "tap"
+
+    def __init__(self, durations=None, index=None):
+        super().__init__()
+        self.durations = durations
+        self.index = index
+        # [indentation, name, has_children] of the enclosing subtests
+        self.stack = []
+        self.last_test = None
+        self.failure_section = None
+
+    def handle_line(self, line):
+        line = line.decode("utf-8", errors="ignore").rstrip()
+        match = result_line_pattern.match(line)
+        subtest = None if match else subtest_pattern.match(line)
+        block_end = None if match or subtest else block_end_pattern.match(line)
+        if self.failure_section and (match or subtest or block_end):
+            self.failure_section[1] = self.line_start
+            self.failure_section = None
+
+        if match:
+            self._handle_result(match)
+        elif subtest:
+            indent = len(subtest.group(1))
+            self._close_blocks(indent)
+            self.stack.append([indent, subtest.group(2), False])
+        elif block_end:
+            self._close_blocks(len(block_end.group(1)))
+        else:
+            duration = duration_ms_pattern.match(line)
+            if duration and self.last_test and self.durations is not None:
+                self.durations[self.last_test] = float(duration.group(1)) / 1000
+            if self.failure_section:
+                self.failure_section[1] = self.line_end + 1
+
+    def _close_blocks(self, indent):
+        while self.stack and self.stack[-1][0] >= indent:
+            self.stack.pop()
+
+    def _handle_result(self, match):
+        indent = len(match.group(1))
+        description = match.group(3)
+        opens_block = description.endswith("{")
+        if opens_block:
+            description = description[:-1].rstrip()
+        directive = directive_pattern.search(description)
+        if directive:
+            description = description[:directive.start()]
+            directive = directive.group(1)
+        description = description.replace("\\#", "#")
+
+        # The "# Subtest:" line of this test, if any, tells whether it had children
+        has_children = opens_block
+        if self.stack and self.stack[-1][0] == indent and self.stack[-1][1] == description:
+            has_children = has_children or self.stack[-1][2]
+        self._close_blocks(indent)
+        for entry in self.stack:
+            entry[2] = True
+        if opens_block:
+            self.stack.append([indent, description, True])
+        if has_children:
+            self.last_test = None
+            return
+
+        test_name = join_js_test_name(None, [entry[1] for entry in self.stack] + [description])
+        if directive and directive.lower().startswith(SKIP_DIRECTIVES):
+            status = "SKIPPED"
+        else:
+            status = "PASS" if match.group(2) == "ok" else "FAIL"
+        self.results[test_name] = status
+        self.last_test = test_name
+
+        time = time_pattern.search(directive) if directive else None
+        if time and self.durations is not None:
+            self.durations[test_name] = float(time.group(1)) / (1000 if time.group(2) != "s" else 1)
+        if self.index is not None:
+            self.index["tests"][test_name] = [self.line_start, self.line_end]
+            if status == "FAIL":
+                self.failure_section = [self.line_start, self.line_end + 1]
+                self.index["failures"][test_name] = self.failure_section
+
+    def finish(self):
+        if self.failure_section:
+            self.failure_section[1] = min(self.failure_section[1], self.position)
+            self.failure_section = None
+
+    def get_state(self):
+        return {"stack": self.stack, "last_test": self.last_test}
+
+    def set_state(self, state):
+        self.stack = [list(entry) for entry in state["stack"]]
+        self.last_test = state["last_test"]
+
+
+def parse_tap_file(filepath, durations=None, index=None, results=None, strip_ansi=False):
+    """
+    Parse a TAP log into results.
+    Compressed logs (.gz, .bz2, .xz) are decompressed while reading.
+    If durations is given, each test's time in seconds is recorded into it.
+    If index (see log_io.new_log_index) is given, the byte spans of result
+    lines and failure diagnostics are recorded into it.
+    results may be given to record into (e.g. a SelectiveResults).
+    With strip_ansi, ANSI escape sequences are removed before parsing.
+    Returns { "file > suite > test": result }
+    """
+    parser = TapStreamParser(durations=durations, index=index)
+    parser.strip_ansi = strip_ansi
+    if results is not None:
+        parser.results = results
+    with open_log(filepath) as f:
+        read_stream(parser, f)
+    return parser.close()
@@ -0,0 +1,87 @@
+"""
+The validation checks, early rejection rules and report tables as the
+analyzer first computed them, one loop per check over exactly matched
+(Rust) test names, to compare the rules and the StatusMatrix against.
+"""
+import re
+
+
+def failing(status):
+    return status.startswith("FAIL")
+
+
+def validation_results(f2p_tests, p2p_tests, base_results, before_results, after_results):
+    f2p_set = set(f2p_tests)
+    p2p_set = set(p2p_tests)
+    checks = []
+
+    examples = [name for name, status in base_results.items() if failing(status) and name in p2p_set]
+    checks.append(("At least one failed test in base is present in P2P", examples))
+
+    examples = [name for name, status in after_results.items()
+                if failing(status) and (name in f2p_set or name in p2p_set)]
+    checks.append(("At least one failed test in after is present in F2P / P2P", examples))
+
+    examples = [name for name in f2p_set if name in before_results and before_results[name].startswith("PASS")]
+    checks.append(("At least one F2P test is present and successful in before", examples))
+
+    examples = [name for name in p2p_set if name in before_results and name not in base_results
+                and not before_results[name].startswith("PASS")]
+    checks.append(("At least one P2P, that is missing in base, is not passing in before", examples))
+
+    return [{"status": "PASS" if examples else "FAIL", "description": description, "examples": examples}
+            for description, examples in checks]
+
+
+def rejection_violations(f2p_tests, p2p_tests, base_results, before_results, after_results):
+    violations = []
+    all_configured_tests = f2p_tests + p2p_tests
+    for test_name in all_configured_tests:
+        if re.search(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}", test_name):
+            violations.append(f"Test name contains unstable values (UUID): {test_name}")
+        elif re.search(r"built in \d+\.\d+s", test_name):
+            violations.append(f"Test name contains unstable values (build time): {test_name}")
+        elif re.search(r"\d{4}-\d{2}-\d{2}", test_name):
+            violations.append(f"Test name contains unstable values (date): {test_name}")
+        elif re.search(r"\d{10,}", test_name):
+            violations.append(f"Test name contains unstable values (timestamp): {test_name}")
+
+    counts = {}
+    for test_name in all_configured_tests:
+        counts[test_name] = counts.get(test_name, 0) + 1
+    for test_name, count in counts.items():
+        if count > 1:
+            violations.append(f"Test name is duplicated ({count} times): {test_name}")
+
+    for results, message in ((base_results, "Base log is empty"), (before_results, "Before log is empty"),
+                             (after_results, "After log is empty")):
+        if not results:
+            violations.append(message)
+    if not f2p_tests:
+        violations.append("FAIL_TO_PASS list is empty")
+    if not p2p_tests:
+        violations.append("PASS_TO_PASS list is empty")
+    return violations
+
+
+def table(test_names, state_results, filter_all_pass=False):
+    rows = []
+    skipped_tests = []
+    for test in test_names:
+        statuses = [results.get(test, "ABSENT") for results in state_results]
+        if filter_all_pass and statuses == ["PASS"] * 3:
+            skipped_tests.append(test)
+            continue
+        rows.append([test, *statuses])
+    return [[i + 1] + row for i, row in enumerate(rows)], len(skipped_tests), skipped_tests
+
+
+def failing_tests(f2p_tests, p2p_tests, state_results):
+    names = set().union(*state_results)
+    rows = []
+    for name in names:
+        statuses = [results.get(name, "ABSENT") for results in state_results]
+        if any(failing(status) for status in statuses):
+            rows.append([name, "Yes" if name in f2p_tests else "No", "Yes" if name in p2p_tests else "No",
+                         *statuses])
+    return rows
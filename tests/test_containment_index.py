@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from name_matcher import AhoCorasick, ContainmentIndex
+
+WORDS = ["a", "ab", "b", "src", "index", ".test.ts", " > ", "works", "suite", "sub", "é", "x"]
+
+
+def random_name(rng, words=3):
+    return "".join(rng.choice(WORDS) for _ in range(rng.randrange(1, words + 1)))
+
+
+def random_case(seed):
+    rng = random.Random(seed)
+    names = [random_name(rng) for _ in range(30)]
+    log_tests = [random_name(rng, 8) for _ in range(200)]
+    return names, log_tests
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_contained_matches_linear_search(seed):
+    names, log_tests = random_case(seed)
+    index = ContainmentIndex(names)
+    for log_test in log_tests:
+        assert sorted(index.contained(log_test)) == sorted(set(name for name in names if name in log_test))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_log_matches_match_linear_search(seed):
+    names, log_tests = random_case(seed)
+    matches = ContainmentIndex(names).match_log(log_tests)
+    for name in names:
+        linear = [log_test for log_test in log_tests if name in log_test]
+        assert matches.all(name) == linear
+        assert matches.first(name) == (linear[0] if linear else None)
+
+
+def test_key_and_accept():
+    names = ["rust:a", "javascript:a", "b"]
+    key = lambda name: name.partition(":")[2] or name
+    accept = lambda name, log_test: ":" not in name or name.split(":")[0] == log_test.split(":")[0]
+    matches = ContainmentIndex(names, key=key).match_log(["rust:xa", "javascript:ab", "rust:b"], key, accept)
+    assert matches.all("rust:a") == ["rust:xa"]
+    assert matches.all("javascript:a") == ["javascript:ab"]
+    assert matches.all("b") == ["javascript:ab", "rust:b"]
+
+
+def test_automaton_finds_overlapping_patterns():
+    automaton = AhoCorasick(["he", "she", "his", "hers", ""])
+    assert {automaton.patterns[i] for i in automaton.find("ushers")} == {"he", "she", "hers", ""}
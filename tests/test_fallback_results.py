@@ -0,0 +1,100 @@
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from fallback_results import LinearMatches, ListStatusMatrix, status_class_of
+from name_matcher import ExactMatches
+from status_matrix import StatusMatrix
+
+STATUSES = ["PASS", "FAIL", "PASS (ok)", "FAIL (panicked)", "ignored", "SKIPPED", "UNKNOWN"]
+
+
+def random_states(seed):
+    rng = random.Random(seed)
+    names = [f"m::t{i}" for i in range(40)]
+    states = []
+    for _ in range(3):
+        tests = rng.sample(names, rng.randrange(len(names)))
+        states.append({name: rng.choice(STATUSES) for name in tests})
+    return states
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_list_matrix_matches_status_matrix(seed):
+    states = random_states(seed)
+    expected = StatusMatrix.for_logs(states)
+    matrix = ListStatusMatrix.for_logs(states)
+    assert matrix.names == expected.names
+    rows = range(len(matrix.names))
+    assert [matrix.statuses(row) for row in rows] == [expected.statuses(row) for row in rows]
+    assert bytes(matrix.failing_mask()) == expected.failing_mask()
+    assert bytes(matrix.all_pass_mask()) == expected.all_pass_mask()
+    for column in range(3):
+        assert matrix.failing_rows(column) == expected.failing_rows(column)
+        assert matrix.fail_count(column) == expected.fail_count(column)
+        for status_class in ("PASS", "FAIL", "ABSENT", "OTHER"):
+            mask = matrix.status_mask(column, status_class)
+            assert mask == expected.status_mask(column, status_class)
+            assert matrix.ordered_rows(column, mask) == expected.ordered_rows(column, mask)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_linear_matches_match_exact_matches(seed):
+    states = random_states(seed)
+    config_tests = [f"m::t{i}" for i in range(0, 50, 3)]
+    match = lambda config_test, log_test: config_test == log_test
+    for results in states:
+        expected = ExactMatches(config_tests, results)
+        matches = LinearMatches(config_tests, results, match)
+        for name in config_tests:
+            assert matches.first(name) == expected.first(name)
+            assert matches.all(name) == expected.all(name)
+        for log_test in results:
+            assert sorted(matches.contained(log_test)) == sorted(expected.contained(log_test))
+
+
+def test_status_class_of():
+    assert [status_class_of(status) for status in ["PASS (ok)", "FAIL", "ABSENT", "ignored"]] == [
+        "PASS", "FAIL", "ABSENT", "OTHER"]
+
+
+@pytest.fixture
+def fallback_analyzer(tmp_path):
+    """The analyzer copied away from rust/, so it runs on its fallbacks."""
+    electron = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "electron")
+    copy = tmp_path / "electron"
+    copy.mkdir()
+    for name in ("log_analyzer.py", "fallback_results.py", "validation_rules.py", "validation_rules.json"):
+        shutil.copy(os.path.join(electron, name), copy / name)
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    (logs / "tests.json").write_text(json.dumps({"fail_to_pass": ["m::a"], "pass_to_pass": ["m::b"]}))
+    for state, status in (("base", "FAILED"), ("before", "FAILED"), ("after", "ok")):
+        (logs / f"x_{state}.log").write_text(f"test m::a ... {status}\ntest m::b ... ok\n")
+
+    def run(*args):
+        output = subprocess.run([sys.executable, str(copy / "log_analyzer.py"), str(tmp_path), *args],
+                                capture_output=True, text=True, check=True).stdout
+        return json.loads(output)
+
+    return run
+
+
+def test_fallback_analysis(fallback_analyzer):
+    result = fallback_analyzer("--no-cache")
+    assert result["success"]
+    assert result["failToPassTests"] == [[1, "m::a", "FAIL", "FAIL", "PASS"]]
+
+
+@pytest.mark.parametrize("option, error", [
+    (["--strip-ansi"], "Stripping ANSI escape sequences requires the log parser modules"),
+    (["--slow-ratio", "2"], "Test durations (--slow-ratio) require the log parser modules"),
+    (["--excerpt", "m::a"], "Log indexes and excerpts require the log parser modules"),
+])
+def test_fallback_rejects_options_it_cannot_honor(fallback_analyzer, option, error):
+    assert fallback_analyzer(*option) == {"success": False, "error": error}
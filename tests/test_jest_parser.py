@@ -0,0 +1,52 @@
+import jest_parser
+from log_io import new_log_index
+
+JEST_LOG = """\
+PASS src/math.test.js
+  ● Console
+
+    console.log
+      - adding numbers
+
+      at Object.<anonymous> (src/math.test.js:3:11)
+
+  math
+    ✓ adds numbers (3 ms)
+    ✕ adds strings (12 ms)
+    ○ skipped adds nothing
+
+  ● math › adds strings
+
+    expect(received).toBe(expected)
+
+    - Expected  - 1
+    + Received  + 1
+
+PASS src/other.test.js
+  ✓ works (1 ms)
+
+Tests:       1 failed, 1 skipped, 2 passed, 4 total
+"""
+
+
+def parse(text):
+    parser = jest_parser.JestStreamParser()
+    parser.feed(text.encode("utf-8"))
+    return parser.close()
+
+
+def test_console_block_does_not_hide_the_tree():
+    assert parse(JEST_LOG) == {
+        "math > adds numbers": "PASS",
+        "math > adds strings": "FAIL",
+        "math > adds nothing": "SKIPPED",
+        "works": "PASS",
+    }
+
+
+def test_console_block_is_not_indexed_as_a_failure():
+    index = new_log_index()
+    parser = jest_parser.JestStreamParser(index=index)
+    parser.feed(JEST_LOG.encode("utf-8"))
+    parser.close()
+    assert list(index["failures"]) == ["math > adds strings"]
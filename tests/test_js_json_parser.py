@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+import log_analyzer
+from js_json_parser import JsJsonStreamParser
+
+
+def report(files, **extra):
+    return json.dumps(dict(extra, numTotalTests=len(files), testResults=[
+        {"name": name, "assertionResults": [
+            {"ancestorTitles": ["suite"], "title": "works", "status": "passed", "duration": 5},
+        ]} for name in files
+    ])).encode("utf-8")
+
+
+def parse(data, chunk_size=None, **kwargs):
+    parser = JsJsonStreamParser(**kwargs)
+    chunk_size = chunk_size or len(data)
+    for start in range(0, len(data), chunk_size):
+        parser.feed(data[start:start + chunk_size])
+    return parser.close()
+
+
+@pytest.mark.parametrize("chunk_size", [None, 1, 13])
+def test_names_relative_to_root_dir(chunk_size):
+    data = report(["/repo/src/a.test.ts", "/repo/src/lib/b.test.ts"], rootDir="/repo")
+    assert parse(data, chunk_size) == {
+        "src/a.test.ts > suite > works": "PASS",
+        "src/lib/b.test.ts > suite > works": "PASS",
+    }
+
+
+def test_names_without_root_do_not_depend_on_the_other_files():
+    alone = parse(report(["/repo/src/a.test.ts"]))
+    durations = {}
+    together = parse(report(["/repo/src/a.test.ts", "/repo/test/b.test.ts"]), durations=durations)
+    assert alone == {"/repo/src/a.test.ts > suite > works": "PASS"}
+    assert together == {
+        "/repo/src/a.test.ts > suite > works": "PASS",
+        "/repo/test/b.test.ts > suite > works": "PASS",
+    }
+    assert durations == {"/repo/src/a.test.ts > suite > works": 0.005, "/repo/test/b.test.ts > suite > works": 0.005}
+
+
+def test_root_names_a_file_alike_in_reports_with_different_files():
+    alone = parse(report(["/repo/src/a.test.ts"]), root="/repo")
+    together = parse(report(["/repo/src/a.test.ts", "/repo/test/b.test.ts"]), root="/repo")
+    assert alone == {"src/a.test.ts > suite > works": "PASS"}
+    assert together == {"src/a.test.ts > suite > works": "PASS", "test/b.test.ts > suite > works": "PASS"}
+
+
+def test_given_root_wins():
+    data = report(["/repo/src/a.test.ts"], rootDir="/repo/src")
+    assert parse(data, root="/") == {"repo/src/a.test.ts > suite > works": "PASS"}
+
+
+def test_relative_names_are_kept():
+    assert parse(report(["src/a.test.ts"])) == {"src/a.test.ts > suite > works": "PASS"}
+
+
+def test_entries_are_recorded_as_they_arrive():
+    data = report(["/repo/src/a.test.ts", "/repo/test/b.test.ts"])
+    parser = JsJsonStreamParser(root="/repo")
+    parser.feed(data[:data.index(b"/repo/test")])
+    assert parser.snapshot() == {"src/a.test.ts > suite > works": "PASS"}
+    parser.feed(data[data.index(b"/repo/test"):])
+    assert parser.close() == {"src/a.test.ts > suite > works": "PASS", "test/b.test.ts > suite > works": "PASS"}
+
+
+def test_analyzer_passes_the_root(tmp_path):
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    config = {"fail_to_pass": [], "pass_to_pass": ["src/a.test.ts > suite > works"]}
+    (logs / "tests.json").write_text(json.dumps(config))
+    for state, files in (("base", ["/repo/src/a.test.ts"]), ("before", ["/repo/src/a.test.ts", "/repo/test/b.test.ts"]),
+                         ("after", ["/repo/src/a.test.ts"])):
+        (logs / f"x_{state}.log").write_bytes(report(files))
+    result = log_analyzer.analyze_logs(str(tmp_path), "js-json", root="/repo")
+    assert result["passToPassTests"] == []
+    assert result["summary"]["allPassCount"] == 1
+    assert log_analyzer.get_parser_version("js-json", root="/repo")[2] == "root=/repo"
@@ -0,0 +1,58 @@
+import json
+import os
+
+from js_log_parser import JsLogStreamParser, NoiseRules, noise_rules, parse_js_log_file
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+VITEST_LOG = os.path.join(FIXTURES, "vitest.log")
+
+
+def load_expected(name):
+    """Load the results the original line-by-line parser gave for a fixture."""
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_vitest_log_matches_original_parser():
+    expected = load_expected("vitest.expected.json")
+    assert list(parse_js_log_file(VITEST_LOG).items()) == list(expected.items())
+
+
+def test_stream_split_inside_characters_matches_original_parser():
+    with open(VITEST_LOG, "rb") as f:
+        data = f.read()
+    parser = JsLogStreamParser()
+    for start in range(0, len(data), 3):
+        parser.feed(data[start:start + 3])
+    assert parser.close() == load_expected("vitest.expected.json")
+
+
+def test_other_status_symbols(tmp_path):
+    path = tmp_path / "symbols.log"
+    path.write_text("✔ a > passes\n✘ a > fails\n↓ a > skipped\n×  a >   spaced  \n", encoding="utf-8")
+    assert parse_js_log_file(str(path)) == {
+        "a > passes": "PASS",
+        "a > fails": "FAIL",
+        "a > skipped": "SKIPPED",
+        "a > spaced": "FAIL",
+    }
+
+
+def test_noise_rules_can_be_replaced():
+    rules = NoiseRules(substrings=["calls onClick"], patterns=[r"format\.test\.ts > formatDate"])
+    results = parse_js_log_file(VITEST_LOG, noise=rules)
+    expected = load_expected("vitest.expected.json")
+    assert results == {name: status for name, status in expected.items()
+                       if "calls onClick" not in name and "formatDate" not in name}
+    assert rules.digest != noise_rules.digest
+
+
+def test_vitest_durations():
+    durations = {}
+    parse_js_log_file(VITEST_LOG, durations=durations)
+    # The names keep the duration, as the original parser gave them
+    assert durations == {
+        "web src/components/Button.test.tsx > Button > renders the label 12ms": 0.012,
+        "web src/components/Modal.test.tsx > Modal > closes on escape 31ms": 0.031,
+        "src/utils/format.test.ts > formatBytes > rounds to one decimal 3ms": 0.003,
+    }
@@ -0,0 +1,36 @@
+import os
+
+from libtest_json_parser import parse_libtest_json_file
+from log_io import new_log_index, read_test_excerpt
+
+LIBTEST_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "libtest.json.log")
+
+
+def test_results_and_durations():
+    durations = {}
+    results = parse_libtest_json_file(LIBTEST_LOG, durations=durations)
+    # Statuses as the text parser reports "... ok", "... FAILED" and "... ignored"
+    assert results == {
+        "lexer::tests::empty_input": "PASS",
+        "lexer::tests::unicode_identifiers": "FAIL",
+        "parser::tests::huge_input": "ignored",
+        'render::tests::"quoted" name': "PASS",
+        "util::tests::slow_hash": "PASS",
+        "util::tests::reordered": "FAIL",
+    }
+    assert durations == {
+        "lexer::tests::empty_input": 0.000412,
+        "lexer::tests::unicode_identifiers": 0.002093,
+        'render::tests::"quoted" name': 0.01,
+        "util::tests::slow_hash": 61.5,
+        "util::tests::reordered": 1.25,
+    }
+
+
+def test_failed_event_is_the_failure_excerpt():
+    index = new_log_index()
+    parse_libtest_json_file(LIBTEST_LOG, index=index)
+    excerpt = read_test_excerpt(LIBTEST_LOG, index, "lexer::tests::unicode_identifiers")
+    assert excerpt["statusLine"] == excerpt["failureOutput"]
+    assert '"event": "failed"' in excerpt["statusLine"] and "panicked at src/lexer.rs:212:9" in excerpt["statusLine"]
+    assert read_test_excerpt(LIBTEST_LOG, index, "lexer::tests::empty_input")["failureOutput"] is None
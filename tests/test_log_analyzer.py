@@ -0,0 +1,57 @@
+import log_analyzer
+
+RUST_LOG = b"running 1 test\ntest m::a ... ok\n\ntest result: ok. 1 passed\n"
+
+
+def test_compressed_logs_are_found(tmp_path):
+    for name in ("x_base.log.gz", "x_base.log", "x_before.log.xz", "x_after.log.bz2"):
+        (tmp_path / name).write_bytes(b"")
+    # A plain log takes precedence over a compressed copy
+    assert log_analyzer.find_log_files(str(tmp_path)) == tuple(
+        str(tmp_path / name) for name in ("x_base.log", "x_before.log.xz", "x_after.log.bz2"))
+
+
+def test_auto_detects_the_format(tmp_path):
+    path = tmp_path / "x_base.log"
+    path.write_bytes(RUST_LOG)
+    language, detection = log_analyzer.resolve_language("auto", [str(path)])
+    assert language == "rust"
+    assert detection["format"] == "rust"
+
+
+def test_auto_falls_back_to_rust_without_detection(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_analyzer, "detect_log_format", None)
+    assert log_analyzer.resolve_language("auto", [str(tmp_path / "missing.log")]) == ("rust", None)
+
+
+def test_explicit_language_is_kept():
+    assert log_analyzer.resolve_language("javascript", []) == ("javascript", None)
+
+
+def test_rust_is_the_default_language(tmp_path):
+    # A Rust log whose head looks like another format is still parsed as Rust
+    path = tmp_path / "x_base.log"
+    path.write_bytes("PASS src/a.test.ts\n  \u2713 works (3 ms)\n  \u2713 runs (1 ms)\n".encode("utf-8") + RUST_LOG)
+    args = log_analyzer.parse_args([str(tmp_path)])
+    assert args.language == "rust"
+    assert log_analyzer.resolve_language(args.language, [str(path)]) == ("rust", None)
+    assert log_analyzer.resolve_language("auto", [str(path)])[1]["format"] == "jest"
+
+
+def test_slow_tests_at_the_ratio_are_reported():
+    results = [{"a": "PASS", "b": "PASS", "c": "PASS", "d": "PASS"}] * 3
+    durations = [
+        {"a": 1.0, "b": 1.0, "c": 0.01, "d": 1.0},
+        {"a": 1.0, "b": 1.0, "c": 0.01},
+        {"a": 3.0, "b": 2.9, "c": 0.09, "d": 5.0},
+    ]
+    rows = log_analyzer.find_slow_tests(["a", "b", "c", "d", "a"], results, durations, 3)
+    # b is under the ratio, and c grew ninefold but stays under SLOW_TEST_MIN_SECONDS
+    assert rows == [["d", 1.0, None, 5.0, 5.0], ["a", 1.0, 1.0, 3.0, 3.0]]
+
+
+def test_slow_tests_are_found_by_containment():
+    results = [{"src/a.test.ts > a > works 12ms": "PASS"}, {"src/a.test.ts > a > works 1.20s": "PASS"}]
+    durations = [{"src/a.test.ts > a > works 12ms": 0.012}, {"src/a.test.ts > a > works 1.20s": 1.2}]
+    assert log_analyzer.find_slow_tests(["a > works"], results, durations, 2, "javascript") == [
+        ["a > works", 0.012, 1.2, 100.0]]
@@ -0,0 +1,188 @@
+import bz2
+import gzip
+import json
+import lzma
+import os
+
+import pytest
+
+from js_json_parser import JsJsonStreamParser
+from js_log_parser import JsLogStreamParser, parse_js_log_file
+from junit_parser import JunitStreamParser
+from log_io import open_log, strip_ansi
+from log_parser import RustLogStreamParser, parse_log_file
+from log_sections import SectionedStreamParser
+from pytest_parser import PytestStreamParser
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+COMPRESSORS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+
+
+def load_expected(name):
+    """Load the results the original line-by-line parser gave for a fixture."""
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compress(name, suffix, directory):
+    path = directory / (name + suffix)
+    with open(os.path.join(FIXTURES, name), "rb") as f, COMPRESSORS[suffix](path, "wb") as out:
+        out.write(f.read())
+    return str(path)
+
+
+@pytest.mark.parametrize("suffix", list(COMPRESSORS))
+def test_compressed_logs_match_original_parsers(suffix, tmp_path):
+    rust_log = compress("cargo_test.log", suffix, tmp_path)
+    js_log = compress("vitest.log", suffix, tmp_path)
+    assert list(parse_log_file(rust_log).items()) == list(load_expected("cargo_test.expected.json").items())
+    assert list(parse_js_log_file(js_log).items()) == list(load_expected("vitest.expected.json").items())
+    with open_log(rust_log) as f, open(os.path.join(FIXTURES, "cargo_test.log"), "rb") as plain:
+        assert f.read() == plain.read()
+
+
+# Statuses and their colored form, as cargo test and vitest print them on a terminal
+COLORS = [
+    (b" ok\n", b" \x1b[32mok\x1b[0m\n"),
+    (b" FAILED\n", b" \x1b[31mFAILED\x1b[0m\n"),
+    (b"running ", b"\x1b[1mrunning\x1b[0m "),
+    ("\u2713 ".encode(), "\x1b[32m\u2713\x1b[39m ".encode()),
+    ("\u00d7 ".encode(), "\x1b[31m\u00d7\x1b[39m ".encode()),
+]
+
+
+def colorize(name, directory):
+    """Write a copy of a fixture with its statuses colored the way cargo and vitest color them."""
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        data = f.read()
+    for plain, colored in COLORS:
+        data = data.replace(plain, colored)
+    path = directory / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_strip_ansi():
+    assert strip_ansi(b"\x1b[1;31mFAILED\x1b[0m \x1b[2Kdone\n") == b"FAILED done\n"
+    data = b"no escapes"
+    assert strip_ansi(data) is data
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_colored_logs_match_original_parsers(workers, tmp_path):
+    rust_log = colorize("cargo_test.log", tmp_path)
+    js_log = colorize("vitest.log", tmp_path)
+    with open(rust_log, "rb") as f:
+        assert b"\x1b[32mok\x1b[0m" in f.read()
+    assert parse_log_file(rust_log, workers=workers, strip_ansi=True) == load_expected("cargo_test.expected.json")
+    assert parse_js_log_file(js_log, strip_ansi=True) == load_expected("vitest.expected.json")
+    # Without stripping, the colored statuses are not recognized
+    assert parse_js_log_file(js_log) != load_expected("vitest.expected.json")
+
+
+@pytest.mark.parametrize("parser_class, name", [
+    (RustLogStreamParser, "cargo_test"),
+    (JsLogStreamParser, "vitest"),
+])
+def test_escape_split_across_feeds_is_stripped(parser_class, name, tmp_path):
+    with open(colorize(name + ".log", tmp_path), "rb") as f:
+        data = f.read()
+    parser = parser_class()
+    parser.strip_ansi = True
+    for start in range(0, len(data), 2):
+        parser.feed(data[start:start + 2])
+    assert parser.close() == load_expected(name + ".expected.json")
+
+
+RUST_LOG = (
+    b"running 3 tests\n"
+    b"test m::a ... ok\n"
+    b"test m::b ... FAILED\n"
+    b"test m::c ... \n"
+    b"  ok then\n"
+    b"\n"
+    b"failures:\n"
+    b"    m::b\n"
+    b"\n"
+    b"test result: FAILED. 2 passed; 1 failed\n"
+)
+
+
+def parse_whole(data):
+    parser = RustLogStreamParser()
+    parser.feed(data)
+    return parser.close()
+
+
+@pytest.mark.parametrize("split", range(0, len(RUST_LOG), 7))
+def test_resume_from_checkpoint(split):
+    parser = RustLogStreamParser()
+    parser.feed(RUST_LOG[:split])
+    checkpoint = json.loads(json.dumps(parser.checkpoint()))
+
+    resumed = RustLogStreamParser.from_checkpoint(checkpoint)
+    resumed.feed(RUST_LOG[checkpoint["offset"]:])
+    assert resumed.close() == parse_whole(RUST_LOG)
+
+
+def test_checkpoint_of_other_parser_is_rejected():
+    parser = RustLogStreamParser()
+    parser.feed(RUST_LOG)
+    with pytest.raises(ValueError):
+        JsLogStreamParser.from_checkpoint(parser.checkpoint())
+
+
+@pytest.mark.parametrize("parser_class", [JsJsonStreamParser, JunitStreamParser])
+def test_report_parsers_are_not_resumable(parser_class):
+    parser = parser_class()
+    assert not parser.resumable
+    with pytest.raises(ValueError):
+        parser.checkpoint()
+
+
+MIXED_LOG = (
+    b">>>>> Start Test Output\n"
+    b"running 2 tests\n"
+    b"test m::a ... ok\n"
+    b"test m::b ... FAILED\n"
+    b"\n"
+    b"failures:\n"
+    b"    m::b\n"
+    b"\n"
+    b"test result: FAILED. 1 passed; 1 failed\n"
+    b"============================= test session starts ==============================\n"
+    b"tests/test_x.py::test_one PASSED\n"
+    b"tests/test_x.py::test_two FAILED\n"
+    b"=========================== short test summary info ============================\n"
+    b"FAILED tests/test_x.py::test_two - assert 0\n"
+)
+
+
+def new_mixed_parser():
+    return SectionedStreamParser({"rust": RustLogStreamParser, "python": PytestStreamParser})
+
+
+@pytest.mark.parametrize("split", range(0, len(MIXED_LOG), 11))
+def test_resume_mixed_log_from_checkpoint(split):
+    whole = new_mixed_parser()
+    whole.feed(MIXED_LOG)
+    expected = whole.close()
+
+    parser = new_mixed_parser()
+    parser.feed(MIXED_LOG[:split])
+    checkpoint = json.loads(json.dumps(parser.checkpoint()))
+
+    resumed = new_mixed_parser()
+    resumed.restore(checkpoint)
+    resumed.feed(MIXED_LOG[checkpoint["offset"]:])
+    assert resumed.close() == expected
+
+
+def test_mixed_log_with_report_section_is_not_resumable():
+    parser = SectionedStreamParser({"rust": RustLogStreamParser, "js-json": JsJsonStreamParser})
+    parser.feed(MIXED_LOG[:MIXED_LOG.index(b"test m::b")])
+    assert parser.resumable
+    parser.feed(b'>>>>> Start Test Output\n{"numTotalTests": 1, "testResults": [\n')
+    assert not parser.resumable
+    with pytest.raises(ValueError):
+        parser.checkpoint()
@@ -0,0 +1,77 @@
+import gzip
+import json
+import os
+
+import pytest
+
+import log_sections
+from js_log_parser import JsLogStreamParser
+from log_io import new_log_index, read_stream
+from log_parser import RustLogStreamParser
+from log_sections import SectionedStreamParser, find_log_sections, parse_sectioned_log_file
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+PARSERS = {"rust": RustLogStreamParser, "javascript": JsLogStreamParser}
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+def load_expected(name):
+    """Load the results the original line-by-line parser gave for a fixture."""
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# One CI job running cargo test, then vitest
+MIXED_LOG = load_fixture("cargo_test.log") + b"\n" + load_fixture("vitest.log")
+EXPECTED = {
+    **{"rust:" + name: status for name, status in load_expected("cargo_test.expected.json").items()},
+    **{"javascript:" + name: status for name, status in load_expected("vitest.expected.json").items()},
+}
+
+
+@pytest.fixture
+def mixed_log(tmp_path):
+    path = tmp_path / "x_after.log"
+    path.write_bytes(MIXED_LOG)
+    return str(path)
+
+
+def test_sections_of_fixtures():
+    sections = find_log_sections(MIXED_LOG, PARSERS)
+    assert [language for language, _, _ in sections] == ["rust", "javascript"]
+    # The build output before the first "Running" marker holds no tests
+    assert MIXED_LOG[sections[0][1]:].startswith(b"     Running unittests src/lib.rs")
+    assert MIXED_LOG[sections[1][1]:].startswith(b" RUN  v1.6.0")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_mixed_log_matches_original_parsers(workers, mixed_log, monkeypatch):
+    monkeypatch.setattr(log_sections, "POOL_MIN_SIZE", 0)
+    results = parse_sectioned_log_file(mixed_log, PARSERS, workers=workers)
+    assert list(results.items()) == list(EXPECTED.items())
+
+
+def test_stream_matches_mapped_parse(mixed_log, tmp_path):
+    index = new_log_index()
+    durations = {}
+    mapped = parse_sectioned_log_file(mixed_log, PARSERS, index=index, durations=durations)
+
+    for chunk_size in (7, 4096):
+        parser = SectionedStreamParser(PARSERS, index=new_log_index(), durations={})
+        with open(mixed_log, "rb") as f:
+            read_stream(parser, f, chunk_size=chunk_size)
+        assert parser.close() == mapped
+        assert parser.index == index
+        assert parser.durations == durations
+
+    compressed = tmp_path / "x_after.log.gz"
+    with gzip.open(compressed, "wb") as f:
+        f.write(MIXED_LOG)
+    assert parse_sectioned_log_file(str(compressed), PARSERS) == mapped
+    # Spans point into the whole log
+    start, end = index["tests"]["javascript:src/utils/format.test.ts > formatDate > handles invalid dates"][:2]
+    assert MIXED_LOG[start:end] == "× src/utils/format.test.ts > formatDate > handles invalid dates".encode()
@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+import log_analyzer
+from name_matcher import CanonicalIndex
+from name_rules import name_rules
+
+
+def match_logs(config_tests, state_results, language="javascript"):
+    index = CanonicalIndex(config_tests, name_rules.canonicalizer(language),
+                           unscope=name_rules.unscoper(language))
+    return index.match_logs(state_results)
+
+
+PACKAGES = {
+    "pkg-a src/index.test.ts > works": "PASS",
+    "pkg-b src/index.test.ts > works": "FAIL",
+}
+
+
+def test_name_with_package_only_matches_that_package():
+    matches, = match_logs(["pkg-a src/index.test.ts > works", "|pkg-b| src/index.test.ts > works"], [PACKAGES])
+    assert matches.all("pkg-a src/index.test.ts > works") == ["pkg-a src/index.test.ts > works"]
+    assert matches.first("|pkg-b| src/index.test.ts > works") == "pkg-b src/index.test.ts > works"
+    assert matches.all("|pkg-b| src/index.test.ts > works") == ["pkg-b src/index.test.ts > works"]
+    assert matches.contained("pkg-a src/index.test.ts > works") == ("pkg-a src/index.test.ts > works",)
+
+
+def test_name_without_package_matches_every_package():
+    matches, = match_logs(["src/index.test.ts > works"], [PACKAGES])
+    assert matches.all("src/index.test.ts > works") == list(PACKAGES)
+    assert matches.resolution("src/index.test.ts > works") == "containment"
+
+
+def test_name_in_another_form_matches_in_canonical_form():
+    matches, = match_logs(["|pkg-a| src\\index.test.ts  >  works"], [PACKAGES])
+    assert matches.all("|pkg-a| src\\index.test.ts  >  works") == ["pkg-a src/index.test.ts > works"]
+    assert matches.resolution("|pkg-a| src\\index.test.ts  >  works") == "canonical"
+
+
+def test_containment_matches_are_kept():
+    log = {
+        "web src/b.test.ts > t1": "PASS",
+        "t1 12ms": "FAIL",
+    }
+    matches, = match_logs(["t1"], [log])
+    assert matches.all("t1") == list(log)
+    # The first log test containing the name, as a linear search finds it
+    assert matches.first("t1") == "web src/b.test.ts > t1"
+    assert log_analyzer.get_status("t1", log, "javascript", matches) == "PASS"
+    assert matches.contained("t1 12ms") == ("t1",)
+
+
+def test_only_reporter_durations_are_removed():
+    canonicalize = name_rules.canonicalizer("javascript")
+    assert canonicalize("s > t 634ms") == canonicalize("s > t 1.52s") == "s > t"
+    assert canonicalize("s > waits 5s") == "s > waits 5s"
+    assert canonicalize("s > waits 5s") != canonicalize("s > waits 6s")
+
+
+NAMES = ["t1", "t12", "s > t1", "src/a.test.ts > s > t1", "web src/b.test.ts > t1", "web src/b.test.ts > t12",
+         "t1 12ms", "s > t1 3ms", "|web| src/b.test.ts > t1", "src\\a.test.ts > s > t1", "waits 5s"]
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_verdicts_found_by_containment_are_kept(seed):
+    rng = random.Random(seed)
+    statuses = ["PASS", "FAIL", "SKIPPED"]
+    state_results = [{name: rng.choice(statuses) for name in rng.sample(NAMES, rng.randrange(len(NAMES)))}
+                     for _ in range(3)]
+    config = rng.sample(NAMES, 5)
+    for results, matches in zip(state_results, match_logs(config, state_results)):
+        for name in config:
+            contained = [log_test for log_test in results if name in log_test]
+            assert set(contained) <= set(matches.all(name))
+            if contained:
+                assert matches.first(name) == contained[0]
+
+
+def test_checks_do_not_mix_packages():
+    config = ["pkg-a src/index.test.ts > works"]
+    result = log_analyzer.build_report(config, [], PACKAGES, PACKAGES, PACKAGES, "javascript")
+    # The configured test passes in every log, only the other package fails
+    assert [check["status"] for check in result["validationResults"][:2]] == ["FAIL", "FAIL"]
+    assert result["nameResolution"]["after"]["exact"] == 1
@@ -0,0 +1,46 @@
+import os
+
+from log_io import new_log_index, read_test_excerpt
+from nextest_parser import NextestStreamParser, parse_nextest_file
+
+NEXTEST_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "nextest.log")
+
+
+def test_results_take_the_last_attempt():
+    durations = {}
+    retries = {}
+    results = parse_nextest_file(NEXTEST_LOG, durations=durations, retries=retries)
+    # Keyed by test path as cargo test names them, without the binary id
+    assert results == {
+        "lexer::tests::empty_input": "PASS",
+        "lexer::tests::keywords": "PASS",
+        "lexer::tests::unicode_identifiers": "FAIL",
+        "render::tests::tabs": "PASS",
+        "cli_help": "PASS",
+        "cli_large_file": "FAIL",
+        "cli_reads_stdin": "PASS",
+        "cli_crash": "FAIL",
+    }
+    assert retries == {"render::tests::tabs": 1, "cli_large_file": 2}
+    assert durations["render::tests::tabs"] == 0.011
+    assert durations["cli_large_file"] == 90.004
+
+
+def test_slow_notice_is_a_lower_bound():
+    parser = NextestStreamParser(durations={})
+    with open(NEXTEST_LOG, "rb") as f:
+        data = f.read()
+    parser.feed(data[:data.index(b"   TRY 1 TIMEOUT")])
+    assert "cli_large_file" not in parser.snapshot()
+    assert parser.durations["cli_large_file"] == 60.0
+
+
+def test_stdout_and_stderr_form_the_failure_excerpt():
+    index = new_log_index()
+    parse_nextest_file(NEXTEST_LOG, index=index)
+    excerpt = read_test_excerpt(NEXTEST_LOG, index, "lexer::tests::unicode_identifiers")
+    assert excerpt["statusLine"] == "        FAIL [   0.012s] textkit lexer::tests::unicode_identifiers"
+    output = excerpt["failureOutput"]
+    assert output.startswith("--- STDOUT:              textkit lexer::tests::unicode_identifiers ---\n")
+    assert "--- STDERR:" in output and output.rstrip().endswith("assertion `left == right` failed")
+    assert "TRY 1 FAIL" not in output
@@ -0,0 +1,26 @@
+import pytest_parser
+
+PYTEST_LOG = b"""\
+============================= test session starts ==============================
+tests/test_x.py::test_one PASSED                                         [ 25%]
+[gw1] [ 50%] FAILED tests/test_x.py::test_two
+PASSED tests/test_x.py::test_three[a b]
+Some unrelated line
+FAILED tests/test_x.py::test_four - AssertionError: assert 0
+ERROR tests/test_x.py::test_five
+SKIPPED no node id here
+XFAIL tests/test_x.py::test_six
+"""
+
+
+def test_result_lines():
+    parser = pytest_parser.PytestStreamParser()
+    parser.feed(PYTEST_LOG)
+    assert parser.close() == {
+        "tests/test_x.py::test_one": "PASS",
+        "tests/test_x.py::test_two": "FAIL",
+        "tests/test_x.py::test_three[a b]": "PASS",
+        "tests/test_x.py::test_four": "FAIL",
+        "tests/test_x.py::test_five": "FAIL",
+        "tests/test_x.py::test_six": "XFAIL",
+    }
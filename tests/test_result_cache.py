@@ -0,0 +1,102 @@
+import gzip
+
+import pytest
+
+from log_parser import RustLogStreamParser, parse_log_file
+from result_cache import ResultCache, cached_parse, file_digest, file_digests
+
+HEAD = b"running 3 tests\ntest m::a ... ok\ntest m::b ... \n"
+MIDDLE = b"  ok then\ntest m::c ... FAILED\n"
+TAIL = b"\nfailures:\n    m::c\n\ntest result: FAILED. 2 passed; 1 failed\n"
+
+
+class CountingParser(RustLogStreamParser):
+    """Rust parser that counts the bytes fed to it."""
+
+    def __init__(self):
+        super().__init__()
+        self.fed = 0
+
+    def feed(self, data):
+        self.fed += len(data)
+        super().feed(data)
+
+
+class Calls:
+    """Parse functions that count their calls and where parsers resumed."""
+
+    def __init__(self):
+        self.parses = 0
+        self.parsers = []
+
+    def parse(self, filepath):
+        self.parses += 1
+        return parse_log_file(filepath)
+
+    def new_parser(self):
+        parser = CountingParser()
+        self.parsers.append(parser)
+        return parser
+
+
+def cached(cache, path, calls):
+    return cached_parse(cache, calls.parse, str(path), "rust", 1, new_parser=calls.new_parser)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(str(tmp_path / "cache"))
+
+
+def test_file_digests(tmp_path):
+    path = tmp_path / "x.log"
+    path.write_bytes(HEAD + MIDDLE)
+    digest, prefix_digest, size = file_digests(str(path), len(HEAD), chunk_size=7)
+    assert digest == file_digest(str(path))
+    assert size == len(HEAD + MIDDLE)
+    (tmp_path / "head.log").write_bytes(HEAD)
+    assert prefix_digest == file_digest(str(tmp_path / "head.log"))
+    assert file_digests(str(path), size + 1)[1] is None
+
+
+def test_grown_log_is_resumed(tmp_path, cache):
+    path = tmp_path / "x.log"
+    calls = Calls()
+    path.write_bytes(HEAD)
+    assert cached(cache, path, calls) == parse_log_file(str(path))
+    assert calls.parses == 1
+
+    # The first growth is read whole by the incremental parser, for a checkpoint
+    path.write_bytes(HEAD + MIDDLE)
+    assert cached(cache, path, calls) == parse_log_file(str(path))
+    assert calls.parses == 1 and len(calls.parsers) == 1
+
+    # Later growths resume from it
+    path.write_bytes(HEAD + MIDDLE + TAIL)
+    assert cached(cache, path, calls) == parse_log_file(str(path))
+    assert calls.parses == 1 and len(calls.parsers) == 2
+    assert calls.parsers[1].fed == len(TAIL)
+
+    # An unchanged log is served from the cache
+    assert cached(cache, path, calls) == parse_log_file(str(path))
+    assert calls.parses == 1 and len(calls.parsers) == 2
+
+
+def test_rewritten_log_is_parsed_again(tmp_path, cache):
+    path = tmp_path / "x.log"
+    calls = Calls()
+    path.write_bytes(HEAD + MIDDLE)
+    cached(cache, path, calls)
+    path.write_bytes(HEAD.replace(b"ok", b"FAILED") + MIDDLE + TAIL)
+    assert cached(cache, path, calls) == parse_log_file(str(path))
+    assert calls.parses == 2 and not calls.parsers
+
+
+def test_compressed_log_is_parsed_whole(tmp_path, cache):
+    path = tmp_path / "x.log.gz"
+    calls = Calls()
+    for data in (HEAD, HEAD + MIDDLE):
+        with gzip.open(path, "wb") as f:
+            f.write(data)
+        assert cached(cache, path, calls) == parse_log_file(str(path))
+    assert calls.parses == 2 and not calls.parsers
@@ -0,0 +1,57 @@
+from result_filter import SelectiveResults
+
+
+def test_test_count_counts_each_test_once():
+    results = SelectiveResults({"wanted"})
+    results["wanted"] = "PASS"
+    results["passes twice"] = "PASS"
+    results["passes twice"] = "PASS"
+    results["passes then fails"] = "PASS"
+    results["passes then fails"] = "FAIL"
+    results["fails then passes"] = "FAIL"
+    results["fails then passes"] = "PASS"
+    assert results.test_count == 4
+    assert results.fail_count == 1
+    assert dict(results) == {"wanted": "PASS", "passes then fails": "FAIL"}
+
+
+def test_restore_gives_the_last_dropped_status():
+    results = SelectiveResults(set())
+    results["a"] = "FAIL"
+    results["a"] = "PASS"
+    results["b"] = "ignored"
+    results.restore(["a", "b", "c"])
+    assert dict(results) == {"a": "PASS", "b": "ignored"}
+
+
+def test_merge_matches_one_pass():
+    whole = SelectiveResults({"wanted"})
+    first = SelectiveResults({"wanted"})
+    second = SelectiveResults({"wanted"})
+    for results, items in ((first, [("a", "FAIL"), ("b", "PASS"), ("wanted", "PASS")]),
+                           (second, [("a", "PASS"), ("b", "FAIL"), ("c", "PASS")])):
+        for name, status in items:
+            results[name] = status
+            whole[name] = status
+    first.merge(second.export())
+    assert dict(first) == dict(whole)
+    assert first.fail_count == whole.fail_count
+    assert first.test_count == whole.test_count == 4
+
+
+def test_restore_and_merge_with_many_dropped_tests():
+    whole = SelectiveResults(set())
+    first = SelectiveResults(set())
+    second = SelectiveResults(set())
+    for i in range(2000):
+        status = "FAIL" if i % 7 == 0 else "PASS"
+        for results in (whole, first if i < 1000 else second):
+            results[f"t{i % 1500}"] = status
+    first.merge(second.export())
+    assert dict(first) == dict(whole)
+    assert first.fail_count == whole.fail_count
+    names = [f"t{i}" for i in range(0, 1600, 3)]
+    first.restore(names)
+    whole.restore(names)
+    assert dict(first) == dict(whole)
+    assert whole["t0"] == "PASS" and whole["t5"] == "FAIL" and "t1501" not in whole
@@ -0,0 +1,56 @@
+import json
+import os
+
+import log_analyzer
+from log_parser import parse_log_file
+from result_store import ABSENT, FAIL, OTHER, PASS, PASS_OTHER, ResultStore
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+CARGO_LOG = os.path.join(FIXTURES, "cargo_test.log")
+
+
+def state_logs(directory):
+    """Write base / before / after logs derived from the cargo fixture."""
+    with open(CARGO_LOG, "rb") as f:
+        base = f.read()
+    before = base.replace(b"test render::tests::tabs ... FAILED", b"test render::tests::tabs ... ok")
+    after = before.replace(b"test cli_large_file ... FAILED", b"test cli_large_file ... ok")
+    logs = directory / "logs"
+    logs.mkdir()
+    for state, data in (("base", base), ("before", before), ("after", after)):
+        (logs / f"task_{state}.log").write_bytes(data)
+    (logs / "task.json").write_text(json.dumps({
+        "fail_to_pass": ["render::tests::tabs", "cli_large_file"],
+        "pass_to_pass": ["lexer::tests::keywords", "cli_reads_stdin", "parser::tests::huge_input"],
+    }))
+    return [str(logs / f"task_{state}.log") for state in ("base", "before", "after")]
+
+
+def test_views_match_the_parsed_dicts(tmp_path):
+    paths = state_logs(tmp_path)
+    store = ResultStore()
+    state_results = [parse_log_file(path) for path in paths]
+    views = [store.add_state(state, results) for state, results in zip(("base", "before", "after"), state_results)]
+    for view, results in zip(views, state_results):
+        assert list(view.items()) == list(results.items())
+        assert len(view) == len(results)
+    # Names are interned once across the states
+    assert len(store.names) == len(state_results[0])
+    base, before, _ = views
+    assert base.code_of("render::tests::tabs") == FAIL and before.code_of("render::tests::tabs") == PASS
+    assert base.code_of("cli_reads_stdin") == PASS_OTHER and base["cli_reads_stdin"] == "PASS (reading)"
+    assert base.code_of("parser::tests::huge_input") == OTHER
+    assert base.code_of("missing") == ABSENT and "missing" not in base
+
+
+def test_analysis_is_the_same_with_plain_dicts(tmp_path, monkeypatch):
+    state_logs(tmp_path)
+    expected = log_analyzer.analyze_logs(str(tmp_path))
+    monkeypatch.setattr(log_analyzer, "ResultStore", None)
+    result = log_analyzer.analyze_logs(str(tmp_path))
+    for key in ("validationResults", "failingTests", "failToPassTests", "passToPassTests", "summary"):
+        assert result[key] == expected[key]
+    assert expected["failToPassTests"] == [
+        [1, "render::tests::tabs", "FAIL", "PASS", "PASS"],
+        [2, "cli_large_file", "FAIL", "FAIL", "PASS"],
+    ]
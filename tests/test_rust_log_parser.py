@@ -0,0 +1,275 @@
+import gzip
+import json
+import os
+import random
+
+import pytest
+
+import log_parser
+from log_io import new_log_index, read_stream, read_test_excerpt
+from log_parser import RustLogStreamParser, parse_log_file
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+CARGO_LOG = os.path.join(FIXTURES, "cargo_test.log")
+
+
+def load_expected(name):
+    """Load the results the original line-by-line parser gave for a fixture."""
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_cargo_log_matches_original_parser():
+    expected = load_expected("cargo_test.expected.json")
+    assert list(parse_log_file(CARGO_LOG).items()) == list(expected.items())
+
+
+def test_crlf_log_matches_original_parser(tmp_path):
+    path = tmp_path / "crlf.log"
+    with open(CARGO_LOG, "rb") as f:
+        path.write_bytes(f.read().replace(b"\n", b"\r\n"))
+    assert parse_log_file(str(path)) == load_expected("cargo_test.expected.json")
+
+
+def test_invalid_utf8_is_replaced(tmp_path):
+    path = tmp_path / "latin1.log"
+    path.write_bytes(b"test m::caf\xe9 ... ok\ntest m::b ... \n\xff\xfe\nok\n")
+    assert parse_log_file(str(path)) == {"m::caf\ufffd": "PASS", "m::b": "PASS (\ufffd\ufffd)"}
+
+
+@pytest.mark.parametrize("workers", [2, 3, 5])
+def test_parallel_cargo_log_matches_original_parser(workers, monkeypatch):
+    monkeypatch.setattr(log_parser, "MIN_CHUNK_SIZE", 256)
+    with open(CARGO_LOG, "rb") as f:
+        assert len(log_parser.split_log_ranges(f.read(), workers)) > 1
+    expected = load_expected("cargo_test.expected.json")
+    assert list(parse_log_file(CARGO_LOG, workers=workers).items()) == list(expected.items())
+
+
+# Deferred results as the original parser, which buffered every line of
+# a test's output, gave them
+DEFERRED_CASES = {
+    "long output": (
+        b"test m::a ... \n" + b"progress line\n" * 5000 + b"ok\ntest m::b ... ok\n",
+        {"m::a": "PASS (progress)", "m::b": "PASS"},
+    ),
+    "last line decides": (
+        b"test m::a ... started\nsome output\nerror: broken pipe\n\ntest m::b ... ok\n",
+        {"m::a": "error: (started)", "m::b": "PASS"},
+    ),
+    "first ok or FAILED line": (
+        b"test m::a ... \nline one\nFAILED\nok\ntest m::b ... ok\n",
+        {"m::a": "FAIL (line)", "m::b": "PASS"},
+    ),
+    "first token cut": (
+        b"test m::a ... \nabcdefghijklmnop qr\nok\n",
+        {"m::a": "PASS (abcdefghij)"},
+    ),
+    "no output": (
+        b"test m::a ... \ntest m::b ... ok\n",
+        {"m::a": "UNKNOWN", "m::b": "PASS"},
+    ),
+    "at end of log": (
+        b"test m::a ... \nstill running\n",
+        {"m::a": "still (still)"},
+    ),
+    "long line": (
+        b"test m::a ... \n" + b"x" * 100000 + b" tail\n",
+        {"m::a": "xxxxxxxxxx (xxxxxxxxxx)"},
+    ),
+}
+
+
+@pytest.mark.parametrize("data, expected", DEFERRED_CASES.values(), ids=list(DEFERRED_CASES))
+def test_deferred_output_matches_original_parser(data, expected, tmp_path):
+    path = tmp_path / "deferred.log"
+    path.write_bytes(data)
+    assert parse_log_file(str(path)) == expected
+    parser = RustLogStreamParser()
+    for start in range(0, len(data), 4096):
+        parser.feed(data[start:start + 4096])
+    assert parser.close() == expected
+
+
+def test_excerpt_of_failed_test():
+    index = new_log_index()
+    parse_log_file(CARGO_LOG, index=index)
+    excerpt = read_test_excerpt(CARGO_LOG, index, "render::tests::tabs")
+    assert excerpt["statusLine"] == "test render::tests::tabs ... FAILED"
+    assert excerpt["failureOutput"].startswith("---- render::tests::tabs stdout ----\nexpected 4 columns, got 8\n")
+    assert "tab width mismatch" in excerpt["failureOutput"]
+    assert "failures:" not in excerpt["failureOutput"]
+
+
+def test_excerpt_of_passed_test():
+    index = new_log_index()
+    parse_log_file(CARGO_LOG, index=index)
+    assert read_test_excerpt(CARGO_LOG, index, "cli_help") == {
+        "statusLine": "test cli_help ... ok",
+        "failureOutput": None,
+    }
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_index_is_the_same_on_every_path(workers, monkeypatch, tmp_path):
+    monkeypatch.setattr(log_parser, "MIN_CHUNK_SIZE", 256)
+    expected = new_log_index()
+    parse_log_file(CARGO_LOG, index=expected)
+    index = new_log_index()
+    parse_log_file(CARGO_LOG, workers=workers, index=index)
+    assert index == expected
+    compressed = tmp_path / "cargo_test.log.gz"
+    with open(CARGO_LOG, "rb") as f, gzip.open(compressed, "wb") as out:
+        out.write(f.read())
+    index = new_log_index()
+    parse_log_file(str(compressed), index=index)
+    assert index == expected
+
+
+CASES = {
+    "inline": (
+        b"running 2 tests\n"
+        b"test m::a ... ok\n"
+        b"test m::b ... FAILED\n"
+        b"test result: FAILED. 1 passed; 1 failed\n"
+    ),
+    "deferred status line before failures list": (
+        b"test m::t3 ... \n"
+        b"  ok then\n"
+        b"\n"
+        b"failures:\n"
+        b"    m::t3\n"
+    ),
+    "failures list before status line": (
+        b"test m::t3 ... \n"
+        b"failures:\n"
+        b"    m::t3\n"
+        b"ok\n"
+    ),
+    "interleaved": (
+        b"test m::a ... \n"
+        b"test m::b ... ok\n"
+        b"ok\n"
+        b"test m::c ... \n"
+        b"test m::d ... \n"
+        b"FAILED\n"
+        b"\n"
+        b"failures:\n"
+        b"    m::c\n"
+        b"\n"
+        b"test result: FAILED. 2 passed; 2 failed\n"
+    ),
+    "unfinished": (
+        b"test m::a ... ok\n"
+        b"test m::b ... \n"
+        b"some output\n"
+    ),
+}
+
+OUTPUT_LINES = [
+    b"",
+    b"ok",
+    b"FAILED",
+    b"ignored",
+    b"  ok then",
+    b"thread 'main' panicked at src/lib.rs:1:1",
+    b"failures:",
+    b"    m::t{}",
+    b"---- m::t{} stdout ----",
+    b"test result: FAILED. 1 passed; 1 failed",
+]
+
+
+def random_log(seed, count=60):
+    rng = random.Random(seed)
+    lines = [b"running %d tests" % count]
+    for i in range(count):
+        lines.append(b"test m::t%d ... %s" % (i, rng.choice([b"ok", b"FAILED", b"", b"", b"ignored", b"<output>"])))
+        for _ in range(rng.randrange(3)):
+            lines.append(rng.choice(OUTPUT_LINES).replace(b"{}", b"%d" % rng.randrange(count)))
+    return b"\n".join(lines) + b"\n"
+
+
+LOGS = list(CASES.values()) + [random_log(seed) for seed in range(20)]
+LOG_IDS = list(CASES) + [f"random-{seed}" for seed in range(20)]
+
+
+def stream_parse(data, chunk_size):
+    parser = RustLogStreamParser()
+    for start in range(0, len(data), chunk_size):
+        parser.feed(data[start:start + chunk_size])
+    return parser.close()
+
+
+@pytest.fixture(params=LOGS, ids=LOG_IDS)
+def log(request, tmp_path):
+    path = tmp_path / "test.log"
+    path.write_bytes(request.param)
+    return request.param, path
+
+
+def test_mapped_parse_matches_stream(log):
+    data, path = log
+    assert parse_log_file(str(path)) == stream_parse(data, len(data))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64])
+def test_stream_is_independent_of_chunk_size(log, chunk_size):
+    data, _ = log
+    assert stream_parse(data, chunk_size) == stream_parse(data, len(data))
+
+
+def test_compressed_log_matches_mapped(log, tmp_path):
+    data, path = log
+    compressed = tmp_path / "test.log.gz"
+    with gzip.open(compressed, "wb") as f:
+        f.write(data)
+    assert parse_log_file(str(compressed)) == parse_log_file(str(path))
+
+
+def test_parallel_parse_matches_mapped(log, monkeypatch):
+    data, path = log
+    expected = parse_log_file(str(path))
+    monkeypatch.setattr(log_parser, "MIN_CHUNK_SIZE", 64)
+    assert parse_log_file(str(path), workers=4) == expected
+
+
+def test_status_line_before_failures_list():
+    results = log_parser.parse_log_bytes(CASES["deferred status line before failures list"])
+    assert results == {"m::t3": "PASS (ok)"}
+
+
+def test_read_stream_matches_mapped(log):
+    data, path = log
+    parser = RustLogStreamParser()
+    with open(path, "rb") as f:
+        read_stream(parser, f, chunk_size=5)
+    assert parser.close() == parse_log_file(str(path))
+
+
+REPORT_TIME_LOG = (
+    b"running 3 tests\n"
+    b"test m::a ... ok <0.250s>\n"
+    b"test m::b ... FAILED <1.500s>\n"
+    b"test m::c has been running for over 60 seconds\n"
+    b"test m::c ... ok <75.020s>\n"
+    b"test m::d has been running for over 60 seconds\n"
+)
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_report_time_durations(workers, monkeypatch, tmp_path):
+    monkeypatch.setattr(log_parser, "MIN_CHUNK_SIZE", 32)
+    path = tmp_path / "x.log"
+    path.write_bytes(REPORT_TIME_LOG)
+    durations = {}
+    assert parse_log_file(str(path), workers=workers, durations=durations) == {
+        "m::a": "PASS", "m::b": "FAIL", "m::c": "PASS"}
+    # The running notice of an unfinished test is a lower bound
+    assert durations == {"m::a": 0.25, "m::b": 1.5, "m::c": 75.02, "m::d": 60.0}
+
+
+def test_running_notice_of_cargo_log_is_a_duration():
+    durations = {}
+    parse_log_file(CARGO_LOG, durations=durations)
+    assert durations == {"util::tests::slow_hash": 60.0}
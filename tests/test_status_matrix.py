@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+import log_analyzer
+import reference_checks
+from result_store import ResultStore
+from status_matrix import StatusMatrix
+
+STATUSES = ["PASS", "FAIL", "PASS (ok)", "FAIL (panicked)", "ignored", "UNKNOWN"]
+
+
+def random_case(seed):
+    rng = random.Random(seed)
+    names = [f"m::t{i}" for i in range(30)]
+    state_results = [{name: rng.choice(STATUSES) for name in rng.sample(names, rng.randrange(len(names)))}
+                     for _ in range(3)]
+    f2p_tests = rng.sample(names, rng.randrange(8))
+    p2p_tests = rng.sample(names, rng.randrange(15))
+    return f2p_tests, p2p_tests, state_results
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_tables_match_per_test_loops(seed):
+    f2p_tests, p2p_tests, state_results = random_case(seed)
+    assert log_analyzer.make_table(f2p_tests, *state_results) == reference_checks.table(f2p_tests, state_results)
+    assert (log_analyzer.make_table(p2p_tests, *state_results, filter_all_pass=True)
+            == reference_checks.table(p2p_tests, state_results, filter_all_pass=True))
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_report_matches_per_test_loops(seed):
+    f2p_tests, p2p_tests, state_results = random_case(seed)
+    result = log_analyzer.build_report(f2p_tests, p2p_tests, *state_results)
+    expected = reference_checks.failing_tests(f2p_tests, p2p_tests, state_results)
+    assert sorted(result["failingTests"]) == sorted(expected)
+    summary = result["summary"]
+    assert [summary["baseFailCount"], summary["beforeFailCount"], summary["afterFailCount"]] == [
+        sum(1 for status in results.values() if status.startswith("FAIL")) for results in state_results]
+    assert summary["allPassCount"] == reference_checks.table(p2p_tests, state_results, filter_all_pass=True)[1]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_store_views_give_the_same_matrix(seed):
+    _, _, state_results = random_case(seed)
+    store = ResultStore()
+    views = [store.add_state(state, results) for state, results in enumerate(state_results)]
+    expected = StatusMatrix.for_logs(state_results)
+    matrix = StatusMatrix.for_logs(views)
+    assert matrix.names == expected.names
+    assert matrix.columns == expected.columns
+    assert [matrix.failing_rows(column) for column in range(3)] == [
+        expected.failing_rows(column) for column in range(3)]
@@ -0,0 +1,79 @@
+import random
+
+import pytest
+
+import log_analyzer
+import reference_checks
+from validation_rules import RuleContext, ValidationRules, load_validation_rules, validation_rules
+
+NAMES = [f"m::t{i}" for i in range(20)] + [
+    "m::uuid_0123abcd-0123-4567-89ab-0123456789ab",
+    "m::built in 1.73s",
+    "m::date_2024-01-31",
+    "m::timestamp_1754506597526",
+    "m::date_2024-01-31_1754506597526",
+]
+STATUSES = ["PASS", "FAIL", "PASS (ok)", "FAIL (panicked)", "ignored"]
+
+
+def random_case(seed):
+    rng = random.Random(seed)
+    state_results = [{name: rng.choice(STATUSES) for name in rng.sample(NAMES, rng.randrange(len(NAMES)))}
+                     for _ in range(3)]
+    f2p_tests = [rng.choice(NAMES) for _ in range(rng.randrange(6))]
+    p2p_tests = [rng.choice(NAMES) for _ in range(rng.randrange(12))]
+    return f2p_tests, p2p_tests, state_results
+
+
+def unordered(checks, positions=(2, 3)):
+    """Sort the examples of the checks the first loops took from a set."""
+    return [dict(check, examples=sorted(check["examples"])) if i in positions else check
+            for i, check in enumerate(checks)]
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_checks_match_per_check_loops(seed):
+    f2p_tests, p2p_tests, state_results = random_case(seed)
+    expected = reference_checks.validation_results(f2p_tests, p2p_tests, *state_results)
+    assert unordered(log_analyzer.validate_test_conditions(f2p_tests, p2p_tests, *state_results)) == unordered(expected)
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_rejections_match_per_rule_loops(seed):
+    f2p_tests, p2p_tests, state_results = random_case(seed)
+    expected = reference_checks.rejection_violations(f2p_tests, p2p_tests, *state_results)
+    assert log_analyzer.check_early_rejection_rules(f2p_tests, p2p_tests, *state_results) == expected
+
+
+def test_report_appends_rejections_to_checks():
+    f2p_tests = ["m::date_2024-01-31"]
+    result = log_analyzer.build_report(f2p_tests, [], {}, {"m::date_2024-01-31": "PASS"}, {})
+    descriptions = [check["description"] for check in result["validationResults"]]
+    assert descriptions[4:] == [
+        "Early rejection rule violated: Test name contains unstable values (date): m::date_2024-01-31",
+        "Early rejection rule violated: Base log is empty",
+        "Early rejection rule violated: After log is empty",
+        "Early rejection rule violated: PASS_TO_PASS list is empty",
+    ]
+    assert result["validationResults"][2]["examples"] == ["m::date_2024-01-31"]
+    assert [timing["rule"] for timing in result["ruleTimings"]][:4] == [check.name for check in validation_rules.checks]
+
+
+def test_invalid_rules_are_rejected():
+    for rule in ("exists t in F2P", "exists t in X2P where base=FAIL", "exists t in P2P where base=GREEN",
+                 "exists t in P2P where later=FAIL"):
+        with pytest.raises(ValueError):
+            ValidationRules([{"name": "bad", "rule": rule}])
+
+
+def test_rules_file_can_be_replaced(tmp_path, monkeypatch):
+    path = tmp_path / "rules.json"
+    path.write_text('{"checks": [{"name": "f2p-fails-after", "rule": "no t in F2P where after=FAIL"}]}')
+    monkeypatch.setenv("LOG_ANALYZER_VALIDATION_RULES", str(path))
+    rules = load_validation_rules()
+    f2p_tests = ["m::a"]
+    state_results = [{}, {"m::a": "FAIL"}, {"m::a": "FAIL (panicked)"}]
+    state_matches = log_analyzer.build_log_matches(f2p_tests, state_results)
+    matrix = log_analyzer.StatusMatrix.for_logs(state_results)
+    results, _ = rules.run_checks(RuleContext(f2p_tests, [], [0, 1, 1], matrix, state_matches))
+    assert results == [{"status": "FAIL", "description": "f2p-fails-after", "examples": ["m::a"]}]